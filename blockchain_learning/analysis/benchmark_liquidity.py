@@ -0,0 +1,54 @@
+"""Compare tick_liquidity with `node liquidity.js` on the same pool.
+
+usage: python benchmark_liquidity.py [pool_address] [runs]
+"""
+import os
+import sys
+import json
+import time
+import subprocess
+import numpy as np
+from main import _PoolData
+from tick_liquidity import formatted_liquidity
+
+POOL = '0x8ad599c3a0ff1de082011efddc58f1908eb6e6d8'
+# the subgraph liquidity.js reads from
+JS_URL = 'https://api.thegraph.com/subgraphs/name/ianlapham/uniswap-v3-testing'
+
+
+def run_node(pool_address):
+    directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'liquidity.js')
+    output = subprocess.check_output(['node', directory, pool_address]).decode('utf-8')
+    rows = json.loads(output)
+    return {column: np.array([row[column] for row in rows], dtype=np.float64) for column in rows[0]}
+
+
+def run_python(pool_address):
+    pool_data = _PoolData(pool_address)
+    pool_data._url = JS_URL
+    pool = pool_data.fetchTicksSurroundingPrice()
+    return formatted_liquidity(pool, pool_data.fetchInitializedTicks())
+
+
+def timed(func, *args, runs=3):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - start)
+    return result, min(timings)
+
+
+def main(pool_address=POOL, runs=3):
+    js, js_time = timed(run_node, pool_address, runs=runs)
+    py, py_time = timed(run_python, pool_address, runs=runs)
+
+    print(f'liquidity.js     {js_time:8.3f}s')
+    print(f'tick_liquidity   {py_time:8.3f}s')
+    for column, values in js.items():
+        match = len(values) == len(py[column]) and np.array_equal(values, py[column])
+        print(f'{column:16} {"match" if match else "MISMATCH"}')
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:2], *[int(arg) for arg in sys.argv[2:3]])
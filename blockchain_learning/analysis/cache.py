@@ -0,0 +1,88 @@
+import re
+import json
+import time
+import sqlite3
+import hashlib
+from threading import Lock
+
+
+class SQLiteResponseCache:
+    """On-disk cache of graphql responses.
+
+    Entries are keyed on a hash of the endpoint url, the whitespace-normalized query,
+    the operation name and the variables. Queries pinned to a block (`block: {number: ...}` in
+    the query or a `block` variable) never change, so they never expire; queries
+    that follow the chain head expire after `ttl` seconds (None keeps them forever).
+    `_meta` queries read the indexing head itself and expire after the shorter
+    `meta_ttl`, 0 leaves them uncached.
+    """
+
+    _pinned = re.compile(r'block\s*:\s*\{\s*(number|hash)\b')
+
+    def __init__(self, path, ttl=600, url='', meta_ttl=60):
+        self.path = path
+        self.ttl = ttl
+        self.meta_ttl = meta_ttl
+        self.url = url
+        self._lock = Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                'key TEXT PRIMARY KEY, response TEXT NOT NULL, expires REAL)'
+                )
+
+    @staticmethod
+    def normalize(query):
+        query = ' '.join(query.split())
+        return re.sub(r'\s*([{}():,!\[\]=])\s*', r'\1', query)
+
+    def key(self, query, variables=None, operation_name=None):
+        payload = json.dumps(
+            [self.url, self.normalize(query), operation_name, variables or {}],
+            sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def is_pinned(self, query, variables=None):
+        return bool(self._pinned.search(query)) or (variables or {}).get('block') is not None
+
+    def get(self, query, variables=None, operation_name=None):
+        key = self.key(query, variables, operation_name)
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT response, expires FROM responses WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        response, expires = row
+        if expires is not None and expires < time.time():
+            return None
+        return json.loads(response)
+
+    def set(self, query, variables, operation_name, response):
+        if 'errors' in response:
+            return
+        expires = None
+        if '_meta' in query:
+            if not self.meta_ttl:
+                return
+            expires = time.time() + self.meta_ttl
+        elif self.ttl is not None and not self.is_pinned(query, variables):
+            expires = time.time() + self.ttl
+        key = self.key(query, variables, operation_name)
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO responses (key, response, expires) VALUES (?, ?, ?)',
+                (key, json.dumps(response), expires))
+
+    def purge(self):
+        """Delete expired entries"""
+        with self._lock, self._connection:
+            self._connection.execute(
+                'DELETE FROM responses WHERE expires IS NOT NULL AND expires < ?', (time.time(),))
+
+    def clear(self):
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM responses')
+
+    def close(self):
+        self._connection.close()
@@ -0,0 +1,86 @@
+"""Shared executors for the analysis classes.
+
+Subgraph fetches wait on the network and run on a bounded thread pool, tick math
+holds the GIL and runs on a process pool. Both pools are created on first use
+and shared by every instance.
+"""
+import os
+import importlib
+import multiprocessing
+from functools import wraps
+from threading import Lock
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, TimeoutError, wait
+
+IO_WORKERS = 8
+CPU_WORKERS = os.cpu_count() or 1
+
+_lock = Lock()
+_executors = {}
+
+
+def io_executor():
+    with _lock:
+        if 'io' not in _executors:
+            _executors['io'] = ThreadPoolExecutor(IO_WORKERS, thread_name_prefix='analysis-io')
+        return _executors['io']
+
+
+def cpu_executor():
+    with _lock:
+        if 'cpu' not in _executors:
+            # spawn, forking a process that runs network threads can deadlock
+            _executors['cpu'] = ProcessPoolExecutor(
+                CPU_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+        return _executors['cpu']
+
+
+def shutdown(wait=True):
+    with _lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait)
+
+
+def threaded(func):
+    """Run func on the I/O thread pool, the call returns a Future"""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        return io_executor().submit(func, *args, **kwargs)
+    return wrapper
+
+
+def _call(module, name, args, kwargs):
+    func = importlib.import_module(module)
+    for attribute in name.split('.'):
+        func = getattr(func, attribute)
+    return getattr(func, '__wrapped__', func)(*args, **kwargs)
+
+
+def in_process(func):
+    """Run a function or staticmethod on the process pool, the call returns a Future.
+
+    Arguments and results are pickled, so pass arrays and Tables rather than
+    clients. The worker looks func up by name, which keeps the decorated function
+    picklable.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        return cpu_executor().submit(_call, func.__module__, func.__qualname__, args, kwargs)
+    return wrapper
+
+
+def gather(futures, timeout=None):
+    """Results of a {name: future} dict.
+
+    Raises TimeoutError naming the jobs still running after timeout seconds, after
+    cancelling those that have not started. Cancelled jobs are left out of the
+    results, a failed job re-raises its exception.
+    """
+    done, pending = wait(futures.values(), timeout=timeout)
+    if pending:
+        for future in pending:
+            future.cancel()
+        names = sorted(name for name, future in futures.items() if future in pending)
+        raise TimeoutError(f'jobs still running after {timeout}s: {", ".join(names)}')
+    return {name: future.result() for name, future in futures.items() if not future.cancelled()}
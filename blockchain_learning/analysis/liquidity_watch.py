@@ -0,0 +1,131 @@
+import numpy as np
+from paginate import KeysetPaginator
+
+
+class TickChangeDetector:
+    """Follows the initialized ticks of a pool block by block.
+
+    The curve is downloaded once, then each poll() only asks the subgraph for ticks
+    changed since the last seen block (`_change_block`) and updates the tickIdx,
+    liquidityNet and liquidityGross arrays in place. `callback` is called with the
+    ticks whose liquidity actually changed.
+    """
+
+    _meta_query = """
+        query meta {
+            _meta { block { number } }
+        }
+    """
+
+    _ticks_query = """
+        query changedTicks(
+            $poolAddress: String!,
+            $cursor: String!,
+            $since: Int!,
+            $block: Int!
+            ) {
+                ticks(
+                    first: 1000
+                    where: {poolAddress: $poolAddress, id_gt: $cursor, _change_block: {number_gte: $since}}
+                    orderBy: id
+                    orderDirection: asc
+                    block: {number: $block}
+                    ) {
+                        id
+                        tickIdx
+                        liquidityGross
+                        liquidityNet
+                    }
+                }
+    """
+
+    def __init__(self, client, pool_address, callback=None):
+        self.client = client
+        self.pool_address = pool_address
+        self.callback = callback
+        self.block = None
+        self.tick_idx = np.empty(0, dtype=np.int64)
+        self.liquidity_net = np.empty(0, dtype=object)
+        self.liquidity_gross = np.empty(0, dtype=object)
+
+    def head(self):
+        return int(self.client.query(self._meta_query)['data']['_meta']['block']['number'])
+
+    def fetch(self, since, block):
+        variables = {'poolAddress': self.pool_address, 'since': since, 'block': block}
+        return list(KeysetPaginator(
+            self.client, self._ticks_query, 'ticks', variables, operation_name='changedTicks'))
+
+    def load(self, block=None):
+        """Download the whole curve at block (default the chain head)"""
+        block = self.head() if block is None else block
+        self.set_curve(self.fetch(0, block), block)
+
+    def set_curve(self, ticks, block):
+        ticks = sorted(ticks, key=lambda tick: int(tick['tickIdx']))
+        self.tick_idx = np.array([int(tick['tickIdx']) for tick in ticks], dtype=np.int64)
+        self.liquidity_net = np.array([int(tick['liquidityNet']) for tick in ticks], dtype=object)
+        self.liquidity_gross = np.array([int(tick['liquidityGross']) for tick in ticks], dtype=object)
+        self.block = block
+
+    def apply(self, ticks):
+        """Write ticks into the curve, returns the changed ones"""
+        ticks = sorted(ticks, key=lambda tick: int(tick['tickIdx']))
+        tick_idx = np.array([int(tick['tickIdx']) for tick in ticks], dtype=np.int64)
+        net = np.array([int(tick['liquidityNet']) for tick in ticks], dtype=object)
+        gross = np.array([int(tick['liquidityGross']) for tick in ticks], dtype=object)
+
+        position = np.searchsorted(self.tick_idx, tick_idx)
+        known = np.zeros(len(tick_idx), dtype=bool)
+        if len(self.tick_idx):
+            clipped = np.minimum(position, len(self.tick_idx) - 1)
+            known = (position < len(self.tick_idx)) & (self.tick_idx[clipped] == tick_idx)
+
+        previous_net = np.zeros(len(tick_idx), dtype=object)
+        previous_gross = np.zeros(len(tick_idx), dtype=object)
+        previous_net[known] = self.liquidity_net[position[known]]
+        previous_gross[known] = self.liquidity_gross[position[known]]
+        changed = ((previous_net != net) | (previous_gross != gross)).astype(bool)
+
+        self.liquidity_net[position[known]] = net[known]
+        self.liquidity_gross[position[known]] = gross[known]
+        if (~known).any():
+            new = ~known
+            self.tick_idx = np.insert(self.tick_idx, position[new], tick_idx[new])
+            self.liquidity_net = np.insert(self.liquidity_net, position[new], net[new])
+            self.liquidity_gross = np.insert(self.liquidity_gross, position[new], gross[new])
+
+        return {
+            'tickIdx': tick_idx[changed],
+            'liquidityNet': net[changed],
+            'liquidityGross': gross[changed],
+            'previousLiquidityNet': previous_net[changed],
+            'previousLiquidityGross': previous_gross[changed],
+            }
+
+    def poll(self):
+        """Apply the ticks changed since the last poll, returns the changed ticks or None"""
+        if self.block is None:
+            self.load()
+            return None
+        block = self.head()
+        if block <= self.block:
+            return None
+        ticks = self.fetch(self.block + 1, block)
+        self.block = block
+        if not ticks:
+            return None
+        changed = self.apply(ticks)
+        if not len(changed['tickIdx']):
+            return None
+        if self.callback is not None:
+            self.callback(changed)
+        return changed
+
+    @property
+    def curve(self):
+        return {
+            'tickIdx': self.tick_idx,
+            'liquidityNet': self.liquidity_net,
+            'liquidityGross': self.liquidity_gross,
+            }
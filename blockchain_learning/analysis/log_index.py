@@ -0,0 +1,395 @@
+"""Swap, Mint and Burn logs of Uniswap v3 pools indexed into SQLite from a node.
+
+LogIndexer follows the chain with eth_getLogs over block ranges that grow while
+they come back small and halve when the node refuses them. Every synced range
+ends with a checkpoint (block, hash); when the node no longer agrees with the
+latest checkpoint the index rolls back to the newest one it still agrees with.
+Swap prices, initialized ticks and the liquidity curve are then read locally.
+"""
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from threading import Event, Lock, Thread
+import numpy as np
+from records import Table
+from rpc import JsonRpcTransport, RpcError, RpcPoolAnalysis
+
+SWAP = '0xc42079f94a6350d7e6235f29174924f928cc2ac818eb64fed8004e115fbcca67'
+MINT = '0x7a53080ba414158be7ec69b987b5fb7d07dee101fe85488f0853ae16239d0bde'
+BURN = '0x0c396cd989a39f4459b5fa1aed6a9a8dcdbc45908acfd67e028cd568da98982c'
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS swaps (
+        pool TEXT NOT NULL, block INTEGER NOT NULL, log_index INTEGER NOT NULL,
+        timestamp INTEGER NOT NULL, sender TEXT, recipient TEXT,
+        amount0 REAL, amount1 REAL, sqrt_price TEXT, liquidity TEXT, tick INTEGER,
+        PRIMARY KEY (block, log_index));
+    CREATE INDEX IF NOT EXISTS swaps_pool_block ON swaps (pool, block);
+    CREATE TABLE IF NOT EXISTS positions (
+        pool TEXT NOT NULL, block INTEGER NOT NULL, log_index INTEGER NOT NULL,
+        timestamp INTEGER NOT NULL, owner TEXT, tick_lower INTEGER, tick_upper INTEGER,
+        amount TEXT, amount0 TEXT, amount1 TEXT,
+        PRIMARY KEY (block, log_index));
+    CREATE INDEX IF NOT EXISTS positions_pool_block ON positions (pool, block);
+    CREATE TABLE IF NOT EXISTS checkpoints (block INTEGER PRIMARY KEY, hash TEXT NOT NULL);
+    CREATE TABLE IF NOT EXISTS ticks (
+        pool TEXT NOT NULL, tick INTEGER NOT NULL, liquidity_net TEXT, liquidity_gross TEXT,
+        PRIMARY KEY (pool, tick));
+"""
+
+
+def _words(data):
+    data = bytes.fromhex(data[2:])
+    return [int.from_bytes(data[i:i + 32], 'big') for i in range(0, len(data), 32)]
+
+
+def _signed(value, bits=256):
+    return value - (1 << bits) if value >= 1 << (bits - 1) else value
+
+
+def _topic_int(topic):
+    return _signed(int(topic, 16))
+
+
+def _topic_address(topic):
+    return '0x' + topic[-40:]
+
+
+def _tick_deltas(positions, sign=1):
+    """{(pool, tick): (liquidityNet, liquidityGross)} change of (pool, tick_lower, tick_upper, amount) rows"""
+    deltas = {}
+    for pool, lower, upper, amount in positions:
+        amount = sign * int(amount)
+        net, gross = deltas.get((pool, lower), (0, 0))
+        deltas[pool, lower] = net + amount, gross + amount
+        net, gross = deltas.get((pool, upper), (0, 0))
+        deltas[pool, upper] = net - amount, gross + amount
+    return deltas
+
+
+class LogIndexer:
+    """Index of the Swap/Mint/Burn logs of `pools` from start_block on.
+
+    Mints are stored as positions with a positive amount and burns with a negative
+    one, liquidity amounts are kept as exact decimal strings. The ticks table holds
+    the running liquidityNet and liquidityGross of every initialized tick at the
+    synced block, updated as positions are indexed and rolled back with them.
+    """
+
+    logger = print
+    min_span = 1
+    max_span = 100000
+    target_logs = 5000
+    keep_checkpoints = 128
+
+    def __init__(self, pools, path='.log_index.sqlite', url='http://127.0.0.1:8545',
+                 start_block=0, confirmations=2, span=2000):
+        self.pools = [pool.lower() for pool in pools]
+        self.transport = JsonRpcTransport(url) if isinstance(url, str) else url
+        self.start_block = start_block
+        self.confirmations = confirmations
+        self.span = span
+        self._lock = Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        # pool -> (block, Table) of the ticks at the synced block
+        self._tick_tables = {}
+        with self._lock, self._connection:
+            self._connection.executescript(_SCHEMA)
+            # an index written before the ticks table existed
+            if self._connection.execute('SELECT 1 FROM ticks LIMIT 1').fetchone() is None:
+                rows = self._connection.execute(
+                    'SELECT pool, tick_lower, tick_upper, amount FROM positions').fetchall()
+                self._apply_ticks(_tick_deltas(rows))
+        self._stopped = Event()
+        self._thread = None
+
+    # -- sync
+
+    @property
+    def checkpoint(self):
+        """(block, hash) the index is synced to, None before the first range"""
+        with self._lock:
+            return self._connection.execute(
+                'SELECT block, hash FROM checkpoints ORDER BY block DESC LIMIT 1').fetchone()
+
+    def synced_block(self):
+        checkpoint = self.checkpoint
+        return self.start_block - 1 if checkpoint is None else checkpoint[0]
+
+    def block_hashes(self, blocks):
+        headers = self.transport.batch([('eth_getBlockByNumber', [hex(block), False]) for block in blocks])
+        return {block: header for block, header in zip(blocks, headers)}
+
+    def get_logs(self, start, stop):
+        return self.transport.call('eth_getLogs', {
+            'address': self.pools,
+            'fromBlock': hex(start),
+            'toBlock': hex(stop),
+            'topics': [[SWAP, MINT, BURN]],
+            })
+
+    def find_reorg(self):
+        """Newest checkpointed block the node still agrees with, None if there was no reorg"""
+        with self._lock:
+            checkpoints = self._connection.execute(
+                'SELECT block, hash FROM checkpoints ORDER BY block DESC').fetchall()
+        if not checkpoints:
+            return None
+        latest, latest_hash = checkpoints[0]
+        header = self.block_hashes([latest])[latest]
+        if header is not None and header['hash'] == latest_hash:
+            return None
+        headers = self.block_hashes([block for block, _ in checkpoints])
+        for block, block_hash in checkpoints:
+            header = headers[block]
+            if header is not None and header['hash'] == block_hash:
+                return block
+        return self.start_block - 1
+
+    def _apply_ticks(self, deltas):
+        """Add {(pool, tick): (net, gross)} to the ticks table, inside a transaction"""
+        self._tick_tables.clear()
+        for (pool, tick), (net, gross) in deltas.items():
+            row = self._connection.execute(
+                'SELECT liquidity_net, liquidity_gross FROM ticks WHERE pool = ? AND tick = ?',
+                (pool, tick)).fetchone()
+            if row is not None:
+                net, gross = net + int(row[0]), gross + int(row[1])
+            if gross:
+                self._connection.execute(
+                    'INSERT OR REPLACE INTO ticks VALUES (?, ?, ?, ?)', (pool, tick, str(net), str(gross)))
+            else:
+                self._connection.execute('DELETE FROM ticks WHERE pool = ? AND tick = ?', (pool, tick))
+
+    def rollback(self, block):
+        """Forget everything after block"""
+        with self._lock, self._connection:
+            rows = self._connection.execute(
+                'SELECT pool, tick_lower, tick_upper, amount FROM positions WHERE block > ?',
+                (block,)).fetchall()
+            self._apply_ticks(_tick_deltas(rows, -1))
+            for table in ('swaps', 'positions', 'checkpoints'):
+                self._connection.execute(f'DELETE FROM {table} WHERE block > ?', (block,))
+        self.logger(f'rolled back to block {block}')
+
+    def decode(self, logs, timestamps):
+        """Rows of the swaps and positions tables"""
+        swaps, positions = [], []
+        for log in logs:
+            block = int(log['blockNumber'], 16)
+            key = (log['address'].lower(), block, int(log['logIndex'], 16), timestamps[block])
+            topics = log['topics']
+            words = _words(log['data'])
+            if topics[0] == SWAP:
+                swaps.append(key + (
+                    _topic_address(topics[1]), _topic_address(topics[2]),
+                    float(_signed(words[0])), float(_signed(words[1])),
+                    str(words[2]), str(words[3]), _signed(words[4]),
+                    ))
+            elif topics[0] == MINT:
+                # data: sender, amount, amount0, amount1
+                positions.append(key + (
+                    _topic_address(topics[1]), _topic_int(topics[2]), _topic_int(topics[3]),
+                    str(words[1]), str(words[2]), str(words[3]),
+                    ))
+            elif topics[0] == BURN:
+                # data: amount, amount0, amount1
+                positions.append(key + (
+                    _topic_address(topics[1]), _topic_int(topics[2]), _topic_int(topics[3]),
+                    str(-words[0]), str(words[1]), str(words[2]),
+                    ))
+        return swaps, positions
+
+    def index_range(self, start, stop):
+        """Index [start, stop], returns the number of logs"""
+        logs = [log for log in self.get_logs(start, stop) if not log.get('removed')]
+        blocks = sorted({int(log['blockNumber'], 16) for log in logs} | {stop})
+        headers = self.block_hashes(blocks)
+        if any(header is None for header in headers.values()):
+            raise RpcError(f'missing headers in [{start}, {stop}]')
+        for log in logs:
+            if headers[int(log['blockNumber'], 16)]['hash'] != log['blockHash']:
+                raise RpcError(f'reorg while indexing [{start}, {stop}]')
+        timestamps = {block: int(header['timestamp'], 16) for block, header in headers.items()}
+        swaps, positions = self.decode(logs, timestamps)
+        with self._lock, self._connection:
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO swaps VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', swaps)
+            # a range indexed again after a failed sync replaces its positions
+            replaced = self._connection.execute(
+                'SELECT pool, tick_lower, tick_upper, amount FROM positions WHERE block BETWEEN ? AND ?',
+                (start, stop)).fetchall()
+            self._connection.execute('DELETE FROM positions WHERE block BETWEEN ? AND ?', (start, stop))
+            self._connection.executemany(
+                'INSERT INTO positions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', positions)
+            deltas = _tick_deltas(replaced, -1)
+            for key, (net, gross) in _tick_deltas(
+                    [(row[0], row[5], row[6], row[7]) for row in positions]).items():
+                before = deltas.get(key, (0, 0))
+                deltas[key] = before[0] + net, before[1] + gross
+            self._apply_ticks(deltas)
+            self._connection.execute(
+                'INSERT OR REPLACE INTO checkpoints VALUES (?, ?)', (stop, headers[stop]['hash']))
+            self._connection.execute(
+                'DELETE FROM checkpoints WHERE block < (SELECT MIN(block) FROM '
+                '(SELECT block FROM checkpoints ORDER BY block DESC LIMIT ?))', (self.keep_checkpoints,))
+        return len(logs)
+
+    def sync(self):
+        """Index up to head - confirmations, returns the synced block"""
+        ancestor = self.find_reorg()
+        if ancestor is not None:
+            self.rollback(ancestor)
+        head = int(self.transport.call('eth_blockNumber'), 16) - self.confirmations
+        start = self.synced_block() + 1
+        while start <= head and not self._stopped.is_set():
+            stop = min(start + self.span - 1, head)
+            try:
+                count = self.index_range(start, stop)
+            except RpcError as error:
+                # too many results, a timeout or a reorg under us: retry a smaller range
+                if self.span <= self.min_span:
+                    raise
+                self.span = max(self.span // 2, self.min_span)
+                self.logger(f'[{start}, {stop}] failed ({error}), span {self.span}')
+                continue
+            if count < self.target_logs // 2:
+                self.span = min(self.span * 2, self.max_span)
+            start = stop + 1
+        return self.synced_block()
+
+    def run(self, interval=12):
+        while not self._stopped.is_set():
+            try:
+                self.sync()
+            except Exception as error:
+                self.logger(f'sync failed: {error!r}')
+            self._stopped.wait(interval)
+
+    def start(self, interval=12):
+        self._stopped.clear()
+        self._thread = Thread(target=self.run, args=(interval,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        self.stop()
+        self._connection.close()
+        self.transport.close()
+
+    # -- reads
+
+    def swaps(self, pool, since=0, block=None):
+        """timestamp, amount0 and amount1 (raw token units) of the pool's swaps as arrays"""
+        block = self._block(block)
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT timestamp, amount0, amount1 FROM swaps '
+                'WHERE pool = ? AND block <= ? AND timestamp >= ? ORDER BY block, log_index',
+                (pool.lower(), block, since)).fetchall()
+        rows = np.array(rows, dtype=np.float64).reshape(-1, 3)
+        return {
+            'timestamp': rows[:, 0].astype(np.int64),
+            'amount0': rows[:, 1],
+            'amount1': rows[:, 2],
+            }
+
+    def last_swap(self, pool, block=None):
+        block = self._block(block)
+        with self._lock:
+            return self._connection.execute(
+                'SELECT tick, sqrt_price FROM swaps WHERE pool = ? AND block <= ? '
+                'ORDER BY block DESC, log_index DESC LIMIT 1',
+                (pool.lower(), block)).fetchone()
+
+    def ticks(self, pool, block=None):
+        """Initialized ticks of the pool at block as a records.TICK Table.
+
+        At the synced block they are read from the ticks table, at an earlier one
+        the positions indexed since are taken back out of it.
+        """
+        pool = pool.lower()
+        with self._lock:
+            checkpoint = self._connection.execute('SELECT MAX(block) FROM checkpoints').fetchone()[0]
+            synced = self.start_block - 1 if checkpoint is None else checkpoint
+            block = synced if block is None else min(block, synced)
+            cached = self._tick_tables.get(pool)
+            if cached is not None and cached[0] == block:
+                return cached[1]
+            rows = self._connection.execute(
+                'SELECT tick, liquidity_net, liquidity_gross FROM ticks WHERE pool = ?', (pool,)).fetchall()
+            later = self._connection.execute(
+                'SELECT pool, tick_lower, tick_upper, amount FROM positions WHERE pool = ? AND block > ?',
+                (pool, block)).fetchall()
+            liquidity = {tick: (int(net), int(gross)) for tick, net, gross in rows}
+            for (_, tick), (net, gross) in _tick_deltas(later, -1).items():
+                before = liquidity.get(tick, (0, 0))
+                liquidity[tick] = before[0] + net, before[1] + gross
+            tick_idx = np.array(sorted(tick for tick, value in liquidity.items() if value[1]), dtype=np.int64)
+            price0 = np.power(1.0001, tick_idx.astype(np.float64))
+            table = Table(
+                tickIdx=tick_idx,
+                liquidityGross=np.array([liquidity[tick][1] for tick in tick_idx.tolist()], dtype=object),
+                liquidityNet=np.array([liquidity[tick][0] for tick in tick_idx.tolist()], dtype=object),
+                price0=price0,
+                price1=1 / price0,
+                )
+            if block == synced:
+                self._tick_tables[pool] = block, table
+        return table
+
+    def _block(self, block):
+        return self.synced_block() if block is None else block
+
+
+class IndexedPoolAnalysis(RpcPoolAnalysis):
+    """RpcPoolAnalysis whose ticks, pool state and swap prices come from a LogIndexer.
+
+    The index must start at the pool's creation block for the ticks to be complete.
+    Only the pool's tokens and fee are read from the node.
+    """
+
+    def __init__(self, pool_address, indexer, rpc_url=None):
+        super().__init__(pool_address, rpc_url)
+        self.indexer = indexer
+
+    def head_block(self):
+        return self.indexer.synced_block()
+
+    def fetchInitializedTicks(self, count_hint=None, block=None):
+        return self.indexer.ticks(self.pool_address, block)
+
+    def fetchTicksSurroundingPrice(self, block=None):
+        constants = self.pool_constants
+        swap = self.indexer.last_swap(self.pool_address, block)
+        if swap is None:
+            return super().fetchTicksSurroundingPrice(block)
+        tick, sqrt_price = swap
+        ticks = self.indexer.ticks(self.pool_address, block)
+        liquidity = sum(ticks['liquidityNet'][ticks['tickIdx'] <= tick].tolist())
+        return {
+            'tick': str(tick),
+            'token0': {key: str(value) for key, value in constants['token0'].items()},
+            'token1': {key: str(value) for key, value in constants['token1'].items()},
+            'feeTier': str(constants['feeTier']),
+            'sqrtPrice': sqrt_price,
+            'liquidity': str(liquidity),
+            }
+
+    def get_historical_pool_prices(self, pool_address, time_delta):
+        """Same columns as the subgraph version, amounts in token units"""
+        if pool_address.lower() != self.pool_address:
+            # the token decimals are those of this pool
+            raise ValueError(f'{pool_address} is not {self.pool_address}, use an IndexedPoolAnalysis of that pool')
+        since = int((datetime.utcnow() - timedelta(time_delta)).replace(tzinfo=timezone.utc).timestamp())
+        data = self.indexer.swaps(pool_address.lower(), since)
+        constants = self.pool_constants
+        data['amount0'] = data['amount0'] / 10 ** constants['token0']['decimals']
+        data['amount1'] = data['amount1'] / 10 ** constants['token1']['decimals']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            data['priceInToken1'] = np.abs(data['amount1'] / data['amount0'])
+        return data
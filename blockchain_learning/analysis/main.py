@@ -1,70 +1,104 @@
-import os
-import time
-import json
-import subprocess
-from threading import Thread
+import asyncio
+from threading import Event, Thread
 import pandas as pd
 import matplotlib.pyplot as plt
-import cbpro
+from tmp import EtherumUSDCPool, UniV3SubgraphClient
+from paginate import KeysetPaginator
+from tick_liquidity import formatted_liquidity
+from tick_math import tick_to_price_array
+from liquidity_watch import TickChangeDetector
+from ticker import TickerFeed
+
+
+class _PoolData(EtherumUSDCPool):
+    """Subgraph queries for the pool at pool_address"""
+
+    # monitors need the chain head, not a cached response
+    cache_path = None
+
+    def __init__(self, pool_address):
+        self.POOL = pool_address
+
+    @property
+    def pool_address(self):
+        return self.POOL
 
 
 class _LiquidityAnalysis:
 
     POOL = NotImplemented
     PRODUCTS = NotImplemented
-    # copied from https://github.com/yossigruner/uniswapv3_liquidity/
-    filename = 'liquidity.js'
     _url = "wss://ws-feed.pro.coinbase.com"
     logger = print
+    # a render.FigureRenderer, required when the loop runs without a display
+    renderer = None
 
     def __init__(self):
-        self.wsClient = cbpro.WebsocketClient(
-            url=self._url,
-            products=self.PRODUCTS,
-            channels=["ticker"]
-            )
-        self.__thread = True
+        self.wsClient = TickerFeed(self.PRODUCTS, url=self._url)
+        self.pool_data = _PoolData(self.POOL)
+        self.__stopped = Event()
+        self.__loop = None
 
     def get_liquidity(self, index='price1'):
-        directory = os.path.join(os.path.dirname(__file__), self.filename)
-        cmd = f'node {directory} {self.POOL}'
-        output = subprocess.check_output(cmd.split(' ')).decode('utf-8')
-        df = pd.DataFrame(json.loads(output))
-        for column in df.columns:
-            df[column] = df[column].astype(float)
-        df.index = df[index].astype(float)
+        pool = self.pool_data.fetchTicksSurroundingPrice()
+        df = pd.DataFrame(formatted_liquidity(pool, self.pool_data.fetchInitializedTicks()))
+        df.index = df[index]
         return df.activeLiquidity
 
     def sleep(self, sleep):
-        for _ in range(sleep):
-            if self.__thread:
-                time.sleep(1)
+        self.__stopped.wait(sleep)
 
-    def check_new_liquidity(self, sleep=60):
+    def check_new_liquidity(self, sleep=12):
+        """Poll the pool's ticks every `sleep` seconds (about one block) and call back
+        with the ticks whose liquidity changed since the previous poll"""
 
         def loop():
-            liquidity = set(self.liquidity.to_dict().items())
-            while self.__thread:
+            pool = self.pool_data.fetchTicksSurroundingPrice()
+            decimals = int(pool['token0']['decimals']), int(pool['token1']['decimals'])
+            detector = TickChangeDetector(self.pool_data, self.POOL)
+            detector.load()
+            while not self.__stopped.is_set():
                 self.logger('checking liquidity')
                 self.sleep(sleep)
-                new_liquidity = liquidity - set(self.get_liquidity().to_dict().items())
-                if new_liquidity:
-                    self.new_liquidity = new_liquidity
+                if self.__stopped.is_set():
+                    break
+                changed = detector.poll()
+                if changed:
+                    _, price1 = tick_to_price_array(changed['tickIdx'], *decimals)
+                    self.new_liquidity = pd.DataFrame({
+                        'liquidityNet': changed['liquidityNet'].astype(float),
+                        'previousLiquidityNet': changed['previousLiquidityNet'].astype(float),
+                        }, index=price1)
                     self.callback()
             self.logger('stopped loop')
 
-        th = Thread(target=loop, args=())
-        th.start()
+        self.__stopped.clear()
+        self.__loop = Thread(target=loop, args=())
+        self.__loop.start()
 
     def callback(self):
         self.logger('liquidity has changed')
-        df = pd.DataFrame(sorted(list(self.new_liquidity)))
-        df.index = df[0]
-        df[[1]].plot()
+        if self.renderer is not None:
+            self.renderer.submit(f'{self.POOL}_new_liquidity', self.new_liquidity.sort_index())
+            return
+        self.new_liquidity.sort_index().plot()
         plt.show()
 
+    def start_ticker(self):
+        """Stream ticker prints into self.ticker (a TickerBuffer per product)"""
+        self.wsClient.start()
+
+    @property
+    def ticker(self):
+        return self.wsClient.buffers[self.PRODUCTS]
+
     def stop(self):
-        self.__thread = False
+        self.__stopped.set()
+        if self.__loop is not None:
+            self.__loop.join()
+            self.__loop = None
+        if self.wsClient.thread is not None:
+            self.wsClient.close()
 
     @property
     def liquidity(self):
@@ -77,3 +111,152 @@ class _LiquidityAnalysis:
 class WETHUSDCPool(_LiquidityAnalysis):
     PRODUCTS = "ETH-USD"
     POOL = '0x8ad599c3a0ff1de082011efddc58f1908eb6e6d8'
+
+
+class _MonitorClient(UniV3SubgraphClient):
+
+    # monitors need the chain head, not a cached response
+    cache_path = None
+
+
+class LiquidityMonitor:
+    """Watches the tick liquidity of many pools from one thread.
+
+    Every `interval` seconds an asyncio loop reads the subgraph head once and fetches
+    the ticks changed since the previous block for all pools, `batch_size` pools per
+    query with the batches in flight together. One websocket subscribes to the
+    ticker of every product. callback(pool_address, changed_ticks) is called from
+    the monitor thread. With a `renderer` the changes of all pools in a poll are
+    plotted in one batch.
+    """
+
+    _url = "wss://ws-feed.pro.coinbase.com"
+    logger = print
+
+    _ticks_query = """
+        query changedTicks(
+            $pools: [String!]!,
+            $cursor: String!,
+            $since: Int!,
+            $block: Int!
+            ) {
+                ticks(
+                    first: 1000
+                    where: {poolAddress_in: $pools, id_gt: $cursor, _change_block: {number_gte: $since}}
+                    orderBy: id
+                    orderDirection: asc
+                    block: {number: $block}
+                    ) {
+                        id
+                        poolAddress
+                        tickIdx
+                        liquidityGross
+                        liquidityNet
+                    }
+                }
+    """
+
+    def __init__(self, pools, products=(), callback=None, interval=12, batch_size=50, renderer=None):
+        self.client = _MonitorClient()
+        self.pools = [pool.lower() for pool in pools]
+        self.products = list(products)
+        self.callback = callback or self.log_change
+        self.interval = interval
+        self.batch_size = batch_size
+        self.renderer = renderer
+        self.detectors = {pool: TickChangeDetector(self.client, pool) for pool in self.pools}
+        self.wsClient = None
+        self._stopped = Event()
+        self._thread = None
+
+    @property
+    def tickers(self):
+        """TickerBuffer per product"""
+        return self.wsClient.buffers if self.wsClient is not None else {}
+
+    @staticmethod
+    def changed_frame(changed):
+        return pd.DataFrame({
+            'liquidityNet': changed['liquidityNet'].astype(float),
+            'previousLiquidityNet': changed['previousLiquidityNet'].astype(float),
+            }, index=changed['tickIdx']).sort_index()
+
+    def log_change(self, pool, changed):
+        self.logger(f'liquidity changed at {len(changed["tickIdx"])} ticks of {pool}')
+
+    async def _head(self):
+        response = await self.client.aquery(TickChangeDetector._meta_query)
+        return int(response['data']['_meta']['block']['number'])
+
+    async def _fetch(self, since, block):
+        """Ticks of every pool changed in [since, block], keyed by pool"""
+        batches = [self.pools[i:i + self.batch_size] for i in range(0, len(self.pools), self.batch_size)]
+        results = await asyncio.gather(*[
+            KeysetPaginator(
+                self.client, self._ticks_query, 'ticks',
+                {'pools': batch, 'since': since, 'block': block},
+                operation_name='changedTicks').arows()
+            for batch in batches
+            ])
+        ticks = {pool: [] for pool in self.pools}
+        for rows in results:
+            for tick in rows:
+                ticks[tick['poolAddress'].lower()].append(tick)
+        return ticks
+
+    async def _wait(self, seconds):
+        """True once stop() was called, returns as soon as it is"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._stopped.wait, seconds)
+
+    async def _run(self):
+        block = await self._head()
+        for pool, ticks in (await self._fetch(0, block)).items():
+            self.detectors[pool].set_curve(ticks, block)
+        self.logger(f'watching {len(self.pools)} pools from block {block}')
+
+        while not await self._wait(self.interval):
+            try:
+                head = await self._head()
+                if head <= block:
+                    continue
+                changes = await self._fetch(block + 1, head)
+            except Exception as error:
+                self.logger(f'poll failed: {error!r}')
+                continue
+            plots = {}
+            for pool, ticks in changes.items():
+                detector = self.detectors[pool]
+                detector.block = head
+                if not ticks:
+                    continue
+                changed = detector.apply(ticks)
+                if len(changed['tickIdx']):
+                    self.callback(pool, changed)
+                    plots[pool] = self.changed_frame(changed)
+            if self.renderer is not None and plots:
+                self.renderer.render_many(plots)
+            block = head
+
+        await self.client.transport.aclose()
+        self.logger('stopped monitor')
+
+    def start(self):
+        self._stopped.clear()
+        if self.products:
+            self.wsClient = TickerFeed(self.products, url=self._url)
+            self.wsClient.start()
+        self._thread = Thread(target=asyncio.run, args=(self._run(),))
+        self._thread.start()
+
+    def stop(self):
+        """Stop polling and close the websocket, returns once everything has exited"""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.wsClient is not None:
+            self.wsClient.close()
+            self.wsClient = None
+        if self.renderer is not None:
+            self.renderer.close()
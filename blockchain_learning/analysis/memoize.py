@@ -0,0 +1,91 @@
+import time
+import functools
+from threading import RLock
+from collections import OrderedDict
+
+
+class Memo:
+    """Small per-instance LRU of computed values with optional expiry"""
+
+    def __init__(self, maxsize=8):
+        self.maxsize = maxsize
+        self._values = OrderedDict()
+        self._lock = RLock()
+        # one lock per key, so a slow compute only blocks readers of the same key
+        self._key_locks = {}
+
+    def _lookup(self, key):
+        with self._lock:
+            if key in self._values:
+                value, expires = self._values[key]
+                if expires is None or expires > time.monotonic():
+                    self._values.move_to_end(key)
+                    return True, value
+                del self._values[key]
+            return False, None
+
+    def get(self, key, compute, ttl=None):
+        found, value = self._lookup(key)
+        if found:
+            return value
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, RLock())
+        with key_lock:
+            # another thread may have computed it while this one waited
+            found, value = self._lookup(key)
+            if found:
+                return value
+            value = compute()
+            expires = None if ttl is None else time.monotonic() + ttl
+            with self._lock:
+                self._values[key] = value, expires
+                self._values.move_to_end(key)
+                while len(self._values) > self.maxsize:
+                    self._values.popitem(last=False)
+            return value
+
+    def invalidate(self, *keys):
+        with self._lock:
+            if not keys:
+                self._values.clear()
+            for key in keys:
+                self._values.pop(key, None)
+
+    def __contains__(self, key):
+        return key in self._values
+
+
+def memo_keys(cls):
+    """Names of the memoized properties of cls"""
+    return {
+        name for klass in cls.__mro__ for name, value in vars(klass).items()
+        if isinstance(value, property) and getattr(value.fget, 'memoized', False)}
+
+
+def memo(instance):
+    """Memo of instance, sized by its `memo_size`; None sizes it to hold every
+    memoized property of the class"""
+    if '_memo' not in instance.__dict__:
+        size = getattr(instance, 'memo_size', None)
+        if size is None:
+            size = max(len(memo_keys(type(instance))), 1)
+        instance.__dict__['_memo'] = Memo(size)
+    return instance.__dict__['_memo']
+
+
+def memoized_property(func=None, ttl=None):
+    """Property computed once per instance and kept until refresh() or ttl seconds.
+
+    Without an explicit ttl the instance's `memo_ttl` attribute is used.
+    """
+    if func is None:
+        return functools.partial(memoized_property, ttl=ttl)
+
+    @functools.wraps(func)
+    def wrapper(self):
+        expiry = ttl if ttl is not None else getattr(self, 'memo_ttl', None)
+        return memo(self).get(func.__name__, lambda: func(self), expiry)
+
+    wrapper.memoized = True
+
+    return property(wrapper)
@@ -0,0 +1,118 @@
+from concurrent.futures import ThreadPoolExecutor
+
+
+class KeysetPaginator:
+    """Keyset (cursor) pagination over a subgraph collection.
+
+    The query takes a `$cursor` variable and filters on it in its where clause,
+    ordered by the same key:
+
+        unique key (tiebreak=None):   where: {id_gt: $cursor}, orderBy: id
+        shared key (tiebreak='id'):   where: {timestamp_gte: $cursor}, orderBy: timestamp
+
+    For a shared key the boundary rows are re-read and dropped by their tiebreak
+    field, so every page costs the same no matter how deep into the collection it is.
+
+    Iterating yields rows, `pages()` yields lists of rows and `apages()` does the
+    same through the client's aquery. `seen` holds tiebreak values already consumed
+    at the `start` key, e.g. from a previous sync.
+    """
+
+    page_size = 1000
+
+    def __init__(self, client, query, path, variables=None, key='id', start='',
+                 tiebreak=None, operation_name=None, seen=()):
+        self.client = client
+        self.query = query
+        self.path = (path,) if isinstance(path, str) else tuple(path)
+        self.variables = dict(variables or {})
+        self.key = key
+        self.start = start
+        self.tiebreak = tiebreak
+        self.operation_name = operation_name
+        self.seen = set(seen)
+
+    def __iter__(self):
+        for page in self.pages():
+            yield from page
+
+    def _extract(self, response):
+        data = response['data']
+        for field in self.path:
+            if data is None:
+                return []
+            data = data[field]
+        return data or []
+
+    def fetch(self, cursor):
+        variables = dict(self.variables, cursor=cursor)
+        return self._extract(self.client.query(self.query, variables, self.operation_name))
+
+    async def afetch(self, cursor):
+        variables = dict(self.variables, cursor=cursor)
+        return self._extract(await self.client.aquery(self.query, variables, self.operation_name))
+
+    def pages(self):
+        state = self._state()
+        while state['cursor'] is not None:
+            rows = self._advance(state, self.fetch(state['cursor']))
+            if rows:
+                yield rows
+
+    def pages_ahead(self):
+        """pages(), fetching the next page on a worker thread while the current one is consumed"""
+        state = self._state()
+        executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            future = executor.submit(self.fetch, state['cursor'])
+            while future is not None:
+                rows = self._advance(state, future.result())
+                future = None
+                if state['cursor'] is not None:
+                    future = executor.submit(self.fetch, state['cursor'])
+                if rows:
+                    yield rows
+        finally:
+            executor.shutdown(wait=False)
+
+    async def apages(self):
+        """pages() through client.aquery"""
+        state = self._state()
+        while state['cursor'] is not None:
+            rows = self._advance(state, await self.afetch(state['cursor']))
+            if rows:
+                yield rows
+
+    async def arows(self):
+        rows = []
+        async for page in self.apages():
+            rows.extend(page)
+        return rows
+
+    def _state(self):
+        # seen: tiebreak values already yielded for rows whose key equals the cursor
+        return {'cursor': self.start, 'seen': set(self.seen)}
+
+    def _advance(self, state, page):
+        """New rows of page, moves the cursor past it (None once exhausted)"""
+        cast = type(self.start)
+        cursor, seen = state['cursor'], state['seen']
+        rows = [row for row in page if not self._seen(row, cursor, seen)]
+        if len(page) < self.page_size:
+            state['cursor'] = None
+            return rows
+        if not rows:
+            raise RuntimeError(
+                f'{self.page_size} rows share {self.key}={cursor}, cannot advance the cursor')
+
+        last = cast(page[-1][self.key])
+        if self.tiebreak:
+            boundary = {row[self.tiebreak] for row in page if cast(row[self.key]) == last}
+            state['seen'] = seen | boundary if last == cursor else boundary
+        state['cursor'] = last
+        return rows
+
+    def _seen(self, row, cursor, seen):
+        if not self.tiebreak:
+            return False
+        return type(self.start)(row[self.key]) == cursor and row[self.tiebreak] in seen
@@ -0,0 +1,93 @@
+"""Decode subgraph rows into struct-of-arrays tables, parsing every field once."""
+from itertools import islice
+import numpy as np
+
+# field path -> column type, `int` keeps exact python ints (liquidity can exceed int64)
+TICK = {
+    'tickIdx': np.int64,
+    'liquidityGross': int,
+    'liquidityNet': int,
+    'price0': np.float64,
+    'price1': np.float64,
+    }
+
+POOL = {
+    'id': str,
+    'token0.symbol': str,
+    'token1.symbol': str,
+    'volumeUSD': np.float64,
+    }
+
+POOL_DAY = {
+    'id': str,
+    'date': np.int64,
+    'pool.id': str,
+    'pool.token0.symbol': str,
+    'pool.token1.symbol': str,
+    'tvlUSD': np.float64,
+    'volumeUSD': np.float64,
+    'txCount': np.int64,
+    }
+
+UNISWAP_DAY = {
+    'id': str,
+    'date': np.int64,
+    'volumeUSD': np.float64,
+    'tvlUSD': np.float64,
+    'txCount': np.int64,
+    }
+
+
+class Table(dict):
+    """One numpy array per field, all of the same length"""
+
+    __slots__ = ()
+
+    @property
+    def n_rows(self):
+        return len(next(iter(self.values()))) if self else 0
+
+    def take(self, index):
+        return Table((field, column[index]) for field, column in self.items())
+
+    def row(self, i):
+        return {field: column[i] for field, column in self.items()}
+
+
+def _column(values, dtype):
+    if dtype is int:
+        return np.array([int(value) for value in values], dtype=object)
+    if dtype is str:
+        return np.array(values, dtype=object)
+    return np.array(values, dtype=dtype)
+
+
+def _field(row, path):
+    for key in path:
+        row = row[key]
+    return row
+
+
+def decode(rows, schema, chunk_size=10000):
+    """Table of `schema` fields from an iterable of nested row dicts.
+
+    Rows are consumed chunk_size at a time, so a generator of pages never has to
+    be held in memory as dicts.
+    """
+    paths = {field: field.split('.') for field in schema}
+    chunks = {field: [] for field in schema}
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        for field, dtype in schema.items():
+            chunks[field].append(_column([_field(row, paths[field]) for row in chunk], dtype))
+    return Table(
+        (field, np.concatenate(parts) if parts else _column([], schema[field]))
+        for field, parts in chunks.items())
+
+
+def as_table(rows, schema):
+    """rows decoded with schema, unless they already are a Table"""
+    return rows if isinstance(rows, Table) else decode(rows, schema)
@@ -0,0 +1,198 @@
+import os
+import html
+import queue
+import multiprocessing
+from collections import deque
+from threading import Condition, Thread
+from datetime import datetime, timezone
+
+
+class _Canvas:
+    """Agg figures kept by name and redrawn in place, one per plot"""
+
+    def __init__(self, directory, formats, dashboard=None, figsize=(10, 5), dpi=100):
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+        self.plt = plt
+        self.directory = directory
+        self.formats = formats
+        self.dashboard = dashboard
+        self.figsize = figsize
+        self.dpi = dpi
+        self.figures = {}
+        self.rendered = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def figure(self, name):
+        if name not in self.figures:
+            figure = self.plt.figure(figsize=self.figsize, dpi=self.dpi)
+            self.figures[name] = figure, figure.add_subplot()
+        figure, axes = self.figures[name]
+        axes.clear()
+        return figure, axes
+
+    def draw(self, name, data, title=None):
+        figure, axes = self.figure(name)
+        data.plot(ax=axes)
+        axes.set_title(title or name)
+        paths = []
+        for extension in self.formats:
+            path = os.path.join(self.directory, f'{name}.{extension}')
+            figure.savefig(path, format=extension)
+            paths.append(path)
+        self.rendered[name] = paths
+        return paths
+
+    def render(self, jobs):
+        """Draw every (name, data, title) job, then rewrite the dashboard once"""
+        paths = {name: self.draw(name, data, title) for name, data, title in jobs}
+        if self.dashboard:
+            self.write_dashboard()
+        return paths
+
+    def write_dashboard(self):
+        updated = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')
+        figures = []
+        for name in sorted(self.rendered):
+            source = os.path.basename(self.rendered[name][0])
+            figures.append(
+                f'<figure><img src="{html.escape(source)}" alt="{html.escape(name)}">'
+                f'<figcaption>{html.escape(name)}</figcaption></figure>')
+        page = (
+            '<!DOCTYPE html><html><head><meta charset="utf-8">'
+            '<meta http-equiv="refresh" content="30"><title>liquidity</title></head>'
+            f'<body><p>updated {updated}</p>{"".join(figures)}</body></html>')
+        path = os.path.join(self.directory, self.dashboard)
+        with open(path + '.tmp', 'w') as file:
+            file.write(page)
+        os.replace(path + '.tmp', path)
+
+
+def _serve(jobs, results, options):
+    canvas = _Canvas(**options)
+    try:
+        while True:
+            batch = jobs.get()
+            if batch is None:
+                return
+            try:
+                results.put(canvas.render(batch))
+            except Exception as error:
+                results.put(error)
+    finally:
+        # tells the collector nothing more is coming
+        results.put(None)
+
+
+class FigureRenderer:
+    """Headless plotting to files, for threads and servers without a display.
+
+    Figures are drawn with the Agg backend in a worker process (or in the calling
+    process with process=False) and written to `directory` as each of `formats`,
+    `dashboard` names an html page showing the latest figure of every plot. A
+    figure is created once per name and redrawn on later calls. submit() and
+    render_many() return immediately; a collector thread keeps the latest paths of
+    every plot in `paths` and logs failed batches, flush() waits for the batches
+    submitted so far.
+    """
+
+    logger = print
+    # failed batches kept for flush() to raise, older ones are only logged
+    max_errors = 100
+
+    def __init__(self, directory='figures', formats=('png',), dashboard='index.html', process=True):
+        self.options = {'directory': directory, 'formats': tuple(formats), 'dashboard': dashboard}
+        self.process = process
+        self.paths = {}
+        self._errors = deque(maxlen=self.max_errors)
+        self._worker = None
+        self._collector = None
+        self._canvas = None
+        self._submitted = 0
+        self._done = 0
+        self._condition = Condition()
+
+    def _start(self):
+        if not self.process:
+            self._canvas = _Canvas(**self.options)
+            return
+        # spawn, the worker must not inherit the parent's gui backend or threads
+        context = multiprocessing.get_context('spawn')
+        self._jobs = context.Queue()
+        self._results = context.Queue()
+        self._worker = context.Process(
+            target=_serve, args=(self._jobs, self._results, self.options), daemon=True)
+        self._worker.start()
+        self._collector = Thread(target=self._collect, args=(self._results,), daemon=True)
+        self._collector.start()
+
+    def _collect(self, results):
+        while True:
+            try:
+                result = results.get(timeout=1)
+            except queue.Empty:
+                if self._worker is None or self._worker.is_alive():
+                    continue
+                self.logger(f'render worker exited with {self._worker.exitcode}')
+                return
+            if result is None:
+                return
+            self._record(result)
+
+    def _record(self, result):
+        with self._condition:
+            if isinstance(result, Exception):
+                self.logger(f'render batch failed: {result!r}')
+                self._errors.append(result)
+            else:
+                self.paths.update(result)
+            self._done += 1
+            self._condition.notify_all()
+
+    def render_many(self, plots):
+        """Render {name: data} (Series or DataFrame) in one batch"""
+        batch = [
+            (name, data, None) if not isinstance(data, tuple) else (name,) + data
+            for name, data in dict(plots).items()]
+        if not batch:
+            return
+        if self._worker is None and self._canvas is None:
+            self._start()
+        with self._condition:
+            self._submitted += 1
+        if self._canvas is not None:
+            try:
+                result = self._canvas.render(batch)
+            except Exception as error:
+                result = error
+            self._record(result)
+        else:
+            self._jobs.put(batch)
+
+    def submit(self, name, data, title=None):
+        self.render_many({name: (data, title)})
+
+    def flush(self, timeout=None):
+        """Wait for the submitted batches, returns {name: [paths]} of every plot rendered so far"""
+        with self._condition:
+            submitted = self._submitted
+            if not self._condition.wait_for(lambda: self._done >= submitted, timeout):
+                raise TimeoutError(f'{submitted - self._done} render batches still pending')
+            errors = list(self._errors)
+            self._errors.clear()
+            paths = dict(self.paths)
+        if errors:
+            raise RuntimeError(f'{len(errors)} render batches failed') from errors[0]
+        return paths
+
+    def close(self):
+        """Finish the submitted batches and stop the worker"""
+        if self._worker is not None:
+            self._jobs.put(None)
+            # the worker cannot exit while its results are unread, collect them first
+            self._collector.join()
+            self._worker.join()
+            self._worker = None
+            self._collector = None
+        self._canvas = None
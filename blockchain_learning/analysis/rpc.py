@@ -0,0 +1,328 @@
+"""Uniswap v3 pool state read straight from an ethereum node over JSON-RPC.
+
+Pool slot0, the tick bitmap and the initialized ticks are read with eth_calls
+pinned to one block. Calls are packed into Multicall3 aggregate3 calls when the
+contract is deployed on the chain, and the aggregate calls (or the plain calls on
+a bare dev chain such as anvil or ganache) are sent as JSON-RPC batches.
+"""
+import json
+import socket
+from threading import Lock
+import numpy as np
+from transport import SubgraphTransport
+from records import Table
+from memoize import memoized_property
+from tick_math import MIN_TICK, MAX_TICK
+from tmp import EtherumUSDCAnalysis
+
+# same address on mainnet, the testnets and most L2s
+MULTICALL3 = '0xca11bde05977b3631167028862be2a173976ca11'
+
+# 4 byte selectors of the UniswapV3Pool and ERC20 views
+SLOT0 = '3850c7bd'
+LIQUIDITY = '1a686502'
+FEE = 'ddca3f43'
+TICK_SPACING = 'd0c93a7c'
+TOKEN0 = '0dfe1681'
+TOKEN1 = 'd21220a7'
+TICK_BITMAP = '5339c296'
+TICKS = 'f30dba93'
+DECIMALS = '313ce567'
+SYMBOL = '95d89b41'
+AGGREGATE3 = '82ad56cb'
+
+
+class RpcError(Exception):
+    pass
+
+
+def encode_int(value):
+    """32 byte two's complement word"""
+    return (value % (1 << 256)).to_bytes(32, 'big')
+
+
+def decode_int(data, index=0, signed=False):
+    value = int.from_bytes(data[32 * index:32 * (index + 1)], 'big')
+    if signed and value >= 1 << 255:
+        value -= 1 << 256
+    return value
+
+
+def decode_address(data, index=0):
+    return '0x' + data[32 * index + 12:32 * (index + 1)].hex()
+
+
+def decode_string(data):
+    """ABI string, or a bytes32 for the tokens that predate the standard (MKR)"""
+    if len(data) == 32:
+        return data.rstrip(b'\0').decode('utf-8', 'replace')
+    offset = decode_int(data)
+    length = int.from_bytes(data[offset:offset + 32], 'big')
+    return data[offset + 32:offset + 32 + length].decode('utf-8', 'replace')
+
+
+def _pad(data):
+    return data + b'\0' * (-len(data) % 32)
+
+
+def encode_aggregate3(calls):
+    """Calldata of aggregate3((address target, bool allowFailure, bytes callData)[])"""
+    tuples = []
+    for target, data in calls:
+        tuples.append(
+            bytes.fromhex(target[2:].rjust(64, '0')) + encode_int(1) + encode_int(96)
+            + encode_int(len(data)) + _pad(data))
+    head, offset = [], 32 * len(tuples)
+    for encoded in tuples:
+        head.append(encode_int(offset))
+        offset += len(encoded)
+    return bytes.fromhex(AGGREGATE3) + encode_int(32) + encode_int(len(tuples)) + b''.join(head + tuples)
+
+
+def decode_aggregate3(data):
+    """Return data of each call of an aggregate3 result, None for the failed ones"""
+    start = decode_int(data) + 32
+    count = int.from_bytes(data[start - 32:start], 'big')
+    results = []
+    for i in range(count):
+        item = start + int.from_bytes(data[start + 32 * i:start + 32 * (i + 1)], 'big')
+        success = int.from_bytes(data[item:item + 32], 'big')
+        offset = item + int.from_bytes(data[item + 32:item + 64], 'big')
+        length = int.from_bytes(data[offset:offset + 32], 'big')
+        results.append(data[offset + 32:offset + 32 + length] if success else None)
+    return results
+
+
+class JsonRpcTransport(SubgraphTransport):
+    """JSON-RPC over the pooled http session, or over the node's IPC socket when
+    url is a path (geth.ipc)"""
+
+    def __init__(self, url='http://127.0.0.1:8545', max_batch=200, **options):
+        super().__init__(url, **options)
+        self.max_batch = max_batch
+        self.ipc_path = None if url.startswith(('http://', 'https://')) else url
+        self._ipc_lock = Lock()
+        self._ipc = None
+
+    def _receive(self):
+        buffer = b''
+        while True:
+            chunk = self._ipc.recv(1 << 16)
+            if not chunk:
+                raise ConnectionError(f'{self.ipc_path} closed the connection')
+            buffer += chunk
+            if buffer.rstrip().endswith((b'}', b']')):
+                try:
+                    return json.loads(buffer)
+                except ValueError:
+                    continue
+
+    def post(self, params):
+        if self.ipc_path is None:
+            return super().post(params)
+        with self._ipc_lock:
+            if self._ipc is None:
+                self._ipc = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                self._ipc.settimeout(self.timeout)
+                self._ipc.connect(self.ipc_path)
+            self._ipc.sendall(json.dumps(params).encode('utf-8'))
+            return self._receive()
+
+    @staticmethod
+    def _result(response):
+        if 'error' in response:
+            raise RpcError(response['error'])
+        return response['result']
+
+    def call(self, method, *params):
+        return self._result(self.post({'jsonrpc': '2.0', 'id': 0, 'method': method, 'params': list(params)}))
+
+    def batch(self, calls):
+        """Results of [(method, params), ...] in order, max_batch calls per request"""
+        results = []
+        for start in range(0, len(calls), self.max_batch):
+            payload = [
+                {'jsonrpc': '2.0', 'id': i, 'method': method, 'params': list(params)}
+                for i, (method, params) in enumerate(calls[start:start + self.max_batch])]
+            responses = self.post(payload)
+            if isinstance(responses, dict):
+                # a node rejecting the whole batch answers with one error object
+                raise RpcError(responses.get('error', responses))
+            if len(responses) != len(payload):
+                raise RpcError(f'{len(responses)} responses to a batch of {len(payload)} calls')
+            responses = sorted(responses, key=lambda response: response['id'])
+            results.extend(self._result(response) for response in responses)
+        return results
+
+    def close(self):
+        super().close()
+        if self._ipc is not None:
+            self._ipc.close()
+            self._ipc = None
+
+
+class UniV3RpcClient:
+    """Pinned eth_calls against a node, multicalled when the chain has Multicall3"""
+
+    multicall_address = MULTICALL3
+    multicall_size = 500
+
+    def __init__(self, url='http://127.0.0.1:8545', **options):
+        self.transport = JsonRpcTransport(url, **options)
+        # lowest block seen with multicall code and highest seen without
+        self._multicall_from = None
+        self._multicall_before = None
+
+    def head(self):
+        return int(self.transport.call('eth_blockNumber'), 16)
+
+    def has_multicall(self, block):
+        """Whether multicall_address has code at block.
+
+        Deployed code stays, so two blocks answer every query: blocks at or after one
+        with code have it and blocks at or before one without do not.
+        """
+        if self.multicall_address is None:
+            return False
+        if self._multicall_from is not None and block >= self._multicall_from:
+            return True
+        if self._multicall_before is not None and block <= self._multicall_before:
+            return False
+        code = self.transport.call('eth_getCode', self.multicall_address, hex(block))
+        if code not in ('0x', '0x0', None):
+            self._multicall_from = block if self._multicall_from is None else min(block, self._multicall_from)
+            return True
+        self._multicall_before = block if self._multicall_before is None else max(block, self._multicall_before)
+        return False
+
+    def call_many(self, calls, block):
+        """Return data of [(address, selector, args bytes), ...] at block, None for reverts"""
+        calls = [(address, bytes.fromhex(selector) + args) for address, selector, args in calls]
+        if not self.has_multicall(block):
+            return self._call_each(calls, block)
+        chunks = [calls[i:i + self.multicall_size] for i in range(0, len(calls), self.multicall_size)]
+        results = self.transport.batch([
+            ('eth_call', [{'to': self.multicall_address, 'data': '0x' + encode_aggregate3(chunk).hex()}, hex(block)])
+            for chunk in chunks])
+        return [data for result in results for data in decode_aggregate3(bytes.fromhex(result[2:]))]
+
+    def _call_each(self, calls, block):
+        payload = [
+            {'jsonrpc': '2.0', 'id': i, 'method': 'eth_call',
+             'params': [{'to': address, 'data': '0x' + data.hex()}, hex(block)]}
+            for i, (address, data) in enumerate(calls)]
+        results = []
+        for start in range(0, len(payload), self.transport.max_batch):
+            responses = self.transport.post(payload[start:start + self.transport.max_batch])
+            for response in sorted(responses, key=lambda response: response['id']):
+                # a revert comes back as an error on that call only
+                results.append(bytes.fromhex(response['result'][2:]) if 'result' in response else None)
+        return results
+
+    def close(self):
+        self.transport.close()
+
+
+class UniV3RpcPool:
+    """The pool reads of EtherumUSDCPool (head_block, fetchTicksSurroundingPrice,
+    fetchInitializedTicks) answered by a node instead of the subgraph, in the same
+    shapes"""
+
+    rpc_url = 'http://127.0.0.1:8545'
+    words_per_call = 2000
+
+    @property
+    def rpc(self):
+        if hasattr(self, '_rpc'):
+            return self._rpc
+        self._rpc = UniV3RpcClient(self.rpc_url)
+        return self._rpc
+
+    def head_block(self):
+        return self.rpc.head()
+
+    @memoized_property
+    def pool_constants(self):
+        """fee, tickSpacing and the tokens, which never change for a pool"""
+        block = self.head_block()
+        address = self.pool_address
+        fee, spacing, token0, token1 = self.rpc.call_many(
+            [(address, selector, b'') for selector in (FEE, TICK_SPACING, TOKEN0, TOKEN1)], block)
+        tokens = [decode_address(token0), decode_address(token1)]
+        metadata = self.rpc.call_many(
+            [(token, selector, b'') for token in tokens for selector in (SYMBOL, DECIMALS)], block)
+        return {
+            'feeTier': decode_int(fee),
+            'tickSpacing': decode_int(spacing, signed=True),
+            'token0': {'id': tokens[0], 'symbol': decode_string(metadata[0]), 'decimals': decode_int(metadata[1])},
+            'token1': {'id': tokens[1], 'symbol': decode_string(metadata[2]), 'decimals': decode_int(metadata[3])},
+            }
+
+    def fetchTicksSurroundingPrice(self, block=None):
+        block = self.head_block() if block is None else block
+        constants = self.pool_constants
+        slot0, liquidity = self.rpc.call_many(
+            [(self.pool_address, SLOT0, b''), (self.pool_address, LIQUIDITY, b'')], block)
+        return {
+            'tick': str(decode_int(slot0, 1, signed=True)),
+            'token0': {key: str(value) for key, value in constants['token0'].items()},
+            'token1': {key: str(value) for key, value in constants['token1'].items()},
+            'feeTier': str(constants['feeTier']),
+            'sqrtPrice': str(decode_int(slot0)),
+            'liquidity': str(decode_int(liquidity)),
+            }
+
+    def _bitmap_words(self):
+        spacing = self.pool_constants['tickSpacing']
+        return range((MIN_TICK // spacing) >> 8, ((MAX_TICK // spacing) >> 8) + 1)
+
+    def iter_initialized_ticks(self, count_hint=None, read_ahead=True, block=None):
+        """Tables of initialized ticks in tickIdx order, one per words_per_call bitmap words"""
+        block = self.head_block() if block is None else block
+        spacing = self.pool_constants['tickSpacing']
+        words = self._bitmap_words()
+        for start in range(0, len(words), self.words_per_call):
+            chunk = words[start:start + self.words_per_call]
+            bitmaps = self.rpc.call_many(
+                [(self.pool_address, TICK_BITMAP, encode_int(word)) for word in chunk], block)
+            ticks = []
+            for word, bitmap in zip(chunk, bitmaps):
+                value = decode_int(bitmap) if bitmap else 0
+                while value:
+                    bit = (value & -value).bit_length() - 1
+                    ticks.append(((word << 8) + bit) * spacing)
+                    value &= value - 1
+            if not ticks:
+                continue
+            states = self.rpc.call_many(
+                [(self.pool_address, TICKS, encode_int(tick)) for tick in ticks], block)
+            tick_idx = np.array(ticks, dtype=np.int64)
+            price0 = np.power(1.0001, tick_idx.astype(np.float64))
+            yield Table(
+                tickIdx=tick_idx,
+                liquidityGross=np.array([decode_int(state, 0) for state in states], dtype=object),
+                liquidityNet=np.array([decode_int(state, 1, signed=True) for state in states], dtype=object),
+                price0=price0,
+                price1=1 / price0,
+                )
+
+    def fetchInitializedTicks(self, count_hint=None, block=None):
+        tables = list(self.iter_initialized_ticks(block=block))
+        if not tables:
+            return Table(
+                tickIdx=np.empty(0, dtype=np.int64), liquidityGross=np.empty(0, dtype=object),
+                liquidityNet=np.empty(0, dtype=object), price0=np.empty(0), price1=np.empty(0))
+        return Table((field, np.concatenate([table[field] for table in tables])) for field in tables[0])
+
+
+class RpcPoolAnalysis(UniV3RpcPool, EtherumUSDCAnalysis):
+    """EtherumUSDCAnalysis of the pool at pool_address, read from the node at rpc_url"""
+
+    def __init__(self, pool_address, rpc_url=None):
+        self.POOL = pool_address.lower()
+        if rpc_url is not None:
+            self.rpc_url = rpc_url
+
+    @property
+    def pool_address(self):
+        return self.POOL
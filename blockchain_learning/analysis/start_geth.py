@@ -1,13 +1,144 @@
 import os
 import sys
+import time
+import shutil
 import subprocess
-from threading import Thread
+from collections import deque
+from threading import Event, Lock, Thread
+import requests
+
+
+class ManagedProcess:
+    """Subprocess that is restarted when it exits on its own.
+
+    stdout and stderr are read by a thread and passed line by line to `logger`
+    (and appended to log_path), the last `tail_size` lines are kept in `tail`.
+    A process that keeps crashing is restarted with a doubling backoff and given
+    up on after max_restarts. `input` is written to the stdin of every spawned
+    process, which is then closed. A spawn that fails, e.g. on a missing binary,
+    ends the watcher and is kept in `error`.
+    """
+
+    logger = print
+    tail_size = 200
+
+    def __init__(self, name, args, log_path=None, restart=True, max_restarts=5, backoff=1,
+                 input=None):
+        self.name = name
+        self.args = list(args)
+        self.input = input
+        self.log_path = log_path
+        self.restart = restart
+        self.max_restarts = max_restarts
+        self.backoff = backoff
+        self.restarts = 0
+        self.started_at = None
+        self.tail = deque(maxlen=self.tail_size)
+        self.process = None
+        self.error = None
+        self._stopped = Event()
+        self._lock = Lock()
+        self._watcher = None
+
+    @property
+    def running(self):
+        return self.process is not None and self.process.poll() is None
+
+    def _spawn(self):
+        self.process = subprocess.Popen(
+            self.args, stdin=subprocess.DEVNULL if self.input is None else subprocess.PIPE,
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True, bufsize=1)
+        if self.input is not None:
+            try:
+                self.process.stdin.write(self.input)
+                self.process.stdin.close()
+            except BrokenPipeError:
+                pass
+        self.started_at = time.time()
+        reader = Thread(target=self._read, args=(self.process,), daemon=True)
+        reader.start()
+        return reader
+
+    def _read(self, process):
+        log = open(self.log_path, 'a') if self.log_path else None
+        try:
+            for line in process.stdout:
+                line = line.rstrip()
+                self.tail.append(line)
+                if log is not None:
+                    log.write(line + '\n')
+                    log.flush()
+                self.logger(f'[{self.name}] {line}')
+        finally:
+            if log is not None:
+                log.close()
+
+    def _spawn_or_fail(self):
+        try:
+            return self._spawn()
+        except OSError as error:
+            self.error = error
+            self.logger(f'[{self.name}] failed to start: {error}')
+            return None
+
+    def _watch(self):
+        reader = self._spawn_or_fail()
+        if reader is None:
+            return
+        delay = self.backoff
+        while True:
+            code = self.process.wait()
+            reader.join()
+            if self._stopped.is_set():
+                return
+            self.logger(f'[{self.name}] exited with {code}')
+            if not self.restart or self.restarts >= self.max_restarts:
+                return
+            if self._stopped.wait(delay):
+                return
+            # a process that ran for a while gets the short backoff again
+            delay = self.backoff if time.time() - self.started_at > 60 else delay * 2
+            with self._lock:
+                if self._stopped.is_set():
+                    return
+                self.restarts += 1
+                reader = self._spawn_or_fail()
+                if reader is None:
+                    return
+
+    def start(self):
+        self._stopped.clear()
+        self._watcher = Thread(target=self._watch, daemon=True)
+        self._watcher.start()
+        return self
+
+    def stop(self, timeout=30):
+        """Terminate the process, killed if it has not exited after timeout seconds"""
+        with self._lock:
+            self._stopped.set()
+        if self.running:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
 
 
 class Setup:
     """https://geth.ethereum.org/docs/install-and-build/installing-geth"""
 
-    signer = r'\\.\pipe\clef.ipc'
+    signer = r'\\.\pipe\clef.ipc' if os.name == 'nt' else os.path.expanduser('~/.clef/clef.ipc')
+    # clef reads approvals from stdin and exits when it cannot, so unattended signing
+    # needs a rules file attested with `clef attest <sha256>`; clef then asks for the
+    # master seed password at startup, which is read from $CLEF_MASTER_PASSWORD
+    rules = None
+    rpc_url = 'http://127.0.0.1:8545'
+    log_dir = None
+    logger = print
     chainid = {
         'mainnet': 1,
         'Ropsten': 3,
@@ -15,6 +146,9 @@ class Setup:
         'Goerli': 5,
     }
 
+    def __init__(self):
+        self.processes = {}
+
     def run_cmd(self, cmd, new_shell=True, thread=False):
 
         if new_shell:
@@ -32,12 +166,56 @@ class Setup:
         th = Thread(target=run, args=())
         th.start()
 
+    def supervise(self, name, args, **options):
+        """Start args as a ManagedProcess, replacing the one called name"""
+        if shutil.which(args[0]) is None:
+            raise FileNotFoundError(f'{args[0]} is not installed or not on PATH, see {self.__doc__}')
+        if name in self.processes:
+            self.processes[name].stop()
+        log_path = os.path.join(self.log_dir, f'{name}.log') if self.log_dir else None
+        process = ManagedProcess(name, args, log_path=log_path, **options)
+        process.logger = self.logger
+        self.processes[name] = process.start()
+        return process
+
     def start_clef(self, chain):
-        return self.run_cmd(f'clef --chainid {self.chainid[chain]}', new_shell=True)
+        args = ['clef', '--chainid', str(self.chainid[chain]), '--suppress-bootwarn']
+        if not self.rules:
+            return self.supervise('clef', args)
+        password = os.environ.get('CLEF_MASTER_PASSWORD')
+        if password is None:
+            raise RuntimeError('set CLEF_MASTER_PASSWORD to run clef with rules')
+        return self.supervise('clef', args + ['--rules', self.rules], input=password + '\n')
+
+    def check(self, name):
+        """Raise why the process called name is down: the error it failed to start with,
+        or its last output once it keeps exiting"""
+        process = self.processes.get(name)
+        if process is None or process.running:
+            return
+        if process.error is not None:
+            raise process.error
+        if process.restarts >= process.max_restarts:
+            raise RuntimeError(f'{name} keeps exiting:\n' + '\n'.join(list(process.tail)[-20:]))
+
+    def wait_signer(self, timeout=60, interval=0.2):
+        """Wait for clef's ipc endpoint, raises TimeoutError after timeout seconds"""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if os.path.exists(self.signer):
+                return self.signer
+            self.check('clef')
+            time.sleep(interval)
+        raise TimeoutError(f'{self.signer} not created after {timeout}s')
 
     def start_geth(self, chain, syncmode='light'):
-        return self.run_cmd(f'geth --{chain.lower()} --syncmode "{syncmode}" --http --signer={self.signer} --ws')
-    
+        args = ['geth', f'--{chain.lower()}', '--syncmode', syncmode,
+                '--http', '--http.api', 'eth,net,web3', f'--signer={self.signer}', '--ws']
+        if chain == 'mainnet':
+            # mainnet is geth's default network and has no flag
+            args.remove('--mainnet')
+        return self.supervise('geth', args)
+
     def start_goerli(self):
         return self.run_chain('Goerli')
 
@@ -49,11 +227,64 @@ class Setup:
 
     def start_rinkeby(self):
         return self.run_chain('Rinkeby')
-    
-    def run_chain(self, chain):
+
+    def run_chain(self, chain, timeout=120):
+        """Start clef and geth, returns once geth answers on rpc_url"""
         self.start_clef(chain)
+        # geth fails to start when --signer does not exist yet
+        self.wait_signer(timeout)
         self.start_geth(chain)
+        self.wait_ready(timeout)
+        return self
+
+    def rpc(self, *calls):
+        """Results of (method, params) calls sent as one JSON-RPC batch"""
+        payload = [{'jsonrpc': '2.0', 'id': i, 'method': method, 'params': list(params)}
+                   for i, (method, params) in enumerate(calls)]
+        response = requests.post(self.rpc_url, json=payload, timeout=10)
+        response.raise_for_status()
+        return [item.get('result') for item in sorted(response.json(), key=lambda item: item['id'])]
+
+    def wait_ready(self, timeout=120, interval=0.5):
+        """Poll rpc_url until geth answers, raises TimeoutError after timeout seconds"""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            self.check('geth')
+            try:
+                version, = self.rpc(('web3_clientVersion', []))
+                self.logger(f'{version} ready at {self.rpc_url}')
+                return version
+            except (requests.RequestException, ValueError):
+                time.sleep(interval)
+        raise TimeoutError(f'no answer from {self.rpc_url} after {timeout}s')
+
+    def metrics(self):
+        """Sync progress, peer count and restarts of the node"""
+        syncing, peers, block = self.rpc(('eth_syncing', []), ('net_peerCount', []), ('eth_blockNumber', []))
+        metrics = {
+            'syncing': bool(syncing),
+            'block': int(block, 16),
+            'peers': int(peers, 16),
+            'restarts': {name: process.restarts for name, process in self.processes.items()},
+            }
+        if syncing:
+            current, highest = int(syncing['currentBlock'], 16), int(syncing['highestBlock'], 16)
+            metrics.update(currentBlock=current, highestBlock=highest,
+                           progress=current / highest if highest else 0.0)
+        return metrics
+
+    def stop(self):
+        # geth first, it is clef's client
+        for name in ('geth', 'clef'):
+            if name in self.processes:
+                self.processes.pop(name).stop()
 
 
 if __name__ == '__main__':
-    Setup().start_goerli()
+    setup = Setup().start_goerli()
+    try:
+        while True:
+            print(setup.metrics())
+            time.sleep(30)
+    except KeyboardInterrupt:
+        setup.stop()
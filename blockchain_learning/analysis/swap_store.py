@@ -0,0 +1,85 @@
+import os
+import json
+import numpy as np
+
+
+class SwapStore:
+    """Append-only columnar store of pool swaps.
+
+    Every pool gets a directory holding one flat binary file per column and a
+    meta.json with the committed row count, the first and last synced timestamp and
+    the swap ids seen at the last timestamp (the cursor tiebreak for the next sync).
+    Columns are read back with np.memmap, so reads do not copy.
+    """
+
+    COLUMNS = (
+        ('timestamp', np.int64),
+        ('amount0', np.float64),
+        ('amount1', np.float64),
+        )
+
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, pool, name):
+        return os.path.join(self.root, pool.lower(), name)
+
+    def meta(self, pool):
+        path = self._path(pool, 'meta.json')
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def _write_meta(self, pool, meta):
+        path = self._path(pool, 'meta.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump(meta, f)
+        os.replace(path + '.tmp', path)
+
+    def reset(self, pool, since):
+        os.makedirs(self._path(pool, ''), exist_ok=True)
+        for name, _ in self.COLUMNS:
+            open(self._path(pool, name), 'wb').close()
+        self._write_meta(pool, {'count': 0, 'since': since, 'timestamp': since, 'ids': []})
+
+    def append(self, pool, swaps):
+        """Append swaps ordered by timestamp and commit them in meta.json"""
+        meta = self.meta(pool)
+        if not swaps:
+            return meta
+        columns = {
+            'timestamp': [int(swap['timestamp']) for swap in swaps],
+            'amount0': [float(swap['amount0']) for swap in swaps],
+            'amount1': [float(swap['amount1']) for swap in swaps],
+            }
+        for name, dtype in self.COLUMNS:
+            path = self._path(pool, name)
+            with open(path, 'r+b') as f:
+                # drop rows from an interrupted append that never reached meta.json
+                f.truncate(meta['count'] * np.dtype(dtype).itemsize)
+                f.seek(0, os.SEEK_END)
+                np.asarray(columns[name], dtype=dtype).tofile(f)
+
+        last = columns['timestamp'][-1]
+        ids = [swap['id'] for swap in swaps if int(swap['timestamp']) == last]
+        if last == meta['timestamp']:
+            ids = meta['ids'] + ids
+        meta.update(count=meta['count'] + len(swaps), timestamp=last, ids=ids)
+        self._write_meta(pool, meta)
+        return meta
+
+    def read(self, pool, since=None):
+        """Columns of the stored swaps with timestamp >= since"""
+        meta = self.meta(pool)
+        count = meta['count'] if meta else 0
+        columns = {}
+        for name, dtype in self.COLUMNS:
+            if count:
+                columns[name] = np.memmap(self._path(pool, name), dtype=dtype, mode='r', shape=(count,))
+            else:
+                columns[name] = np.empty(0, dtype=dtype)
+        if since is not None:
+            start = int(np.searchsorted(columns['timestamp'], since, side='left'))
+            columns = {name: column[start:] for name, column in columns.items()}
+        return columns
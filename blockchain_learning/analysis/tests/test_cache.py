@@ -0,0 +1,66 @@
+import time
+from cache import SQLiteResponseCache
+
+QUERY = """
+    query pool($poolAddress: String!, $block: Block_height) {
+        pool(id: $poolAddress, block: $block) { tick }
+    }
+"""
+RESPONSE = {'data': {'pool': {'tick': '1'}}}
+
+
+def test_pinned_detection(tmp_path):
+    cache = SQLiteResponseCache(str(tmp_path / 'cache.sqlite'))
+
+    assert cache.is_pinned(QUERY, {'poolAddress': 'x', 'block': {'number': 1}})
+    assert cache.is_pinned('{ ticks(block: {number: 1}) { id } }')
+    assert not cache.is_pinned(QUERY, {'poolAddress': 'x', 'block': None})
+    assert not cache.is_pinned(QUERY, {'poolAddress': 'x'})
+
+
+def test_head_query_expires(tmp_path):
+    cache = SQLiteResponseCache(str(tmp_path / 'cache.sqlite'), ttl=0.05)
+    cache.set(QUERY, {'poolAddress': 'x', 'block': None}, 'pool', RESPONSE)
+    cache.set(QUERY, {'poolAddress': 'x', 'block': {'number': 1}}, 'pool', RESPONSE)
+
+    assert cache.get(QUERY, {'poolAddress': 'x', 'block': None}, 'pool') == RESPONSE
+    time.sleep(0.1)
+    assert cache.get(QUERY, {'poolAddress': 'x', 'block': None}, 'pool') is None
+    assert cache.get(QUERY, {'poolAddress': 'x', 'block': {'number': 1}}, 'pool') == RESPONSE
+
+
+def test_key_includes_url(tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    SQLiteResponseCache(path, url='http://a').set(QUERY, {'block': {'number': 1}}, 'pool', RESPONSE)
+
+    assert SQLiteResponseCache(path, url='http://a').get(QUERY, {'block': {'number': 1}}, 'pool') == RESPONSE
+    assert SQLiteResponseCache(path, url='http://b').get(QUERY, {'block': {'number': 1}}, 'pool') is None
+
+
+def test_errors_not_cached(tmp_path):
+    cache = SQLiteResponseCache(str(tmp_path / 'cache.sqlite'))
+    cache.set(QUERY, {'block': {'number': 1}}, 'pool', {'errors': [{'message': 'boom'}]})
+
+    assert cache.get(QUERY, {'block': {'number': 1}}, 'pool') is None
+
+
+def test_meta_expires_after_meta_ttl(tmp_path):
+    meta = 'query meta { _meta { block { number } } }'
+    head = {'data': {'_meta': {'block': {'number': 5}}}}
+    cache = SQLiteResponseCache(str(tmp_path / 'cache.sqlite'), ttl=None, meta_ttl=0.05)
+    cache.set(meta, None, None, head)
+
+    assert cache.get(meta) == head
+    time.sleep(0.1)
+    assert cache.get(meta) is None
+
+    uncached = SQLiteResponseCache(str(tmp_path / 'uncached.sqlite'), meta_ttl=0)
+    uncached.set(meta, None, None, head)
+    assert uncached.get(meta) is None
+
+
+def test_normalized_query_shares_entry(tmp_path):
+    cache = SQLiteResponseCache(str(tmp_path / 'cache.sqlite'))
+    cache.set(QUERY, {'block': {'number': 1}}, 'pool', RESPONSE)
+
+    assert cache.get(' '.join(QUERY.split()), {'block': {'number': 1}}, 'pool') == RESPONSE
@@ -0,0 +1,111 @@
+import time
+import threading
+import pandas as pd
+import pytest
+import jobs
+from memoize import memoized_property
+from tick_liquidity import formatted_liquidity
+from tmp import EtherumUSDCAnalysis
+
+POOL = {
+    'tick': '202919',
+    'token0': {'symbol': 'USDC', 'id': '0xa', 'decimals': '6'},
+    'token1': {'symbol': 'WETH', 'id': '0xb', 'decimals': '18'},
+    'feeTier': '3000',
+    'sqrtPrice': '0',
+    'liquidity': '1000000',
+    }
+TICKS = [
+    {'tickIdx': '202860', 'liquidityGross': '500', 'liquidityNet': '500'},
+    {'tickIdx': '202980', 'liquidityGross': '500', 'liquidityNet': '-500'},
+    ]
+
+
+def square(value):
+    return value * value
+
+
+class SlowPool(EtherumUSDCAnalysis):
+
+    pool_address = '0xpool'
+    cache_path = None
+    delay = 0.3
+
+    @memoized_property
+    def first(self):
+        time.sleep(self.delay)
+        return threading.current_thread().name
+
+    @memoized_property
+    def second(self):
+        time.sleep(self.delay)
+        return threading.current_thread().name
+
+    def prices(self, pool_address, time_delta):
+        time.sleep(self.delay)
+        return pool_address, time_delta, threading.current_thread().name
+
+
+@pytest.fixture(autouse=True, scope='module')
+def executors():
+    yield
+    jobs.shutdown()
+
+
+def test_threaded_runs_on_io_pool():
+    future = jobs.threaded(lambda: threading.current_thread().name)()
+    assert future.result(5).startswith('analysis-io')
+
+
+def test_in_process_function():
+    assert jobs.in_process(square)(7).result(60) == 49
+
+
+def test_in_process_staticmethod_matches_inline():
+    result = SlowPool._formatted_liquidity(POOL, TICKS).result(60)
+    expected = formatted_liquidity(POOL, TICKS)
+    assert pd.DataFrame(result).equals(pd.DataFrame(expected))
+
+
+def test_background_reads_memoized_properties_concurrently():
+    pool = SlowPool()
+    started = time.monotonic()
+    names = jobs.gather(pool.background('first', 'second'), timeout=5)
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 2 * SlowPool.delay
+    assert names['first'] != names['second']
+    # memoized, read again without waiting
+    assert pool.read('first').result(1) == names['first']
+
+
+def test_background_calls_methods_with_arguments_concurrently():
+    pool = SlowPool()
+    calls = [('prices', ('0xa', 7)), ('prices', ('0xb', 30))]
+    started = time.monotonic()
+    results = jobs.gather(pool.background(*calls, 'first'), timeout=5)
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 2 * SlowPool.delay
+    assert results[calls[0]][:2] == ('0xa', 7)
+    assert results[calls[1]][:2] == ('0xb', 30)
+    assert len({results[calls[0]][2], results[calls[1]][2], results['first']}) == 3
+    assert pool.read('prices', '0xc', time_delta=1).result(5)[:2] == ('0xc', 1)
+
+
+def test_gather_times_out_and_names_pending_jobs():
+    release = threading.Event()
+    futures = {'fast': jobs.threaded(lambda: 1)(), 'slow': jobs.threaded(release.wait)(5)}
+    try:
+        with pytest.raises(jobs.TimeoutError, match='slow'):
+            jobs.gather(futures, timeout=0.2)
+    finally:
+        release.set()
+    assert futures['fast'].result() == 1
+
+
+def test_gather_reraises_failures():
+    def fail():
+        raise ValueError('boom')
+    with pytest.raises(ValueError):
+        jobs.gather({'fail': jobs.threaded(fail)()}, timeout=5)
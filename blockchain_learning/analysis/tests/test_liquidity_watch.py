@@ -0,0 +1,95 @@
+from liquidity_watch import TickChangeDetector
+
+
+class FakeSubgraph:
+    """Ticks of one pool with the block they last changed at, answers the meta and
+    changedTicks queries of TickChangeDetector; every changedTicks call is recorded"""
+
+    def __init__(self, head):
+        self.head = head
+        self.ticks = {}
+        self.fetches = []
+
+    def set(self, block, tick_idx, net, gross):
+        self.ticks[tick_idx] = {
+            'id': f'0xpool#{tick_idx}', 'tickIdx': str(tick_idx),
+            'liquidityNet': str(net), 'liquidityGross': str(gross), 'block': block}
+
+    def query(self, query, variables=None, operation_name=None):
+        if '_meta' in query:
+            return {'data': {'_meta': {'block': {'number': self.head}}}}
+        self.fetches.append((variables['since'], variables['block']))
+        match = sorted(
+            (tick for tick in self.ticks.values()
+             if tick['id'] > variables['cursor'] and variables['since'] <= tick['block'] <= variables['block']),
+            key=lambda tick: tick['id'])
+        return {'data': {'ticks': [dict(tick) for tick in match[:1000]]}}
+
+
+def watched(head=100):
+    subgraph = FakeSubgraph(head)
+    subgraph.set(10, -60, 500, 500)
+    subgraph.set(20, 60, -500, 500)
+    calls = []
+    detector = TickChangeDetector(subgraph, '0xpool', callback=calls.append)
+    assert detector.poll() is None
+    return subgraph, detector, calls
+
+
+def test_first_poll_loads_the_curve_at_head():
+    subgraph, detector, calls = watched()
+
+    assert detector.block == 100
+    assert subgraph.fetches == [(0, 100)]
+    assert list(detector.curve['tickIdx']) == [-60, 60]
+    assert list(detector.curve['liquidityNet']) == [500, -500]
+    assert calls == []
+
+
+def test_new_and_changed_ticks_reported():
+    subgraph, detector, calls = watched()
+    subgraph.head = 105
+    subgraph.set(103, 60, -800, 800)
+    subgraph.set(104, 0, 300, 300)
+
+    changed = detector.poll()
+
+    assert list(changed['tickIdx']) == [0, 60]
+    assert list(changed['liquidityNet']) == [300, -800]
+    assert list(changed['previousLiquidityNet']) == [0, -500]
+    assert list(changed['previousLiquidityGross']) == [0, 500]
+    assert calls == [changed]
+    assert list(detector.curve['tickIdx']) == [-60, 0, 60]
+    assert list(detector.curve['liquidityGross']) == [500, 300, 800]
+
+
+def test_unchanged_ticks_filtered():
+    subgraph, detector, calls = watched()
+    subgraph.head = 101
+    # touched at block 101 but back to the same liquidity
+    subgraph.set(101, -60, 500, 500)
+    subgraph.set(101, 60, -400, 400)
+
+    changed = detector.poll()
+
+    assert list(changed['tickIdx']) == [60]
+    subgraph.head = 102
+    subgraph.set(102, -60, 500, 500)
+    assert detector.poll() is None
+    assert len(calls) == 1
+
+
+def test_block_cursor_advances():
+    subgraph, detector, calls = watched()
+
+    assert detector.poll() is None
+    assert subgraph.fetches == [(0, 100)]
+
+    subgraph.head = 110
+    assert detector.poll() is None
+    subgraph.head = 115
+    subgraph.set(112, -60, 700, 700)
+    detector.poll()
+
+    assert subgraph.fetches == [(0, 100), (101, 110), (111, 115)]
+    assert detector.block == 115
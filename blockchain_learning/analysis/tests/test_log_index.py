@@ -0,0 +1,143 @@
+import pytest
+from log_index import BURN, MINT, SWAP, IndexedPoolAnalysis, LogIndexer
+from rpc import RpcError, encode_int
+
+POOL = '0x' + '11' * 20
+
+
+def topic(value):
+    return '0x' + encode_int(value).hex()
+
+
+class FakeChain:
+    """eth_getLogs, eth_getBlockByNumber and eth_blockNumber of a chain whose blocks
+    after 90 are replaced once `fork` is set; ranges over 50 blocks are refused"""
+
+    def __init__(self):
+        self.fork = 0
+        self.head = 100
+        self.ranges = []
+
+    def block_hash(self, block):
+        return '0x%064x' % (block * 1000 + (self.fork if block > 90 else 0))
+
+    def log(self, block, index, topics, words):
+        return {
+            'address': POOL, 'blockNumber': hex(block), 'logIndex': hex(index),
+            'blockHash': self.block_hash(block), 'topics': topics,
+            'data': '0x' + b''.join(encode_int(word) for word in words).hex(),
+            }
+
+    def logs(self):
+        logs = [
+            # sender, amount, amount0, amount1
+            self.log(10, 0, [MINT, topic(1), topic(-60), topic(60)], [1, 1000, 5, 5]),
+            self.log(20, 0, [MINT, topic(1), topic(0), topic(120)], [1, 500, 5, 5]),
+            # amount, amount0, amount1
+            self.log(30, 0, [BURN, topic(1), topic(0), topic(120)], [200, 1, 1]),
+            ]
+        for block in range(40, 100, 5):
+            logs.append(self.log(block, 0, [SWAP, topic(2), topic(3)], [-10 ** 6, 5 * 10 ** 14, 2 ** 96, 1500, 30]))
+        if self.fork:
+            logs.append(self.log(95, 1, [MINT, topic(1), topic(60), topic(180)], [1, 700, 5, 5]))
+            logs.append(self.log(95, 2, [SWAP, topic(2), topic(3)], [-10 ** 6, 6 * 10 ** 14, 2 ** 96, 1500, 70]))
+        return logs
+
+    def call(self, method, *params):
+        if method == 'eth_blockNumber':
+            return hex(self.head)
+        if method == 'eth_getLogs':
+            start, stop = int(params[0]['fromBlock'], 16), int(params[0]['toBlock'], 16)
+            self.ranges.append((start, stop))
+            if stop - start > 50:
+                raise RpcError('range too large')
+            return [log for log in self.logs() if start <= int(log['blockNumber'], 16) <= stop]
+
+    def batch(self, calls):
+        return [{'hash': self.block_hash(int(params[0], 16)), 'timestamp': hex(int(params[0], 16) * 12)}
+                for _, params in calls]
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def chain():
+    return FakeChain()
+
+
+@pytest.fixture
+def indexer(tmp_path, chain):
+    indexer = LogIndexer([POOL], str(tmp_path / 'index.sqlite'), url=chain, confirmations=0, span=200)
+    indexer.logger = lambda message: None
+    yield indexer
+    indexer.close()
+
+
+def liquidity(ticks):
+    return {
+        tick: (net, gross) for tick, net, gross in
+        zip(ticks['tickIdx'].tolist(), ticks['liquidityNet'].tolist(), ticks['liquidityGross'].tolist())}
+
+
+def test_decode(indexer, chain):
+    logs = chain.logs()[2:4]
+    swaps, positions = indexer.decode(logs, {30: 360, 40: 480})
+
+    assert positions == [(POOL, 30, 0, 360, '0x' + '00' * 19 + '01', 0, 120, '-200', '1', '1')]
+    assert swaps == [(
+        POOL, 40, 0, 480, '0x' + '00' * 19 + '02', '0x' + '00' * 19 + '03',
+        -1e6, 5e14, str(2 ** 96), '1500', 30)]
+
+
+def test_sync_ingests_logs(indexer, chain):
+    assert indexer.sync() == 100
+    # refused ranges are halved until the node answers
+    assert chain.ranges == [(0, 100), (0, 99), (0, 49), (50, 100)]
+
+    assert liquidity(indexer.ticks(POOL)) == {
+        -60: (1000, 1000), 0: (300, 300), 60: (-1000, 1000), 120: (-300, 300)}
+    assert liquidity(indexer.ticks(POOL, block=15)) == {-60: (1000, 1000), 60: (-1000, 1000)}
+    assert len(indexer.swaps(POOL)['timestamp']) == 12
+    assert indexer.last_swap(POOL) == (30, str(2 ** 96))
+
+
+def test_reorg_rolls_back_ticks(indexer, chain):
+    indexer.sync()
+    before = liquidity(indexer.ticks(POOL))
+
+    chain.fork, chain.head = 1, 105
+    indexer.sync()
+
+    assert indexer.last_swap(POOL) == (70, str(2 ** 96))
+    assert len(indexer.swaps(POOL)['timestamp']) == 13
+    after = liquidity(indexer.ticks(POOL))
+    assert after[60] == (-1000 + 700, 1700) and after[180] == (-700, 700)
+
+    indexer.rollback(90)
+    assert liquidity(indexer.ticks(POOL)) == before
+    # 49 is the first checkpoint, a reorg never rolls back further than one
+    indexer.rollback(49)
+    assert liquidity(indexer.ticks(POOL)) == before
+    indexer.rollback(-1)
+    assert liquidity(indexer.ticks(POOL)) == {}
+    assert indexer._connection.execute('SELECT COUNT(*) FROM ticks').fetchone() == (0,)
+
+
+def test_ticks_table_rebuilt_for_older_index(tmp_path, indexer, chain):
+    indexer.sync()
+    expected = liquidity(indexer.ticks(POOL))
+    with indexer._connection:
+        indexer._connection.execute('DELETE FROM ticks')
+
+    reopened = LogIndexer([POOL], str(tmp_path / 'index.sqlite'), url=chain, confirmations=0)
+    try:
+        assert liquidity(reopened.ticks(POOL)) == expected
+    finally:
+        reopened.close()
+
+
+def test_historical_prices_of_another_pool(indexer):
+    analysis = IndexedPoolAnalysis(POOL, indexer)
+    with pytest.raises(ValueError):
+        analysis.get_historical_pool_prices('0x' + '22' * 20, 1)
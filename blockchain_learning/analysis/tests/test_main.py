@@ -0,0 +1,97 @@
+import time
+import pytest
+
+pytest.importorskip('cbpro')
+from main import LiquidityMonitor  # noqa: E402
+
+POOLS = ['0xa', '0xb', '0xc']
+
+
+class FakeTransport:
+
+    def __init__(self):
+        self.closed = False
+
+    async def aclose(self):
+        self.closed = True
+
+
+class FakeAsyncSubgraph:
+    """Ticks of several pools with the block they last changed at, answers the
+    meta and changedTicks queries of LiquidityMonitor through aquery"""
+
+    def __init__(self, head):
+        self.head = head
+        self.ticks = []
+        self.batches = []
+        self.transport = FakeTransport()
+
+    def set(self, block, pool, tick_idx, net):
+        self.ticks = [tick for tick in self.ticks if tick['id'] != f'{pool}#{tick_idx}']
+        self.ticks.append({
+            'id': f'{pool}#{tick_idx}', 'poolAddress': pool.upper(), 'tickIdx': str(tick_idx),
+            'liquidityNet': str(net), 'liquidityGross': str(abs(net)), 'block': block})
+
+    async def aquery(self, query, variables=None, operation_name=None):
+        if '_meta' in query:
+            return {'data': {'_meta': {'block': {'number': self.head}}}}
+        self.batches.append((sorted(variables['pools']), variables['since'], variables['block']))
+        match = sorted(
+            (tick for tick in self.ticks
+             if tick['poolAddress'].lower() in variables['pools'] and tick['id'] > variables['cursor']
+             and variables['since'] <= tick['block'] <= variables['block']),
+            key=lambda tick: tick['id'])
+        return {'data': {'ticks': [dict(tick) for tick in match[:1000]]}}
+
+
+def monitor(subgraph, **options):
+    changes = []
+    monitor = LiquidityMonitor(POOLS, callback=lambda pool, changed: changes.append((pool, changed)), **options)
+    monitor.client = subgraph
+    monitor.logger = lambda message: None
+    return monitor, changes
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_batches_are_split_and_routed_to_their_pool():
+    subgraph = FakeAsyncSubgraph(100)
+    for pool in POOLS:
+        subgraph.set(10, pool, 60, 500)
+    watcher, changes = monitor(subgraph, batch_size=2, interval=0.01)
+    watcher.start()
+    try:
+        wait_for(lambda: len(subgraph.batches) >= 2)
+        subgraph.set(101, '0xa', 60, 700)
+        subgraph.set(101, '0xc', -60, 300)
+        subgraph.head = 101
+        wait_for(lambda: len(changes) == 2)
+    finally:
+        watcher.stop()
+
+    assert subgraph.batches[:2] == [(['0xa', '0xb'], 0, 100), (['0xc'], 0, 100)]
+    assert subgraph.batches[2:] == [(['0xa', '0xb'], 101, 101), (['0xc'], 101, 101)]
+    assert [pool for pool, _ in changes] == ['0xa', '0xc']
+    assert list(changes[0][1]['liquidityNet']) == [700]
+    assert list(changes[1][1]['tickIdx']) == [-60]
+    assert list(watcher.detectors['0xb'].curve['liquidityNet']) == [500]
+    assert all(detector.block == 101 for detector in watcher.detectors.values())
+
+
+def test_stop_ends_the_loop_promptly():
+    subgraph = FakeAsyncSubgraph(100)
+    watcher, changes = monitor(subgraph, interval=60)
+    watcher.start()
+    wait_for(lambda: len(subgraph.batches) == 1)
+
+    started = time.monotonic()
+    watcher.stop()
+
+    assert time.monotonic() - started < 1
+    assert subgraph.transport.closed
+    assert watcher._thread is None
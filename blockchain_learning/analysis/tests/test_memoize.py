@@ -0,0 +1,91 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from memoize import Memo, memo, memo_keys, memoized_property
+
+
+class Slow:
+
+    memo_size = None
+
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.calls = []
+
+    def _compute(self, name):
+        self.calls.append(name)
+        time.sleep(self.delay)
+        return name
+
+    @memoized_property
+    def a(self):
+        return self._compute('a')
+
+    @memoized_property
+    def b(self):
+        return self._compute('b')
+
+    @memoized_property(ttl=0.05)
+    def c(self):
+        return self._compute('c')
+
+
+def test_different_keys_compute_concurrently():
+    slow = Slow(delay=0.3)
+    started = time.monotonic()
+    with ThreadPoolExecutor(2) as executor:
+        assert list(executor.map(lambda name: getattr(slow, name), ['a', 'b'])) == ['a', 'b']
+    assert time.monotonic() - started < 0.55
+
+
+def test_same_key_computed_once():
+    slow = Slow(delay=0.1)
+    with ThreadPoolExecutor(4) as executor:
+        assert list(executor.map(lambda _: slow.a, range(4))) == ['a'] * 4
+    assert slow.calls == ['a']
+
+
+def test_ttl_and_invalidate():
+    slow = Slow(delay=0)
+    assert (slow.a, slow.c) == ('a', 'c')
+    time.sleep(0.1)
+    assert (slow.a, slow.c) == ('a', 'c')
+    memo(slow).invalidate('a')
+    slow.a
+    assert slow.calls == ['a', 'c', 'c', 'a']
+
+
+def test_size_derived_from_memoized_properties():
+    assert memo_keys(Slow) == {'a', 'b', 'c'}
+    slow = Slow(delay=0)
+    slow.a, slow.b, slow.c
+    assert memo(slow).maxsize == 3
+    assert all(name in memo(slow) for name in 'abc')
+
+
+def test_lru_eviction():
+    values = Memo(maxsize=2)
+    for key in 'abc':
+        values.get(key, lambda: key)
+    assert 'a' not in values and 'b' in values and 'c' in values
+
+
+def test_compute_not_holding_instance_lock():
+    values = Memo()
+    entered, release = threading.Event(), threading.Event()
+
+    def block():
+        entered.set()
+        release.wait(5)
+        return 1
+
+    worker = threading.Thread(target=values.get, args=('slow', block))
+    worker.start()
+    entered.wait(5)
+    try:
+        assert values.get('fast', lambda: 2) == 2
+        values.invalidate('fast')
+    finally:
+        release.set()
+        worker.join()
+    assert values.get('slow', lambda: 3) == 1
@@ -0,0 +1,85 @@
+import asyncio
+import pytest
+from paginate import KeysetPaginator
+
+
+class FakeClient:
+    """Serves `rows` like a subgraph collection: where {key_gt or key_gte: $cursor},
+    ordered by key, `first` rows per query"""
+
+    def __init__(self, rows, key, op, first):
+        self.rows = sorted(rows, key=lambda row: (int(row[key]), row['id']))
+        self.key = key
+        self.op = op
+        self.first = first
+        self.cursors = []
+
+    def query(self, query, variables=None, operation_name=None):
+        cursor = variables['cursor']
+        self.cursors.append(cursor)
+        if self.op == 'gt':
+            match = [row for row in self.rows if int(row[self.key]) > int(cursor)]
+        else:
+            match = [row for row in self.rows if int(row[self.key]) >= int(cursor)]
+        return {'data': {'swaps': match[:self.first]}}
+
+    async def aquery(self, query, variables=None, operation_name=None):
+        return self.query(query, variables, operation_name)
+
+
+def paginator(client, **options):
+    paginator = KeysetPaginator(client, 'query', 'swaps', key=client.key, start=0, **options)
+    paginator.page_size = client.first
+    return paginator
+
+
+def swaps(timestamps):
+    return [{'id': f'0x{i:02x}', 'timestamp': str(timestamp)} for i, timestamp in enumerate(timestamps)]
+
+
+def test_unique_key_advances_past_each_page():
+    client = FakeClient([{'id': str(i), 'tickIdx': str(i)} for i in range(1, 8)], 'tickIdx', 'gt', 3)
+    rows = list(paginator(client))
+
+    assert [row['tickIdx'] for row in rows] == [str(i) for i in range(1, 8)]
+    assert client.cursors == [0, 3, 6]
+
+
+def test_shared_timestamp_not_repeated_or_skipped():
+    rows = swaps([1, 2, 2, 2, 3, 3, 4, 5])
+    client = FakeClient(rows, 'timestamp', 'gte', 4)
+    result = list(paginator(client, tiebreak='id'))
+
+    assert [row['id'] for row in result] == [row['id'] for row in rows]
+    # boundary rows are re-read by the next query and dropped by id
+    assert client.cursors == [0, 2, 3, 5]
+
+
+def test_seen_ids_resume_a_previous_sync():
+    client = FakeClient(swaps([5, 5, 6, 7]), 'timestamp', 'gte', 3)
+    resumed = paginator(client, tiebreak='id', seen={'0x00'})
+    resumed.start = 5
+    result = list(resumed)
+
+    assert [row['id'] for row in result] == ['0x01', '0x02', '0x03']
+
+
+def test_full_page_of_ties_raises():
+    client = FakeClient(swaps([1, 1, 1, 1]), 'timestamp', 'gte', 3)
+    with pytest.raises(RuntimeError):
+        list(paginator(client, tiebreak='id'))
+
+
+def test_pages_ahead_and_apages_match_pages():
+    rows = swaps([1, 2, 2, 2, 3, 3, 4, 5, 5])
+    expected = [[row['id'] for row in page] for page in paginator(
+        FakeClient(rows, 'timestamp', 'gte', 4), tiebreak='id').pages()]
+
+    ahead = paginator(FakeClient(rows, 'timestamp', 'gte', 4), tiebreak='id').pages_ahead()
+
+    async def collect():
+        pages = paginator(FakeClient(rows, 'timestamp', 'gte', 4), tiebreak='id').apages()
+        return [[row['id'] for row in page] async for page in pages]
+
+    assert [[row['id'] for row in page] for page in ahead] == expected
+    assert asyncio.run(collect()) == expected
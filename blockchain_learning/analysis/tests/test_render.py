@@ -0,0 +1,46 @@
+import os
+import pandas as pd
+import pytest
+from render import FigureRenderer
+
+
+class Broken:
+    def plot(self, ax=None):
+        raise ValueError('broken')
+
+
+@pytest.mark.parametrize('process', [False, True])
+def test_results_collected_without_flush(tmp_path, process):
+    renderer = FigureRenderer(str(tmp_path), process=process)
+    try:
+        for i in range(3):
+            renderer.render_many({'a': pd.Series([i, i + 1]), 'b': (pd.Series([1, 2]), 'title')})
+        paths = renderer.flush(timeout=60)
+    finally:
+        renderer.close()
+
+    assert set(paths) == {'a', 'b'}
+    assert renderer.paths == paths
+    assert renderer._done == renderer._submitted == 3
+    assert os.path.exists(paths['a'][0])
+    assert os.path.exists(os.path.join(str(tmp_path), 'index.html'))
+
+
+def test_close_drains_pending_batches(tmp_path):
+    renderer = FigureRenderer(str(tmp_path))
+    for i in range(5):
+        renderer.submit(f'plot{i}', pd.Series([1, 2, 3]))
+    renderer.close()
+
+    assert renderer._done == 5
+    assert sorted(renderer.paths) == [f'plot{i}' for i in range(5)]
+
+
+def test_failed_batches_raise_on_flush(tmp_path):
+    renderer = FigureRenderer(str(tmp_path), process=False)
+    renderer.logger = lambda message: None
+    renderer.submit('broken', Broken())
+    with pytest.raises(RuntimeError):
+        renderer.flush()
+    # errors are reported once
+    assert renderer.flush() == {}
@@ -0,0 +1,232 @@
+import pytest
+from rpc import (
+    DECIMALS, FEE, LIQUIDITY, MULTICALL3, SLOT0, SYMBOL, TICK_BITMAP, TICK_SPACING, TICKS, TOKEN0, TOKEN1,
+    JsonRpcTransport, RpcError, RpcPoolAnalysis, UniV3RpcClient, decode_address, decode_aggregate3, decode_int, decode_string,
+    encode_aggregate3, encode_int)
+from tick_math import MAX_TICK, MIN_TICK
+
+POOL = '0x' + '11' * 20
+TOKEN_0 = '0x' + '22' * 20
+TOKEN_1 = '0x' + '33' * 20
+# tickIdx: (liquidityGross, liquidityNet), ticks across several bitmap words, negative ones included
+TICK_STATE = {-887220: (5, 5), -15420: (4, 4), -60: (10, 7), 0: (3, -2), 15360: (4, -4), 887220: (5, -10)}
+
+
+def word(value):
+    return encode_int(value).hex()
+
+
+def abi_string(text):
+    data = text.encode()
+    return encode_int(32) + encode_int(len(data)) + data.ljust(32, b'\0')
+
+
+def test_encode_aggregate3_by_hand():
+    target = '0x' + 'ab' * 20
+    calldata = encode_aggregate3([(target, bytes.fromhex(SLOT0))])
+    assert calldata.hex() == ''.join([
+        '82ad56cb',
+        word(32),       # offset of the Call3[] array
+        word(1),        # its length
+        word(32),       # offset of the only tuple, from the start of the array's items
+        '00' * 12 + 'ab' * 20,  # target
+        word(1),        # allowFailure
+        word(96),       # offset of callData in the tuple
+        word(4),        # callData length
+        SLOT0 + '00' * 28,
+        ])
+
+
+def test_decode_aggregate3_by_hand():
+    data = bytes.fromhex(''.join([
+        word(32), word(2),
+        word(64), word(192),   # tuple offsets from the start of the items
+        word(1), word(64), word(32), word(7),   # (true, abi.encode(7))
+        word(0), word(64), word(0),             # (false, "")
+        ]))
+    assert decode_aggregate3(data) == [encode_int(7), None]
+
+
+def test_aggregate3_round_trip_with_padding():
+    calls = [(POOL, bytes.fromhex(TICKS) + encode_int(-60)), (TOKEN_0, bytes.fromhex(SYMBOL))]
+    calldata = encode_aggregate3(calls)
+    assert len(calldata) % 32 == 4
+    assert decode_address(calldata[4:], 4) == POOL
+
+
+def test_decoders():
+    assert decode_int(encode_int(-30), signed=True) == -30
+    assert decode_int(encode_int(-30)) == (1 << 256) - 30
+    assert decode_int(encode_int(5) + encode_int(9), 1) == 9
+    assert decode_address(encode_int(int(TOKEN_0, 16))) == TOKEN_0
+    assert decode_string(abi_string('USDC')) == 'USDC'
+    # MKR style bytes32 symbol
+    assert decode_string(b'MKR'.ljust(32, b'\0')) == 'MKR'
+
+
+def answer(target, data):
+    """Return data of a pool or token view, None for a revert"""
+    selector, args = data[:4].hex(), data[4:]
+    if target == POOL:
+        if selector == SLOT0:
+            return encode_int(2 ** 96) + encode_int(-30) + b'\0' * 32 * 5
+        if selector == LIQUIDITY:
+            return encode_int(999)
+        if selector == FEE:
+            return encode_int(3000)
+        if selector == TICK_SPACING:
+            return encode_int(60)
+        if selector == TOKEN0:
+            return encode_int(int(TOKEN_0, 16))
+        if selector == TOKEN1:
+            return encode_int(int(TOKEN_1, 16))
+        if selector == TICK_BITMAP:
+            bitmap = 0
+            for tick in TICK_STATE:
+                compressed = tick // 60
+                if compressed >> 8 == decode_int(args, signed=True):
+                    bitmap |= 1 << (compressed & 255)
+            return encode_int(bitmap)
+        if selector == TICKS:
+            gross, net = TICK_STATE.get(decode_int(args, signed=True), (0, 0))
+            return encode_int(gross) + encode_int(net) + b'\0' * 32 * 6
+    if selector == SYMBOL:
+        return abi_string('USDC') if target == TOKEN_0 else b'WETH'.ljust(32, b'\0')
+    if selector == DECIMALS:
+        return encode_int(6 if target == TOKEN_0 else 18)
+    return None
+
+
+def split_aggregate3(calldata):
+    data = calldata[4:]
+    start = decode_int(data) + 32
+    calls = []
+    for i in range(decode_int(data[start - 32:])):
+        item = start + decode_int(data[start:], i)
+        offset = item + decode_int(data[item:], 2)
+        calls.append((decode_address(data[item:]), data[offset + 32:offset + 32 + decode_int(data[offset:])]))
+    return calls
+
+
+def join_aggregate3(results):
+    items = []
+    for result in results:
+        success = int(result is not None)
+        result = result or b''
+        items.append(encode_int(success) + encode_int(64) + encode_int(len(result))
+                     + result.ljust(-(-len(result) // 32) * 32, b'\0'))
+    head, offset = [], 32 * len(items)
+    for item in items:
+        head.append(encode_int(offset))
+        offset += len(item)
+    return encode_int(32) + encode_int(len(items)) + b''.join(head + items)
+
+
+class FakeNode:
+    """JSON-RPC transport answering eth_calls from answer(), with Multicall3 deployed from `multicall_from`"""
+
+    max_batch = 200
+
+    def __init__(self, multicall_from=0):
+        self.multicall_from = multicall_from
+        self.methods = []
+
+    def respond(self, request):
+        method, params = request['method'], request['params']
+        self.methods.append(method)
+        if method == 'eth_blockNumber':
+            return {'id': request['id'], 'result': hex(100)}
+        if method == 'eth_getCode':
+            deployed = self.multicall_from is not None and int(params[1], 16) >= self.multicall_from
+            return {'id': request['id'], 'result': '0x6000' if deployed else '0x'}
+        target, data = params[0]['to'], bytes.fromhex(params[0]['data'][2:])
+        if target == MULTICALL3:
+            result = join_aggregate3([answer(*call) for call in split_aggregate3(data)])
+        else:
+            result = answer(target, data)
+            if result is None:
+                return {'id': request['id'], 'error': {'message': 'execution reverted'}}
+        return {'id': request['id'], 'result': '0x' + result.hex()}
+
+    def post(self, payload):
+        if isinstance(payload, dict):
+            return self.respond(payload)
+        return [self.respond(request) for request in reversed(payload)]
+
+    def call(self, method, *params):
+        response = self.respond({'id': 0, 'method': method, 'params': list(params)})
+        return response['result']
+
+    def batch(self, calls):
+        return [self.call(method, *params) for method, params in calls]
+
+    def close(self):
+        pass
+
+
+def analysis(node):
+    pool = RpcPoolAnalysis(POOL)
+    pool._rpc = UniV3RpcClient()
+    pool._rpc.transport = node
+    return pool
+
+
+@pytest.mark.parametrize('multicall_from', [0, None])
+def test_pool_reads(multicall_from):
+    pool = analysis(FakeNode(multicall_from))
+
+    assert pool.pool_constants == {
+        'feeTier': 3000, 'tickSpacing': 60,
+        'token0': {'id': TOKEN_0, 'symbol': 'USDC', 'decimals': 6},
+        'token1': {'id': TOKEN_1, 'symbol': 'WETH', 'decimals': 18},
+        }
+    state = pool.fetchTicksSurroundingPrice()
+    assert (state['tick'], state['liquidity'], state['sqrtPrice']) == ('-30', '999', str(2 ** 96))
+
+
+@pytest.mark.parametrize('multicall_from', [0, None])
+def test_bitmap_words_to_ticks(multicall_from):
+    pool = analysis(FakeNode(multicall_from))
+    pool.words_per_call = 7
+
+    ticks = pool.fetchInitializedTicks()
+
+    assert ticks['tickIdx'].tolist() == sorted(TICK_STATE)
+    assert ticks['liquidityGross'].tolist() == [TICK_STATE[tick][0] for tick in sorted(TICK_STATE)]
+    assert ticks['liquidityNet'].tolist() == [TICK_STATE[tick][1] for tick in sorted(TICK_STATE)]
+    words = pool._bitmap_words()
+    assert (words[0], words[-1]) == ((MIN_TICK // 60) >> 8, (MAX_TICK // 60) >> 8)
+
+
+@pytest.mark.parametrize('multicall_from', [0, None])
+def test_reverted_call_is_none(multicall_from):
+    client = UniV3RpcClient()
+    client.transport = FakeNode(multicall_from)
+    assert client.call_many([(POOL, FEE, b''), (POOL, 'deadbeef', b'')], 1) == [encode_int(3000), None]
+
+
+def test_has_multicall_bounds():
+    node = FakeNode(multicall_from=50)
+    client = UniV3RpcClient()
+    client.transport = node
+
+    assert [client.has_multicall(block) for block in (60, 70, 40, 30, 55, 45)] == [
+        True, True, False, False, True, False]
+    # 70 and 30 were answered from the bounds, 55 and 45 were not
+    assert node.methods.count('eth_getCode') == 4
+    assert (client._multicall_from, client._multicall_before) == (55, 45)
+
+
+def test_batch_rejected_as_a_whole_raises_rpc_error(stub_server):
+    error = {'jsonrpc': '2.0', 'id': None, 'error': {'code': -32600, 'message': 'batch too large'}}
+    stub_server.responses = [(200, error, {})]
+    transport = JsonRpcTransport(stub_server.url)
+    calls = [('eth_blockNumber', ()), ('eth_chainId', ())]
+
+    with pytest.raises(RpcError, match='batch too large'):
+        transport.batch(calls)
+
+    stub_server.responses = [(200, [{'jsonrpc': '2.0', 'id': 0, 'result': '0x1'}], {})]
+    with pytest.raises(RpcError, match='1 responses to a batch of 2'):
+        transport.batch(calls)
+    transport.close()
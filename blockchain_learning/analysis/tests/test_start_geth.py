@@ -0,0 +1,121 @@
+import os
+import sys
+import time
+import threading
+import pytest
+from start_geth import ManagedProcess, Setup
+
+
+def quiet(message):
+    pass
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.05)
+    return condition()
+
+
+def test_input_written_to_each_spawn():
+    process = ManagedProcess(
+        'echo', [sys.executable, '-c', 'print(input()[::-1])'], input='abc\n', max_restarts=1, backoff=0.01)
+    process.logger = quiet
+    process.start()
+    try:
+        assert wait_for(lambda: list(process.tail) == ['cba', 'cba'])
+    finally:
+        process.stop()
+
+
+def test_no_stdin_without_input():
+    process = ManagedProcess('eof', [sys.executable, '-c', 'import sys; print(repr(sys.stdin.read()))'],
+                             restart=False)
+    process.logger = quiet
+    process.start()
+    try:
+        assert wait_for(lambda: list(process.tail) == ["''"])
+    finally:
+        process.stop()
+
+
+class RecordingSetup(Setup):
+    """Starts nothing, clef 'creates' its socket after a delay"""
+
+    logger = staticmethod(quiet)
+
+    def __init__(self, signer):
+        super().__init__()
+        self.signer = signer
+        self.started = []
+
+    def supervise(self, name, args, **options):
+        self.started.append((name, os.path.exists(self.signer), options))
+        if name == 'clef':
+            threading.Timer(0.3, lambda: open(self.signer, 'w').close()).start()
+
+    def wait_ready(self, timeout=120, interval=0.5):
+        return 'fake'
+
+
+def test_geth_started_after_signer_exists(tmp_path):
+    setup = RecordingSetup(str(tmp_path / 'clef.ipc'))
+    setup.run_chain('Goerli', timeout=10)
+
+    assert [(name, exists) for name, exists, _ in setup.started] == [('clef', False), ('geth', True)]
+    assert setup.started[0][2] == {}
+
+
+def test_wait_signer_times_out(tmp_path):
+    setup = Setup()
+    setup.signer = str(tmp_path / 'missing.ipc')
+    with pytest.raises(TimeoutError):
+        setup.wait_signer(timeout=0.2, interval=0.05)
+
+
+def test_clef_rules_need_master_password(tmp_path, monkeypatch):
+    setup = RecordingSetup(str(tmp_path / 'clef.ipc'))
+    setup.rules = 'rules.js'
+    monkeypatch.delenv('CLEF_MASTER_PASSWORD', raising=False)
+    with pytest.raises(RuntimeError):
+        setup.start_clef('Goerli')
+
+    monkeypatch.setenv('CLEF_MASTER_PASSWORD', 'secret')
+    setup.start_clef('Goerli')
+    assert setup.started[-1][2] == {'input': 'secret\n'}
+
+
+MISSING = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'no-such-binary')
+
+
+def test_failed_spawn_kept_as_error():
+    process = ManagedProcess('missing', [MISSING], backoff=0.01)
+    process.logger = quiet
+    process.start()
+    try:
+        assert wait_for(lambda: process.error is not None)
+        assert isinstance(process.error, FileNotFoundError)
+        assert wait_for(lambda: not process._watcher.is_alive())
+    finally:
+        process.stop()
+
+
+def test_supervise_checks_the_binary():
+    setup = Setup()
+    with pytest.raises(FileNotFoundError, match='no-such-binary'):
+        setup.supervise('geth', [MISSING])
+    assert setup.processes == {}
+
+
+def test_wait_ready_reraises_spawn_error():
+    setup = Setup()
+    setup.rpc_url = 'http://127.0.0.1:9'
+    setup.logger = quiet
+    geth = ManagedProcess('geth', [MISSING])
+    geth.logger = quiet
+    setup.processes['geth'] = geth.start()
+
+    started = time.time()
+    with pytest.raises(FileNotFoundError):
+        setup.wait_ready(timeout=10, interval=0.05)
+    assert time.time() - started < 5
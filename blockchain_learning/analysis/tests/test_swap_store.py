@@ -0,0 +1,77 @@
+import os
+import numpy as np
+from swap_store import SwapStore
+
+POOL = '0xPOOL'
+
+
+def swaps(*rows):
+    return [{'id': id, 'timestamp': str(timestamp), 'amount0': str(amount0), 'amount1': str(amount1)}
+            for id, timestamp, amount0, amount1 in rows]
+
+
+def test_append_and_read(tmp_path):
+    store = SwapStore(str(tmp_path))
+    store.reset(POOL, 100)
+    store.append(POOL, swaps(('a', 100, -1.5, 3000), ('b', 101, 2, -4000)))
+
+    columns = store.read(POOL)
+    assert {name: column.dtype for name, column in columns.items()} == {
+        'timestamp': np.int64, 'amount0': np.float64, 'amount1': np.float64}
+    assert isinstance(columns['timestamp'], np.memmap)
+    assert columns['timestamp'].tolist() == [100, 101]
+    assert columns['amount0'].tolist() == [-1.5, 2.0]
+    assert columns['amount1'].tolist() == [3000.0, -4000.0]
+    assert store.read(POOL, since=101)['amount0'].tolist() == [2.0]
+
+
+def test_read_empty_and_missing(tmp_path):
+    store = SwapStore(str(tmp_path))
+    assert store.meta(POOL) is None
+    assert store.read(POOL)['timestamp'].dtype == np.int64
+    store.reset(POOL, 0)
+    assert store.append(POOL, []) == {'count': 0, 'since': 0, 'timestamp': 0, 'ids': []}
+    assert len(store.read(POOL, since=5)['amount1']) == 0
+
+
+def test_memmap_grows_with_appends(tmp_path):
+    store = SwapStore(str(tmp_path))
+    store.reset(POOL, 0)
+    store.append(POOL, swaps(('a', 1, 1, 1)))
+    before = store.read(POOL)
+
+    for i in range(2, 1002):
+        store.append(POOL, swaps((str(i), i, i, -i)))
+    after = store.read(POOL)
+
+    # a memmap taken earlier keeps its length, a new read sees every row
+    assert len(before['timestamp']) == 1
+    assert len(after['timestamp']) == 1001
+    assert after['timestamp'].tolist() == list(range(1, 1002))
+    assert after['amount1'][-1] == -1001.0
+    assert os.path.getsize(os.path.join(str(tmp_path), '0xpool', 'amount0')) == 1001 * 8
+
+
+def test_uncommitted_rows_dropped(tmp_path):
+    store = SwapStore(str(tmp_path))
+    store.reset(POOL, 0)
+    store.append(POOL, swaps(('a', 1, 1, 1)))
+    # an append interrupted before meta.json was written
+    with open(os.path.join(str(tmp_path), '0xpool', 'timestamp'), 'ab') as f:
+        np.asarray([99, 99], dtype=np.int64).tofile(f)
+
+    assert store.read(POOL)['timestamp'].tolist() == [1]
+    store.append(POOL, swaps(('b', 2, 2, 2)))
+    assert store.read(POOL)['timestamp'].tolist() == [1, 2]
+
+
+def test_ids_at_last_timestamp(tmp_path):
+    store = SwapStore(str(tmp_path))
+    store.reset(POOL, 0)
+    meta = store.append(POOL, swaps(('a', 1, 1, 1), ('b', 2, 1, 1), ('c', 2, 1, 1)))
+    assert (meta['timestamp'], meta['ids']) == (2, ['b', 'c'])
+    meta = store.append(POOL, swaps(('d', 2, 1, 1)))
+    assert meta['ids'] == ['b', 'c', 'd']
+    meta = store.append(POOL, swaps(('e', 3, 1, 1)))
+    assert (meta['count'], meta['timestamp'], meta['ids']) == (5, 3, ['e'])
+    assert store.meta(POOL) == meta
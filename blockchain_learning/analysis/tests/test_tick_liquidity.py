@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from tick_liquidity import compute_surrounding_ticks, formatted_liquidity, iter_cumulative_liquidity
+from tick_math import MIN_TICK, _to_fixed, tick_to_price
+
+POOL = {
+    'tick': '202919',
+    'token0': {'symbol': 'USDC', 'id': '0xa', 'decimals': '6'},
+    'token1': {'symbol': 'WETH', 'id': '0xb', 'decimals': '18'},
+    'feeTier': '3000',
+    'sqrtPrice': '0',
+    'liquidity': '1000000',
+    }
+TICKS = [
+    {'tickIdx': '202740', 'liquidityGross': '300', 'liquidityNet': '300'},
+    {'tickIdx': '202860', 'liquidityGross': '500', 'liquidityNet': '500'},
+    {'tickIdx': '202980', 'liquidityGross': '500', 'liquidityNet': '-500'},
+    ]
+
+
+@pytest.mark.parametrize('tick, decimals0, decimals1, expected', [
+    # USDC/WETH 0.3%
+    (202919, 6, 18, ('0.0006', '1540.9211')),
+    # v3-sdk priceTickConversions.test.ts: 1800 t0/1 t1 and 1.01 t2/1 t0, there with toSignificant(5)
+    (-74959, 18, 18, ('0.0006', '1799.9699')),
+    (-276225, 18, 6, ('1.0100', '0.9901')),
+    (0, 18, 18, ('1.0000', '1.0000')),
+    ])
+def test_tick_to_price(tick, decimals0, decimals1, expected):
+    assert tick_to_price(tick, decimals0, decimals1) == expected
+
+
+def test_to_fixed_rounds_half_up():
+    assert _to_fixed(1, 8, 2) == '0.13'
+    assert _to_fixed(1, 3, 4) == '0.3333'
+    assert _to_fixed(5, 2, 0) == '3'
+
+
+def test_surrounding_ticks_match_liquidity_js():
+    # traced by hand through computeSurroundingTicks: ascending, an initialized
+    # tick's net applies at the tick; descending, the net of the tick above it does
+    ticks = compute_surrounding_ticks(POOL, TICKS, num_surrounding_ticks=3)
+
+    assert ticks['activeTickIdx'] == 202860
+    assert ticks['tickIdx'].tolist() == [202680, 202740, 202800, 202860, 202920, 202980, 203040]
+    assert ticks['liquidityActive'].tolist() == [999200, 999500, 999500, 1000000, 1000000, 999500, 999500]
+    assert ticks['liquidityNet'].tolist() == [0, 300, 0, 500, 0, -500, 0]
+    assert ticks['liquidityGross'].tolist() == [0, 300, 0, 500, 0, 500, 0]
+    assert ticks['price1'][3] == tick_to_price(202860, 6, 18)[1]
+
+
+def test_formatted_liquidity_drops_last_group():
+    data = formatted_liquidity(POOL, TICKS, num_surrounding_ticks=3)
+
+    assert data['index'].tolist() == list(range(6))
+    assert data['isCurrent'].tolist() == [0, 0, 0, 1000000, 0, 0]
+    assert data['activeLiquidity'].tolist() == [999200, 999500, 999500, 0, 1000000, 999500]
+    assert data['price1'][3] == float(tick_to_price(202860, 6, 18)[1])
+
+
+def test_ticks_clipped_at_min_tick():
+    pool = dict(POOL, tick=str(MIN_TICK), feeTier='10000')
+    ticks = compute_surrounding_ticks(pool, [], num_surrounding_ticks=2)
+
+    # the active tick snaps below MIN_TICK but is kept, priced at MIN_TICK like liquidity.js
+    assert ticks['tickIdx'].tolist() == [MIN_TICK - 128, MIN_TICK + 72, MIN_TICK + 272]
+    assert ticks['price0'][0] == tick_to_price(MIN_TICK, 6, 18)[0]
+
+
+def test_cumulative_liquidity_carries_over_pages():
+    pages = list(iter_cumulative_liquidity([TICKS[:2], TICKS[2:]]))
+    assert np.concatenate([page['liquidityCumulative'] for page in pages]).tolist() == [300, 800, 300]
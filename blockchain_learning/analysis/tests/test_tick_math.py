@@ -0,0 +1,69 @@
+import math
+import random
+import numpy as np
+import pytest
+from tick_math import (
+    MAX_SQRT_RATIO, MAX_TICK, MIN_SQRT_RATIO, MIN_TICK, Q96, get_sqrt_ratio_at_tick,
+    get_tick_at_sqrt_ratio, snap_ticks, sqrt_ratio_at_ticks, tick_to_price_array)
+
+TICKS = [MIN_TICK, MIN_TICK + 1, -276225, -74959, -1, 0, 1, 60, 202919, MAX_TICK - 1, MAX_TICK]
+
+
+def test_bounds():
+    # v3-sdk tickMath.test.ts
+    assert get_sqrt_ratio_at_tick(MIN_TICK) == MIN_SQRT_RATIO
+    assert get_sqrt_ratio_at_tick(MAX_TICK) == MAX_SQRT_RATIO
+    assert get_sqrt_ratio_at_tick(0) == Q96
+    assert get_tick_at_sqrt_ratio(MIN_SQRT_RATIO) == MIN_TICK
+    assert get_tick_at_sqrt_ratio(MAX_SQRT_RATIO - 1) == MAX_TICK - 1
+
+
+@pytest.mark.parametrize('tick', [MIN_TICK - 1, MAX_TICK + 1])
+def test_tick_out_of_range(tick):
+    with pytest.raises(ValueError):
+        get_sqrt_ratio_at_tick(tick)
+    with pytest.raises(ValueError):
+        sqrt_ratio_at_ticks([0, tick])
+
+
+@pytest.mark.parametrize('sqrt_ratio', [MIN_SQRT_RATIO - 1, MAX_SQRT_RATIO])
+def test_sqrt_ratio_out_of_range(sqrt_ratio):
+    with pytest.raises(ValueError):
+        get_tick_at_sqrt_ratio(sqrt_ratio)
+
+
+@pytest.mark.parametrize('tick', TICKS)
+def test_close_to_float(tick):
+    expected = math.sqrt(1.0001) ** tick * Q96
+    assert get_sqrt_ratio_at_tick(tick) == pytest.approx(expected, rel=1e-9)
+
+
+def test_round_trip():
+    rng = random.Random(0)
+    ticks = list(range(-500, 500)) + [rng.randint(MIN_TICK, MAX_TICK - 1) for _ in range(2000)]
+    for tick in ticks + [MIN_TICK, MAX_TICK - 1]:
+        sqrt_ratio = get_sqrt_ratio_at_tick(tick)
+        assert get_tick_at_sqrt_ratio(sqrt_ratio) == tick
+        # the greatest tick at or below, just under the next tick's ratio
+        assert get_tick_at_sqrt_ratio(get_sqrt_ratio_at_tick(tick + 1) - 1) == tick
+
+
+def test_vectorized_matches_scalar():
+    rng = np.random.default_rng(0)
+    ticks = np.concatenate([TICKS, rng.integers(MIN_TICK, MAX_TICK, 1000)])
+    assert sqrt_ratio_at_ticks(ticks).tolist() == [get_sqrt_ratio_at_tick(tick) for tick in ticks.tolist()]
+    assert sqrt_ratio_at_ticks([]).tolist() == []
+
+
+def test_price_array_exact_and_float_agree():
+    ticks = np.arange(-887200, 887200, 997)
+    exact0, exact1 = tick_to_price_array(ticks, 6, 18, exact=True)
+    float0, float1 = tick_to_price_array(ticks, 6, 18)
+    np.testing.assert_allclose(float0, exact0, rtol=1e-9)
+    np.testing.assert_allclose(float1, exact1, rtol=1e-9)
+
+
+def test_snap_ticks():
+    assert snap_ticks(202919, '3000') == 202860
+    assert snap_ticks(-1, 500) == -10
+    np.testing.assert_array_equal(snap_ticks(np.array([-201, 0, 199, 200]), 10000), [-400, 0, 0, 200])
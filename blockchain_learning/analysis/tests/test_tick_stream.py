@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from paginate import KeysetPaginator
+from tick_stream import TickStream
+
+
+class FakeTicks:
+    """Serves initialized ticks by tickIdx > $cursor, `first` per query"""
+
+    def __init__(self, ticks, first):
+        self.ticks = ticks
+        self.first = first
+
+    def query(self, query, variables=None, operation_name=None):
+        match = [tick for tick in self.ticks if int(tick['tickIdx']) > int(variables['cursor'])]
+        return {'data': {'ticks': match[:self.first]}}
+
+
+def stream(count, page_size, count_hint, read_ahead=True):
+    ticks = [
+        {'tickIdx': str(tick), 'liquidityGross': str(2 ** 100 + tick), 'liquidityNet': str(-tick),
+         'price0': str(tick / 2), 'price1': '1.5'}
+        for tick in range(-60 * (count // 2), 60 * (count - count // 2), 60)]
+    paginator = KeysetPaginator(FakeTicks(ticks, page_size), 'query', 'ticks', key='tickIdx', start=-2 ** 31)
+    paginator.page_size = page_size
+    return ticks, TickStream(paginator, count_hint=count_hint, read_ahead=read_ahead)
+
+
+@pytest.mark.parametrize('read_ahead', [True, False])
+def test_table_grows_past_count_hint(read_ahead):
+    ticks, ticks_stream = stream(23, page_size=5, count_hint=3, read_ahead=read_ahead)
+
+    table = ticks_stream.to_table()
+
+    assert table.n_rows == 23
+    assert [int(tick) for tick in table['tickIdx']] == [int(tick['tickIdx']) for tick in ticks]
+    assert list(table['liquidityGross']) == [int(tick['liquidityGross']) for tick in ticks]
+    assert list(table['liquidityNet']) == [int(tick['liquidityNet']) for tick in ticks]
+    np.testing.assert_array_equal(table['price0'], [float(tick['price0']) for tick in ticks])
+
+
+def test_dtypes_survive_growth():
+    _, ticks_stream = stream(12, page_size=4, count_hint=1)
+
+    table = ticks_stream.to_table()
+
+    assert table['tickIdx'].dtype == np.int64
+    assert table['price0'].dtype == table['price1'].dtype == np.float64
+    # liquidity stays python ints, past 64 bits
+    assert table['liquidityGross'].dtype == object
+    assert table['liquidityGross'][0] == 2 ** 100 - 360
+
+
+def test_count_hint_large_enough_is_trimmed():
+    _, ticks_stream = stream(7, page_size=3, count_hint=100)
+
+    frame = ticks_stream.to_frame()
+
+    assert len(frame) == 7
+    assert frame['tickIdx'].is_monotonic_increasing
@@ -0,0 +1,89 @@
+import math
+import pytest
+
+pytest.importorskip('cbpro')
+from ticker import TickerBuffer, TickerFeed  # noqa: E402
+
+
+def message(price, size, time='2021-01-01T00:00:30.000000Z', product='ETH-USD'):
+    return {'type': 'ticker', 'product_id': product, 'time': time, 'price': str(price), 'last_size': str(size)}
+
+
+def test_ring_wraps_and_evicts_overwritten_prints():
+    buffer = TickerBuffer(capacity=4, vwap_window=1000)
+    for second in range(6):
+        buffer.push(second, 10 + second, 1)
+
+    latest = buffer.latest()
+    assert buffer.count == 4
+    assert list(latest['timestamp']) == [2, 3, 4, 5]
+    assert list(latest['price']) == [12, 13, 14, 15]
+    assert list(buffer.latest(2)['price']) == [14, 15]
+    # the two overwritten prints left the vwap with the ring
+    assert buffer.vwap == pytest.approx((12 + 13 + 14 + 15) / 4)
+
+
+def test_vwap_window_keeps_the_print_on_its_edge():
+    buffer = TickerBuffer(vwap_window=60)
+    assert math.isnan(buffer.vwap)
+    buffer.push(0, 10, 1)
+    buffer.push(60, 20, 3)
+    assert buffer.vwap == pytest.approx((10 + 60) / 4)
+
+    buffer.push(60.5, 30, 1)
+    assert buffer.vwap == pytest.approx((60 + 30) / 4)
+    # the ring itself still holds every print
+    assert buffer.count == 3
+
+
+def test_bar_rolls_over_at_the_interval_boundary():
+    buffer = TickerBuffer(bar_seconds=60)
+    buffer.push(0, 10, 1)
+    buffer.push(30, 12, 2)
+    buffer.push(59.999, 9, 1)
+    assert len(buffer.bars(include_current=False)) == 0
+
+    buffer.push(60, 11, 4)
+    completed = buffer.bars(include_current=False)
+    assert len(completed) == 1
+    assert tuple(completed[0]) == (0, 10, 12, 9, 9, 4)
+
+    bars = buffer.bars()
+    assert list(bars['start']) == [0, 60]
+    assert tuple(bars[1]) == (60, 11, 11, 11, 11, 4)
+
+
+def test_bars_keep_the_last_max_bars():
+    buffer = TickerBuffer(bar_seconds=60, max_bars=2)
+    for minute in range(5):
+        buffer.push(minute * 60, minute, 1)
+
+    assert list(buffer.bars(include_current=False)['start']) == [120, 180]
+    assert buffer.n_bars == 4
+
+
+def test_full_queue_drops_and_counts_messages():
+    feed = TickerFeed('ETH-USD', queue_size=2)
+    for price in range(5):
+        feed.on_message(message(100 + price, 1))
+
+    assert feed.stats == {'received': 5, 'parsed': 0, 'dropped': 3, 'errors': 0, 'backlog': 2, 'max_backlog': 2}
+
+    feed.on_open()
+    feed.on_close()
+    assert (feed.stats['parsed'], feed.stats['backlog']) == (2, 0)
+    assert list(feed.buffers['ETH-USD'].latest()['price']) == [100, 101]
+    assert feed.buffers['ETH-USD'].latest()['timestamp'][0] == TickerFeed.parse_time('2021-01-01T00:00:30.000000Z')
+
+
+def test_parser_skips_other_messages_and_counts_errors():
+    feed = TickerFeed('ETH-USD')
+    feed.on_open()
+    feed.on_message({'type': 'subscriptions'})
+    feed.on_message(message(200, 1, product='BTC-USD'))
+    feed.on_message(message('bad', 1))
+    feed.on_message(message(201, 1))
+    feed.on_close()
+
+    stats = feed.stats
+    assert (stats['received'], stats['parsed'], stats['errors'], stats['dropped']) == (4, 1, 2, 0)
@@ -0,0 +1,283 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import tmp
+from paginate import KeysetPaginator
+from cache import SQLiteResponseCache
+from memoize import memo
+from records import TICK, Table, decode
+from tmp import EtherumUSDCAnalysis, EtherumUSDCPool, TickSnapshot, UniV3Data
+
+POOL = {
+    'tick': '1000',
+    'token0': {'symbol': 'USDC', 'id': '0xa', 'decimals': '6'},
+    'token1': {'symbol': 'WETH', 'id': '0xb', 'decimals': '18'},
+    'feeTier': '3000',
+    'sqrtPrice': '0',
+    'liquidity': '1',
+    }
+
+
+class FakePool(EtherumUSDCAnalysis):
+    """Answers from canned responses and records the variables of every query"""
+
+    pool_address = '0xpool'
+    cache_path = None
+
+    def __init__(self, ticks=()):
+        self.ticks = list(ticks)
+        self.variables = []
+
+    def query(self, query, variables=None, operation_name=None):
+        self.variables.append(variables)
+        if operation_name == 'pool':
+            return {'data': {'pool': POOL}}
+        return {'data': {'ticks': self.ticks}}
+
+
+def test_head_query_not_pinned(tmp_path):
+    cache = SQLiteResponseCache(str(tmp_path / 'cache.sqlite'))
+    pool = FakePool()
+
+    pool.fetchTicksSurroundingPrice()
+    pool.fetchInitializedTicks()
+    pool.fetchTicksSurroundingPrice(block=5)
+    pool.fetchInitializedTicks(block=5)
+
+    head, pinned = pool.variables[:2], pool.variables[2:]
+    assert all('block' not in variables for variables in head)
+    assert not any(cache.is_pinned(FakePool._ticks_query, variables) for variables in head)
+    assert all(variables['block'] == {'number': 5} for variables in pinned)
+    assert all(cache.is_pinned(FakePool._ticks_query, variables) for variables in pinned)
+
+
+def test_surrounding_ticks_centered_on_current_tick():
+    # spacing 60, the active tick is 960, the window 960 -+ 2 * 60
+    rows = [
+        {'tickIdx': str(tick), 'liquidityGross': '1', 'liquidityNet': '1', 'price0': '1', 'price1': '1'}
+        for tick in range(-6000, 6060, 60)]
+    pool = FakePool()
+    pool.num_surrounding_ticks = 2
+    snapshot = TickSnapshot(5, POOL, decode(rows, TICK))
+    memo(pool).get('tick_snapshot', lambda: snapshot)
+
+    ticks = pool.surrounding_ticks
+
+    np.testing.assert_array_equal(ticks['tickIdx'], [840, 900, 960, 1020, 1080])
+
+
+class Recorder:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, name, data, title=None):
+        self.submitted.append(name)
+
+
+def test_plot_returns_output_in_both_modes(monkeypatch):
+    import matplotlib.pyplot as plt
+    monkeypatch.setattr(plt, 'show', lambda: None)
+    rows = [{'tickIdx': '0', 'liquidityGross': '1', 'liquidityNet': '1', 'price0': '1', 'price1': '1'}]
+    pool = FakePool()
+    memo(pool).get('tick_snapshot', lambda: TickSnapshot(5, POOL, decode(rows, TICK)))
+
+    shown = pool.analyze_net_liquidity()
+    pool.renderer = Recorder()
+    rendered = pool.analyze_net_liquidity()
+
+    assert shown.equals(rendered)
+    assert pool.renderer.submitted == ['0xpool_analyze_net_liquidity']
+
+
+class FakePools(EtherumUSDCPool):
+
+    cache_path = None
+    rows = [
+        {'id': '0x1', 'token0': {'symbol': 'DAI'}, 'token1': {'symbol': 'WETH'}, 'volumeUSD': '10.5'},
+        {'id': '0x2', 'token0': {'symbol': 'USDC'}, 'token1': {'symbol': 'WETH'}, 'volumeUSD': '99.5'},
+        ]
+
+    days = [{'id': str(date), 'date': date, 'volumeUSD': '1', 'tvlUSD': '2', 'txCount': '3'} for date in (1, 2)]
+
+    def __init__(self):
+        self.queries = []
+
+    def query(self, query, variables=None, operation_name=None):
+        self.queries.append(query.split('(')[0].split()[-1])
+        if 'uniswapDayDatas' in query:
+            return {'data': {'uniswapDayDatas': [day for day in self.days if day['date'] > variables['cursor']]}}
+        if 'poolDayDatas' in query:
+            rows = [
+                {'id': f"{pool['id']}-{variables['date']}", 'date': variables['date'], 'pool': pool,
+                 'tvlUSD': '1', 'volumeUSD': pool['volumeUSD'], 'txCount': '1'}
+                for pool in self.rows]
+            return {'data': {'poolDayDatas': [row for row in rows if row['id'] > variables['cursor']]}}
+        return {'data': {'pools': [row for row in self.rows if row['id'] > variables['cursor']]}}
+
+
+def test_pools_keep_rows_and_tables_are_typed():
+    data = FakePools()
+
+    assert data.all_pools == sorted(FakePools.rows, key=lambda row: float(row['volumeUSD']), reverse=True)
+    assert data.pools == [FakePools.rows[1]]
+    assert isinstance(data.pool_table, Table)
+    assert data.pool_table['volumeUSD'].tolist() == [99.5]
+    assert data.all_pool_table['token0.symbol'].tolist() == ['USDC', 'DAI']
+    assert data.pool_address == '0x2'
+    assert data.volume_pie_chart_data()['labels'] == ['USDC-WETH']
+
+
+def test_tables_decode_the_memoized_rows():
+    data = FakePools()
+
+    data.pools
+    data.pool_address
+    data.volume_pie_chart_data()
+    data.all_pool_table
+    assert data.queries == ['allPools']
+
+    data.daily_uniswap_data
+    data.cumulative_trade_volume()
+    data.daily_pool_data
+    assert len(data.daily_volume_by_pair()) == 4
+    assert data.queries == ['allPools', 'uniswapDayDatas', 'allDailyPoolData', 'allDailyPoolData']
+
+
+def pool_state(pool_id, liquidity):
+    token = {'id': '0xt', 'symbol': 'T', 'name': 'T', 'decimals': '18', 'derivedETH': '1'}
+    return {
+        'id': pool_id, 'feeTier': '3000', 'liquidity': str(liquidity), 'sqrtPrice': '1', 'tick': '0',
+        'token0': token, 'token1': token, 'token0Price': '1', 'token1Price': '1', 'volumeUSD': '1',
+        'txCount': '1', 'totalValueLockedToken0': '1', 'totalValueLockedToken1': '1',
+        'totalValueLockedUSD': str(liquidity),
+        }
+
+
+class FakeSnapshots(UniV3Data):
+    """Pool states by id at a head block, records the ids and block of every pools query"""
+
+    cache_path = None
+
+    def __init__(self, states, head=777):
+        self.states = states
+        self.head = head
+        self.requests = []
+        self.meta_queries = 0
+
+    def query(self, query, variables=None, operation_name=None):
+        if '_meta' in query:
+            self.meta_queries += 1
+            return {'data': {'_meta': {'block': {'number': self.head}}}}
+        self.requests.append((tuple(variables['ids']), variables['block']))
+        return {'data': {'pools': [self.states[pool_id] for pool_id in variables['ids'] if pool_id in self.states]}}
+
+
+def test_liquidity_chunks_are_pinned_to_one_block():
+    ids = [f'0x{i}' for i in range(7)]
+    data = FakeSnapshots({pool_id: pool_state(pool_id, 100 + i) for i, pool_id in enumerate(ids)})
+
+    snapshot = data.get_liquidity(ids, chunk_size=3)
+
+    assert sorted(data.requests) == [(tuple(ids[0:3]), 777), (tuple(ids[3:6]), 777), (tuple(ids[6:]), 777)]
+    assert data.meta_queries == 1
+    assert sorted(snapshot.index) == ids
+    assert snapshot.attrs['block'] == 777
+    assert snapshot.loc['0x6', 'liquidity'] == 106
+
+
+def test_liquidity_returns_only_changed_pools():
+    ids = ['0x1', '0x2', '0x3']
+    data = FakeSnapshots({pool_id: pool_state(pool_id, 100) for pool_id in ids[:2]})
+    previous = data.get_liquidity(ids, block=10)
+
+    data.states['0x2'] = pool_state('0x2', 200)
+    data.states['0x3'] = pool_state('0x3', 100)
+    changed = data.get_liquidity(ids, block=11, previous=previous)
+
+    assert sorted(changed.index) == ['0x2', '0x3']
+    assert changed.loc['0x2', 'liquidity'] == 200
+    assert UniV3Data.changed_pools(previous, previous).empty
+    assert {block for _, block in data.requests} == {10, 11}
+
+
+class FakeDays(UniV3Data):
+    """poolDayDatas of a few dates, every row of a date shares its timestamp and
+    only id breaks the tie, `first` rows per query"""
+
+    cache_path = None
+    first = 3
+
+    def __init__(self, rows):
+        self.rows = sorted(rows, key=lambda row: row['id'])
+        self.cursors = []
+
+    def query(self, query, variables=None, operation_name=None):
+        self.cursors.append((variables['date'], variables['cursor']))
+        match = [row for row in self.rows if row['date'] == variables['date'] and row['id'] > variables['cursor']]
+        return {'data': {'poolDayDatas': match[:self.first]}}
+
+
+def test_daily_pool_data_pages_duplicate_dates_by_id(monkeypatch):
+    monkeypatch.setattr(KeysetPaginator, 'page_size', FakeDays.first)
+    # 7 rows at date 86400 straddle two page boundaries, volume order differs from id order
+    rows = [
+        {'id': f'0x{pool}-{date}', 'date': date, 'volumeUSD': str((pool * 7) % 10), 'tvlUSD': '1', 'txCount': '1'}
+        for date, pools in ((0, 2), (86400, 7), (172800, 3)) for pool in range(pools)]
+    data = FakeDays(rows)
+
+    streamed = list(data.iter_daily_pool_data([0, 86400, 172800]))
+
+    assert sorted(row['id'] for row in streamed) == sorted(row['id'] for row in rows)
+    assert [row['date'] for row in streamed] == [0] * 2 + [86400] * 7 + [172800] * 3
+    volumes = [float(row['volumeUSD']) for row in streamed[2:9]]
+    assert volumes == sorted(volumes, reverse=True)
+    assert [cursor for date, cursor in data.cursors if date == 86400] == ['', '0x2-86400', '0x5-86400']
+
+
+def test_transport_and_cache_created_once_across_threads(monkeypatch, tmp_path):
+    created = []
+
+    def slow(kind):
+        def create(*args, **kwargs):
+            time.sleep(0.05)
+            created.append(kind)
+            return kind
+        return create
+
+    monkeypatch.setattr(tmp, 'SubgraphTransport', slow('transport'))
+    monkeypatch.setattr(tmp, 'SQLiteResponseCache', slow('cache'))
+    client = tmp.UniV3SubgraphClient()
+    client.cache_path = str(tmp_path / 'cache.sqlite')
+    start = threading.Barrier(8)
+
+    def read(_):
+        start.wait()
+        return client.transport, client.cache
+
+    with ThreadPoolExecutor(8) as executor:
+        results = set(executor.map(read, range(8)))
+
+    assert results == {('transport', 'cache')}
+    assert sorted(created) == ['cache', 'transport']
+
+
+def test_cached_rerun_reads_the_head_from_cache(stub_server, tmp_path):
+    head = {'data': {'_meta': {'block': {'number': 777}}}}
+    stub_server.responses = [(200, head, {}), (200, {'data': {'pools': [pool_state('0x1', 100)]}}, {})]
+
+    def run():
+        data = UniV3Data()
+        data._url = stub_server.url
+        data.cache_path = str(tmp_path / 'cache.sqlite')
+        snapshot = data.get_liquidity(['0x1'])
+        data.transport.close()
+        return snapshot
+
+    first = run()
+    assert len(stub_server.requests) == 2
+    rerun = run()
+
+    assert len(stub_server.requests) == 2
+    assert rerun.attrs['block'] == first.attrs['block'] == 777
+    assert rerun.equals(first)
@@ -0,0 +1,110 @@
+import asyncio
+import gc
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import warnings
+import pytest
+import requests
+import transport as transport_module
+from transport import SubgraphTransport
+
+
+def test_post_retries_5xx(stub_server):
+    stub_server.responses = [(503, {}, {}), (502, {}, {}), (200, {'data': {'ok': 1}}, {})]
+    transport = SubgraphTransport(stub_server.url, backoff_factor=0)
+
+    assert transport.post({'query': '{ ok }'}) == {'data': {'ok': 1}}
+    assert len(stub_server.requests) == 3
+    transport.close()
+
+
+def test_post_gives_up_after_retries(stub_server):
+    stub_server.responses = [(503, {}, {})]
+    transport = SubgraphTransport(stub_server.url, retries=2, backoff_factor=0)
+
+    with pytest.raises(requests.HTTPError):
+        transport.post({'query': '{ ok }'})
+    assert len(stub_server.requests) == 3
+    transport.close()
+
+
+def test_query_errors_are_returned(stub_server):
+    errors = {'errors': [{'message': 'Type `Query` has no field `nope`'}]}
+    stub_server.responses = [(200, errors, {})]
+    transport = SubgraphTransport(stub_server.url)
+
+    assert transport.post({'query': '{ nope }'}) == errors
+    assert asyncio.run(transport.apost({'query': '{ nope }'})) == errors
+
+
+def test_apost_retries_with_retry_after(stub_server):
+    stub_server.responses = [(429, {}, {'Retry-After': '0'}), (500, {}, {}), (200, {'data': {'ok': 1}}, {})]
+    transport = SubgraphTransport(stub_server.url, backoff_factor=0)
+
+    assert asyncio.run(transport.apost({'query': '{ ok }'})) == {'data': {'ok': 1}}
+    assert len(stub_server.requests) == 3
+
+
+def test_backoff():
+    transport = SubgraphTransport('http://stub', backoff_factor=0.5)
+
+    assert [transport.backoff(attempt) for attempt in range(3)] == [0.5, 1.0, 2.0]
+    assert transport.backoff(0, '3') == 3.0
+    assert transport.backoff(1, 'Wed, 21 Oct 2015 07:28:00 GMT') == 1.0
+
+
+def test_concurrency_cap(stub_server):
+    stub_server.delay = 0.05
+    transport = SubgraphTransport(stub_server.url, max_workers=2)
+
+    async def run():
+        await asyncio.gather(*[transport.apost({'query': '{ ok }'}) for _ in range(10)])
+        await transport.aclose()
+
+    asyncio.run(run())
+    assert len(stub_server.requests) == 10
+    assert stub_server.max_in_flight == 2
+
+
+def test_session_closed_with_its_loop(stub_server):
+    transport = SubgraphTransport(stub_server.url)
+
+    async def post():
+        await transport.apost({'query': '{ ok }'})
+        return transport._asession
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        first = asyncio.run(post())
+        second = asyncio.run(post())
+        gc.collect()
+
+    assert first is not second
+    assert first.closed and second.closed
+    assert not [warning for warning in caught if 'Unclosed' in str(warning.message)]
+
+
+def test_one_session_for_concurrent_first_use(monkeypatch):
+    created = []
+
+    class SlowSession(requests.Session):
+        def __init__(self):
+            created.append(self)
+            time.sleep(0.05)
+            super().__init__()
+
+    monkeypatch.setattr(transport_module.requests, 'Session', SlowSession)
+    transport = SubgraphTransport('http://localhost')
+    start = threading.Barrier(8)
+
+    def session():
+        start.wait()
+        return transport.session
+
+    with ThreadPoolExecutor(8) as executor:
+        sessions = list(executor.map(lambda _: session(), range(8)))
+
+    assert len(created) == 1
+    assert all(session is created[0] for session in sessions)
+    transport.close()
@@ -0,0 +1,106 @@
+"""Active liquidity around a pool's current tick, ported from liquidity.js."""
+import numpy as np
+from records import TICK, as_table
+from tick_math import MIN_TICK, MAX_TICK, FEE_TIER_TO_TICK_SPACING, snap_ticks, tick_to_price
+
+DEFAULT_SURROUNDING_TICKS = 300
+_TICK_LIQUIDITY = {field: TICK[field] for field in ('tickIdx', 'liquidityGross', 'liquidityNet')}
+
+
+def active_tick_idx(pool_tick, fee_tier):
+    """Nearest initializable tick at or below the pool's current tick"""
+    return int(snap_ticks(int(pool_tick), fee_tier))
+
+
+def _lookup(tick_idx, initialized_ticks, field):
+    """Values of `field` of the initialized ticks at tick_idx, 0 where uninitialized"""
+    values = np.zeros(len(tick_idx), dtype=object)
+    if not initialized_ticks.n_rows:
+        return values
+    order = np.argsort(initialized_ticks['tickIdx'])
+    known = initialized_ticks['tickIdx'][order]
+    column = initialized_ticks[field][order]
+    position = np.minimum(np.searchsorted(known, tick_idx), len(known) - 1)
+    found = known[position] == tick_idx
+    values[found] = column[position[found]]
+    return values
+
+
+def compute_surrounding_ticks(pool, initialized_ticks, num_surrounding_ticks=DEFAULT_SURROUNDING_TICKS):
+    """Ticks within num_surrounding_ticks tick spacings of the active tick.
+
+    `pool` is the result of fetchTicksSurroundingPrice and `initialized_ticks` the
+    result of fetchInitializedTicks, raw or decoded with records.TICK. Returns
+    columns ordered by tickIdx: liquidity columns are object arrays of exact ints,
+    price0/price1 are the same 4 decimal strings liquidity.js produces.
+    """
+    tick_spacing = FEE_TIER_TO_TICK_SPACING[str(pool['feeTier'])]
+    active = active_tick_idx(pool['tick'], pool['feeTier'])
+    tick_idx = active + np.arange(-num_surrounding_ticks, num_surrounding_ticks + 1, dtype=np.int64) * tick_spacing
+    center = num_surrounding_ticks
+
+    initialized_ticks = as_table(initialized_ticks, _TICK_LIQUIDITY)
+    liquidity_net = _lookup(tick_idx, initialized_ticks, 'liquidityNet')
+    liquidity_gross = _lookup(tick_idx, initialized_ticks, 'liquidityGross')
+
+    # ascending, a tick's net liquidity applies from that tick on;
+    # descending, the net liquidity of the tick above is removed
+    liquidity = int(pool['liquidity'])
+    liquidity_active = np.empty(len(tick_idx), dtype=object)
+    liquidity_active[center] = liquidity
+    liquidity_active[center + 1:] = liquidity + np.cumsum(liquidity_net[center + 1:])
+    liquidity_active[:center] = (liquidity - np.cumsum(liquidity_net[center:0:-1]))[::-1]
+
+    in_range = (tick_idx >= MIN_TICK) & (tick_idx <= MAX_TICK)
+    in_range[center] = True
+    tick_idx = tick_idx[in_range]
+    liquidity_net = liquidity_net[in_range]
+    liquidity_gross = liquidity_gross[in_range]
+    liquidity_active = liquidity_active[in_range]
+
+    decimals0, decimals1 = int(pool['token0']['decimals']), int(pool['token1']['decimals'])
+    price_idx = np.clip(tick_idx, MIN_TICK, MAX_TICK)
+    price0, price1 = np.frompyfunc(lambda tick: tick_to_price(tick, decimals0, decimals1), 1, 2)(price_idx)
+
+    return {
+        'tickIdx': tick_idx,
+        'liquidityNet': liquidity_net,
+        'liquidityGross': liquidity_gross,
+        'liquidityActive': liquidity_active,
+        'price0': price0,
+        'price1': price1,
+        'activeTickIdx': active,
+        }
+
+
+def formatted_liquidity(pool, initialized_ticks, num_surrounding_ticks=DEFAULT_SURROUNDING_TICKS):
+    """Same columns and values as the JSON printed by `node liquidity.js <pool>`.
+
+    liquidity.js never pushes its last group, so the highest tick is left out here too.
+    """
+    ticks = compute_surrounding_ticks(pool, initialized_ticks, num_surrounding_ticks)
+    liquidity = ticks['liquidityActive'].astype(np.float64)[:-1]
+    is_current = ticks['tickIdx'][:-1] == ticks['activeTickIdx']
+    return {
+        'index': np.arange(len(liquidity)),
+        'isCurrent': np.where(is_current, liquidity, 0.0),
+        'activeLiquidity': np.where(is_current, 0.0, liquidity),
+        'price0': ticks['price0'][:-1].astype(np.float64),
+        'price1': ticks['price1'][:-1].astype(np.float64),
+        }
+
+
+def iter_cumulative_liquidity(pages):
+    """Running sum of liquidityNet over tick pages in tickIdx order, e.g. a TickStream.
+
+    Yields each page with a `liquidityCumulative` column, the liquidity active just
+    above each tick, carrying the sum over from the previous page.
+    """
+    carry = 0
+    for page in pages:
+        page = as_table(page, _TICK_LIQUIDITY)
+        cumulative = carry + np.cumsum(page['liquidityNet'])
+        if len(cumulative):
+            carry = cumulative[-1]
+        page['liquidityCumulative'] = cumulative
+        yield page
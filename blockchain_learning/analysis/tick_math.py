@@ -0,0 +1,144 @@
+"""Integer TickMath, ported from the Uniswap v3 TickMath library and v3-sdk."""
+import numpy as np
+
+MIN_TICK = -887272
+MAX_TICK = -MIN_TICK
+MIN_SQRT_RATIO = 4295128739
+MAX_SQRT_RATIO = 1461446703485210103287273052203988822378723970342
+
+Q32 = 2 ** 32
+Q96 = 2 ** 96
+Q192 = 2 ** 192
+MAX_UINT256 = 2 ** 256 - 1
+
+FEE_TIER_TO_TICK_SPACING = {
+    '10000': 200,
+    '3000': 60,
+    '500': 10
+    }
+
+_TICK_MULTIPLIERS = (
+    (0x2, 0xfff97272373d413259a46990580e213a),
+    (0x4, 0xfff2e50f5f656932ef12357cf3c7fdcc),
+    (0x8, 0xffe5caca7e10e4e61c3624eaa0941cd0),
+    (0x10, 0xffcb9843d60f6159c9db58835c926644),
+    (0x20, 0xff973b41fa98c081472e6896dfb254c0),
+    (0x40, 0xff2ea16466c96a3843ec78b326b52861),
+    (0x80, 0xfe5dee046a99a2a811c461f1969c3053),
+    (0x100, 0xfcbe86c7900a88aedcffc83b479aa3a4),
+    (0x200, 0xf987a7253ac413176f2b074cf7815e54),
+    (0x400, 0xf3392b0822b70005940c7a398e4b70f3),
+    (0x800, 0xe7159475a2c29b7443b29c7fa6e889d9),
+    (0x1000, 0xd097f3bdfd2022b8845ad8f792aa5825),
+    (0x2000, 0xa9f746462d870fdf8a65dc1f90e061e5),
+    (0x4000, 0x70d869a156d2a1b890bb3df62baf32f7),
+    (0x8000, 0x31be135f97d08fd981231505542fcfa6),
+    (0x10000, 0x9aa508b5b7a84e1c677de54f3e99bc9),
+    (0x20000, 0x5d6af8dedb81196699c329225ee604),
+    (0x40000, 0x2216e584f5fa1ea926041bedfe98),
+    (0x80000, 0x48a170391f7dc42444e8fa2),
+    )
+
+
+def get_sqrt_ratio_at_tick(tick):
+    """sqrt(1.0001 ** tick) as a Q64.96, rounded up like TickMath.getSqrtRatioAtTick"""
+    tick = int(tick)
+    if tick < MIN_TICK or tick > MAX_TICK:
+        raise ValueError(f'tick {tick} out of range')
+    abs_tick = abs(tick)
+    ratio = 0xfffcb933bd6fad37aa2d162d1a594001 if abs_tick & 0x1 else 0x100000000000000000000000000000000
+    for bit, multiplier in _TICK_MULTIPLIERS:
+        if abs_tick & bit:
+            ratio = (ratio * multiplier) >> 128
+    if tick > 0:
+        ratio = MAX_UINT256 // ratio
+    return ratio // Q32 + (1 if ratio % Q32 else 0)
+
+
+def get_tick_at_sqrt_ratio(sqrt_ratio):
+    """Greatest tick whose sqrt ratio is at most sqrt_ratio, like TickMath.getTickAtSqrtRatio"""
+    sqrt_ratio = int(sqrt_ratio)
+    if sqrt_ratio < MIN_SQRT_RATIO or sqrt_ratio >= MAX_SQRT_RATIO:
+        raise ValueError(f'sqrt ratio {sqrt_ratio} out of range')
+    ratio = sqrt_ratio << 32
+    msb = ratio.bit_length() - 1
+    r = ratio >> (msb - 127) if msb >= 128 else ratio << (127 - msb)
+    # log2(ratio) as a signed 64.64 fixed point number
+    log_2 = (msb - 128) << 64
+    for shift in range(63, 49, -1):
+        r = (r * r) >> 127
+        f = r >> 128
+        log_2 |= f << shift
+        r >>= f
+    log_sqrt10001 = log_2 * 255738958999603826347141
+    tick_low = (log_sqrt10001 - 3402992956809132418596140100660247210) >> 128
+    tick_high = (log_sqrt10001 + 291339464771989622907027621153398088495) >> 128
+    if tick_low == tick_high:
+        return tick_low
+    return tick_high if get_sqrt_ratio_at_tick(tick_high) <= sqrt_ratio else tick_low
+
+
+def _to_fixed(numerator, denominator, decimal_places):
+    """numerator / denominator rounded half up, as the sdk's Fraction.toFixed"""
+    scale = 10 ** decimal_places
+    quotient, remainder = divmod(numerator * scale, denominator)
+    if 2 * remainder >= denominator:
+        quotient += 1
+    if not decimal_places:
+        return str(quotient)
+    return f'{quotient // scale}.{quotient % scale:0{decimal_places}d}'
+
+
+def tick_to_price(tick, decimals0, decimals1, decimal_places=4):
+    """(price0, price1) of a pool tick as fixed point strings.
+
+    Matches tickToPrice(token0, token1, tick).toFixed(decimal_places) and
+    tickToPrice(token1, token0, tick).toFixed(decimal_places) from the v3-sdk,
+    where token0 sorts before token1.
+    """
+    sqrt_ratio = get_sqrt_ratio_at_tick(tick)
+    ratio = sqrt_ratio * sqrt_ratio
+    scale0, scale1 = 10 ** int(decimals0), 10 ** int(decimals1)
+    price0 = _to_fixed(ratio * scale0, Q192 * scale1, decimal_places)
+    price1 = _to_fixed(Q192 * scale1, ratio * scale0, decimal_places)
+    return price0, price1
+
+
+def snap_ticks(ticks, fee_tier):
+    """Round ticks down to the nearest initializable tick of the fee tier"""
+    tick_spacing = FEE_TIER_TO_TICK_SPACING[str(fee_tier)]
+    return np.floor_divide(ticks, tick_spacing) * tick_spacing
+
+
+def sqrt_ratio_at_ticks(ticks):
+    """Exact getSqrtRatioAtTick over an array of ticks, as an object array of ints"""
+    ticks = np.asarray(ticks, dtype=np.int64)
+    if ticks.size and (ticks.min() < MIN_TICK or ticks.max() > MAX_TICK):
+        raise ValueError('ticks out of range')
+    abs_ticks = np.abs(ticks)
+    ratio = np.full(ticks.shape, 0x100000000000000000000000000000000, dtype=object)
+    ratio[(abs_ticks & 0x1) != 0] = 0xfffcb933bd6fad37aa2d162d1a594001
+    for bit, multiplier in _TICK_MULTIPLIERS:
+        mask = (abs_ticks & bit) != 0
+        ratio[mask] = (ratio[mask] * multiplier) >> 128
+    positive = ticks > 0
+    ratio[positive] = MAX_UINT256 // ratio[positive]
+    return (ratio >> 32) + ((ratio & (Q32 - 1)) != 0)
+
+
+def tick_to_price_array(ticks, decimals0, decimals1, exact=False):
+    """(price0, price1) float arrays for an array of pool ticks.
+
+    price0 is token0 in units of token1 and price1 its inverse. With exact=True the
+    prices are derived from the integer sqrt ratios, otherwise from 1.0001 ** tick.
+    """
+    scale = 10.0 ** (int(decimals0) - int(decimals1))
+    if not exact:
+        price0 = np.power(1.0001, np.asarray(ticks, dtype=np.float64)) * scale
+        return price0, 1 / price0
+    sqrt_ratio = sqrt_ratio_at_ticks(ticks)
+    ratio = sqrt_ratio * sqrt_ratio
+    scale0, scale1 = 10 ** int(decimals0), 10 ** int(decimals1)
+    price0 = (ratio * scale0 / (Q192 * scale1)).astype(np.float64)
+    price1 = ((Q192 * scale1) / (ratio * scale0)).astype(np.float64)
+    return price0, price1
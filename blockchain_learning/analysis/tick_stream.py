@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+from records import TICK, Table, decode
+
+
+class TickStream:
+    """Initialized ticks of a pool as decoded pages, in tickIdx order.
+
+    Pages are yielded as they arrive while the next one is already being fetched
+    (read_ahead). to_table()/to_frame() collect the pages into columns
+    preallocated from count_hint, growing them if the hint was too small.
+    """
+
+    def __init__(self, paginator, count_hint=None, read_ahead=True):
+        self.paginator = paginator
+        self.count_hint = count_hint
+        self.read_ahead = read_ahead
+
+    def __iter__(self):
+        pages = self.paginator.pages_ahead() if self.read_ahead else self.paginator.pages()
+        for page in pages:
+            yield decode(page, TICK)
+
+    def to_table(self):
+        capacity = self.count_hint or self.paginator.page_size
+        columns = {field: np.empty(capacity, dtype=object if dtype in (int, str) else dtype)
+                   for field, dtype in TICK.items()}
+        count = 0
+        for page in self:
+            n = page.n_rows
+            if count + n > capacity:
+                capacity = max(2 * capacity, count + n)
+                for field, column in columns.items():
+                    grown = np.empty(capacity, dtype=column.dtype)
+                    grown[:count] = column[:count]
+                    columns[field] = grown
+            for field, column in columns.items():
+                column[count:count + n] = page[field]
+            count += n
+        return Table((field, column[:count]) for field, column in columns.items())
+
+    def to_frame(self):
+        return pd.DataFrame(self.to_table())
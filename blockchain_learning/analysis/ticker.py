@@ -0,0 +1,170 @@
+import queue
+from datetime import datetime, timezone
+from threading import Lock, Thread
+import numpy as np
+import cbpro
+
+
+class TickerBuffer:
+    """Ring of ticker prints kept in preallocated numpy arrays.
+
+    push() is O(1): it keeps running sums for a VWAP over the last `vwap_window`
+    seconds and builds `bar_seconds` OHLC bars as prints arrive.
+    """
+
+    def __init__(self, capacity=2 ** 16, vwap_window=60, bar_seconds=60, max_bars=1440):
+        self.capacity = capacity
+        self.vwap_window = vwap_window
+        self.bar_seconds = bar_seconds
+        self.timestamp = np.zeros(capacity, dtype=np.float64)
+        self.price = np.zeros(capacity, dtype=np.float64)
+        self.size = np.zeros(capacity, dtype=np.float64)
+        self.head = 0
+        self.count = 0
+        # rolling vwap window, from tail up to head
+        self._tail = 0
+        self._in_window = 0
+        self._notional = 0.0
+        self._volume = 0.0
+        # completed bars
+        self.max_bars = max_bars
+        self._bars = np.zeros(max_bars, dtype=[
+            ('start', np.float64), ('open', np.float64), ('high', np.float64),
+            ('low', np.float64), ('close', np.float64), ('volume', np.float64)])
+        self.n_bars = 0
+        self.bar = None
+        self._lock = Lock()
+
+    def _evict(self):
+        self._notional -= self.price[self._tail] * self.size[self._tail]
+        self._volume -= self.size[self._tail]
+        self._tail = (self._tail + 1) % self.capacity
+        self._in_window -= 1
+
+    def push(self, timestamp, price, size):
+        with self._lock:
+            if self._in_window == self.capacity:
+                # the oldest print is about to be overwritten
+                self._evict()
+            self.timestamp[self.head] = timestamp
+            self.price[self.head] = price
+            self.size[self.head] = size
+            self.head = (self.head + 1) % self.capacity
+            self.count = min(self.count + 1, self.capacity)
+
+            self._notional += price * size
+            self._volume += size
+            self._in_window += 1
+            while self._in_window and self.timestamp[self._tail] < timestamp - self.vwap_window:
+                self._evict()
+
+            self._update_bar(timestamp, price, size)
+
+    def _update_bar(self, timestamp, price, size):
+        start = timestamp - timestamp % self.bar_seconds
+        if self.bar is not None and start > self.bar[0]:
+            self._bars[self.n_bars % self.max_bars] = tuple(self.bar)
+            self.n_bars += 1
+            self.bar = None
+        if self.bar is None:
+            self.bar = [start, price, price, price, price, size]
+            return
+        self.bar[2] = max(self.bar[2], price)
+        self.bar[3] = min(self.bar[3], price)
+        self.bar[4] = price
+        self.bar[5] += size
+
+    @property
+    def vwap(self):
+        if self._volume <= 0:
+            return float('nan')
+        return self._notional / self._volume
+
+    def latest(self, n=None):
+        """Copies of the last n prints, oldest first"""
+        with self._lock:
+            n = self.count if n is None else min(n, self.count)
+            index = (self.head - n + np.arange(n)) % self.capacity
+            return {
+                'timestamp': self.timestamp[index],
+                'price': self.price[index],
+                'size': self.size[index],
+                }
+
+    def bars(self, include_current=True):
+        """Completed OHLC bars, oldest first, as a numpy record array"""
+        with self._lock:
+            n = min(self.n_bars, self.max_bars)
+            index = (self.n_bars - n + np.arange(n)) % self.max_bars
+            bars = self._bars[index]
+            if include_current and self.bar is not None:
+                bars = np.append(bars, np.array([tuple(self.bar)], dtype=self._bars.dtype))
+            return bars
+
+
+class TickerFeed(cbpro.WebsocketClient):
+    """cbpro ticker subscription feeding one TickerBuffer per product.
+
+    The socket thread only queues raw messages, a parser thread turns them into
+    buffer rows. When the queue is full new messages are dropped and counted.
+    """
+
+    def __init__(self, products, url="wss://ws-feed.pro.coinbase.com", queue_size=2 ** 14, **buffer_options):
+        products = [products] if isinstance(products, str) else list(products)
+        super().__init__(url=url, products=products, channels=["ticker"], should_print=False)
+        self.buffers = {product: TickerBuffer(**buffer_options) for product in products}
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.received = 0
+        self.dropped = 0
+        self.parsed = 0
+        self.errors = 0
+        self.max_backlog = 0
+        self._parser = None
+
+    def on_open(self):
+        self._parser = Thread(target=self._parse, daemon=True)
+        self._parser.start()
+
+    def on_message(self, msg):
+        self.received += 1
+        try:
+            self.queue.put_nowait(msg)
+        except queue.Full:
+            self.dropped += 1
+        self.max_backlog = max(self.max_backlog, self.queue.qsize())
+
+    def on_close(self):
+        if self._parser is not None:
+            self.queue.put(None)
+            self._parser.join()
+            self._parser = None
+
+    @staticmethod
+    def parse_time(value):
+        return datetime.strptime(value, '%Y-%m-%dT%H:%M:%S.%fZ').replace(tzinfo=timezone.utc).timestamp()
+
+    def _parse(self):
+        while True:
+            msg = self.queue.get()
+            if msg is None:
+                return
+            if msg.get('type') != 'ticker' or 'last_size' not in msg:
+                continue
+            try:
+                buffer = self.buffers[msg['product_id']]
+                buffer.push(self.parse_time(msg['time']), float(msg['price']), float(msg['last_size']))
+            except (KeyError, ValueError):
+                self.errors += 1
+                continue
+            self.parsed += 1
+
+    @property
+    def stats(self):
+        return {
+            'received': self.received,
+            'parsed': self.parsed,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'backlog': self.queue.qsize(),
+            'max_backlog': self.max_backlog,
+            }
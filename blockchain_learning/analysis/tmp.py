@@ -1,57 +1,194 @@
 import os
-import math
-import json
+import asyncio
 import subprocess
 from datetime import datetime, timedelta, timezone
-from threading import Thread
-import requests
+from collections import deque
+from threading import Lock
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
+from cache import SQLiteResponseCache
+from swap_store import SwapStore
+from records import POOL, POOL_DAY, UNISWAP_DAY, decode
+from tick_liquidity import DEFAULT_SURROUNDING_TICKS, active_tick_idx, formatted_liquidity
+from tick_math import FEE_TIER_TO_TICK_SPACING, MIN_TICK, snap_ticks
+from tick_stream import TickStream
+from transport import SubgraphTransport
+from memoize import memo, memoized_property
+from paginate import KeysetPaginator
+from jobs import in_process, threaded
+
+# guards the lazy transport and cache of every client, they are shared by the thread pools
+_client_lock = Lock()
+
+
+def _block_height(block):
+    """Block_height argument pinning a query to block, None for the latest block"""
+    return None if block is None else {'number': int(block)}
+
+
+class TickSnapshot:
+    """Pool state and initialized ticks of a pool at one block"""
+
+    def __init__(self, block, pool, ticks):
+        self.block = block
+        self.pool = pool
+        # exact liquidity ints, see records.TICK
+        self.ticks = ticks
+        self.frame = pd.DataFrame({
+            'tickIdx': ticks['tickIdx'],
+            'liquidityGross': ticks['liquidityGross'].astype(np.float64),
+            'liquidityNet': ticks['liquidityNet'].astype(np.float64),
+            'price0': ticks['price0'],
+            'price1': ticks['price1'],
+            }).set_index('tickIdx', drop=False)
 
 
 class UniV3SubgraphClient:
 
     FACTORY_ADDRESS = "0x1F98431c8aD98523631AE4a59f267346ea31F984"
     _url = "https://api.thegraph.com/subgraphs/name/ianlapham/uniswap-v3-alt"
+    # number of pooled connections and concurrent in-flight queries
+    max_workers = 8
+    # response cache, set cache_path to None to always go to the network
+    cache_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.subgraph_cache.sqlite')
+    cache_ttl = 600
+    # the head block, queries pinned to it are then cache hits on a re-run
+    cache_meta_ttl = 60
 
-    def query(self, query, variables=None, operation_name=None):
-        """Make graphql query to subgraph"""
+    @property
+    def transport(self):
+        if not hasattr(self, '_transport'):
+            with _client_lock:
+                if not hasattr(self, '_transport'):
+                    self._transport = SubgraphTransport(self._url, max_workers=self.max_workers)
+        return self._transport
+
+    @property
+    def cache(self):
+        if not hasattr(self, '_cache'):
+            with _client_lock:
+                if not hasattr(self, '_cache'):
+                    cache = None
+                    if self.cache_path:
+                        cache = SQLiteResponseCache(
+                            self.cache_path, ttl=self.cache_ttl, url=self._url, meta_ttl=self.cache_meta_ttl)
+                    self._cache = cache
+        return self._cache
+
+    def _params(self, query, variables=None, operation_name=None):
         params = {'query': query}
         if variables:
             params = {'query': query, 'variables': variables}
         if variables and operation_name:
             params = {'query': query, 'operationName': operation_name, 'variables': variables}
-        response = requests.post(self._url, json=params)
-        response.raise_for_status()
-        return response.json()
+        return params
+
+    def query(self, query, variables=None, operation_name=None):
+        """Make graphql query to subgraph"""
+        if self.cache is not None:
+            response = self.cache.get(query, variables, operation_name)
+            if response is not None:
+                return response
+        response = self.transport.post(self._params(query, variables, operation_name))
+        if self.cache is not None:
+            self.cache.set(query, variables, operation_name, response)
+        return response
+
+    async def aquery(self, query, variables=None, operation_name=None):
+        """Make graphql query to subgraph from an event loop"""
+        # sqlite calls block, keep them off the loop
+        loop = asyncio.get_running_loop()
+        if self.cache is not None:
+            response = await loop.run_in_executor(None, self.cache.get, query, variables, operation_name)
+            if response is not None:
+                return response
+        response = await self.transport.apost(self._params(query, variables, operation_name))
+        if self.cache is not None:
+            await loop.run_in_executor(None, self.cache.set, query, variables, operation_name, response)
+        return response
 
 
 class UniV3Data(UniV3SubgraphClient):
+    """Properties are fetched once per instance and kept until refresh() or memo_ttl
+    seconds, the get_* methods always go to the subgraph.
+
+    pools, all_pools, daily_pool_data and daily_uniswap_data are the subgraph rows
+    (lists of dicts), fetched once; the *_table properties decode those rows once into
+    records.Table columns, which is what the analysis methods read.
+    """
 
+    # seconds before a memoized property is fetched again, None keeps it until refresh()
+    memo_ttl = None
+    # number of memoized values kept per instance, None keeps one per memoized property
+    memo_size = None
+    # incrementally synced swaps, see get_historical_pool_prices
+    swap_store_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.swaps')
+
+    def refresh(self, *names):
+        """Forget memoized properties, all of them when no names are given"""
+        memo(self).invalidate(*names)
 
     @property
+    def swap_store(self):
+        if hasattr(self, '_swap_store'):
+            return self._swap_store
+        self._swap_store = SwapStore(self.swap_store_path)
+        return self._swap_store
+
+    @memoized_property
     def factory(self):
         return self.get_factory()
 
-    @property
+    @memoized_property
     def daily_uniswap_data(self):
         return self.get_daily_uniswap_data()
-    
-    @property
+
+    @memoized_property
+    def daily_uniswap_table(self):
+        return decode(self.daily_uniswap_data, UNISWAP_DAY)
+
+    @memoized_property
     def daily_pool_data(self):
         return self.get_daily_pool_data()
-    
+
+    @memoized_property
+    def daily_pool_table(self):
+        return decode(self.daily_pool_data, POOL_DAY)
+
+    @memoized_property
+    def all_pools(self):
+        return self.get_pools()
+
+    @memoized_property
+    def all_pool_table(self):
+        return decode(self.all_pools, POOL)
+
     @property
     def pools(self):
-        return self.get_pools()
+        return self.all_pools
+
+    @property
+    def pool_table(self):
+        return self.all_pool_table
 
     @property
     def block_number(self):
         return self.get_block_number()
 
     def get_block_number(self):
-        raise NotImplementedError()
+        return self.head_block()
+
+    def head_block(self):
+        """Latest block indexed by the subgraph"""
+        query = """
+        query meta {
+          _meta { block { number } }
+        }
+        """
+        return int(self.query(query)['data']['_meta']['block']['number'])
 
     def get_factory(self):
         """Get factory data."""
@@ -72,9 +209,10 @@ class UniV3Data(UniV3SubgraphClient):
     def get_daily_uniswap_data(self):
         """Get aggregated daily data for uniswap v3."""
         query = """
-        {
+        query uniswapDayDatas($cursor: Int!){
           uniswapDayDatas(
             first: 1000
+            where: { date_gt: $cursor }
             orderBy: date
             orderDirection: asc
           ) {
@@ -87,19 +225,26 @@ class UniV3Data(UniV3SubgraphClient):
         }
         """
 
-        return self.query(query)['data']['uniswapDayDatas']
+        return list(KeysetPaginator(self, query, 'uniswapDayDatas', key='date', start=0))
 
     def get_daily_pool_data(self):
         """Get daily data for pools."""
+        return list(self.iter_daily_pool_data())
+
+    def iter_daily_pool_data(self, dates=None):
+        """Stream daily pool data, date by date, highest volume first within a date.
+
+        Each date is paged by id on one of max_workers threads, at most
+        2 * max_workers dates ahead of the consumer.
+        """
 
         query = """
-        query allDailyPoolData($date: Int!, $skip: Int!){
+        query allDailyPoolData($date: Int!, $cursor: String!){
           poolDayDatas(
             first: 1000
-            skip: $skip
-            where: { date: $date }
-            orderBy: volumeUSD
-            orderDirection: desc
+            where: { date: $date, id_gt: $cursor }
+            orderBy: id
+            orderDirection: asc
           ){
             id
             date
@@ -115,25 +260,39 @@ class UniV3Data(UniV3SubgraphClient):
         }
         """
 
-        n_skips = int(self.factory['poolCount']) // 1000 + 1
-        # Loop through days
-        daily_pool_data = []
-        for day in self.daily_uniswap_data:
-            for i in range(n_skips):
-                print(day['date'])
-                variables = {"date": day['date'], "skip": i * 1000}
-                daily_pool_data.extend((self.query(query, variables))['data']['poolDayDatas'])
-        return daily_pool_data
+        if dates is None:
+            dates = self.daily_uniswap_table['date']
+
+        def fetch(date):
+            rows = list(KeysetPaginator(self, query, 'poolDayDatas', {"date": date}))
+            return sorted(rows, key=lambda row: float(row['volumeUSD']), reverse=True)
+
+        window = 2 * self.max_workers
+        dates = iter([int(date) for date in dates])
+        pending = deque()
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            for date in islice(dates, window):
+                pending.append(executor.submit(fetch, date))
+            while pending:
+                future = pending.popleft()
+                for date in islice(dates, 1):
+                    pending.append(executor.submit(fetch, date))
+                yield from future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
 
     def get_pools(self):
         """Get latest factory data."""
         query = """
-        query allPools($skip: Int!) {
+        query allPools($cursor: String!) {
           pools(
             first: 1000
-            skip: $skip
-            orderBy: volumeUSD
-            orderDirection: desc
+            where: { id_gt: $cursor }
+            orderBy: id
+            orderDirection: asc
           ){
             id
             token0{
@@ -147,24 +306,42 @@ class UniV3Data(UniV3SubgraphClient):
         }
         """
 
-        n_skips = int(self.factory['poolCount']) // 1000 + 1
+        pools = list(KeysetPaginator(self, query, 'pools'))
+        return sorted(pools, key=lambda pool: float(pool['volumeUSD']), reverse=True)
+
+    # numeric columns of a pool snapshot, exact ints are kept as python ints
+    _snapshot_types = {
+        'feeTier': int,
+        'liquidity': int,
+        'sqrtPrice': int,
+        'tick': int,
+        'txCount': int,
+        'token0_decimals': int,
+        'token1_decimals': int,
+        'token0_derivedETH': float,
+        'token1_derivedETH': float,
+        'token0Price': float,
+        'token1Price': float,
+        'volumeUSD': float,
+        'totalValueLockedToken0': float,
+        'totalValueLockedToken1': float,
+        'totalValueLockedUSD': float,
+        }
 
-        pools = []
-        for i in range(n_skips):
-            variables = {'skip': i * 1000}
-            pools.extend(self.query(query, variables)['data']['pools'])
-        return pools
+    def get_liquidity(self, pool_ids=None, block=None, chunk_size=500, previous=None):
+        """Snapshot of pool state at a block, one row per pool indexed by pool id.
 
-    def get_liquidity(self):
-        """Get factory data."""
-        variables = {}
+        The pool ids (default every pool) are fetched chunk_size at a time on
+        max_workers threads, all pinned to the same block (default the latest
+        indexed one). With `previous`, an earlier snapshot, only the pools whose
+        state differs from it are returned.
+        """
         query = """
-        query pools {
+        query pools($ids: [String!]!, $block: Int!) {
             pools(
-                where: {id_in: ["_all_pools"]}
-                block: {number: _block_number}
-                orderBy: totalValueLockedUSD
-                orderDirection: desc
+                first: 1000
+                where: {id_in: $ids}
+                block: {number: $block}
             ) {
                 id
                 feeTier
@@ -177,7 +354,6 @@ class UniV3Data(UniV3SubgraphClient):
                     name
                     decimals
                     derivedETH
-                    __typename
                     }
                 token1 {
                     id
@@ -185,7 +361,6 @@ class UniV3Data(UniV3SubgraphClient):
                     name
                     decimals
                     derivedETH
-                    __typename
                     }
                 token0Price
                 token1Price
@@ -194,16 +369,52 @@ class UniV3Data(UniV3SubgraphClient):
                 totalValueLockedToken0
                 totalValueLockedToken1
                 totalValueLockedUSD
-                __typename
             }
         }"""
-        query = query.replace('_all_pools','","'.join([pool['id'] for pool in self.pools]))
-        query = query.replace('_block_number', str(self.block_number))
-        return self.query(query, variables)['data']['pools']
+        if pool_ids is None:
+            pool_ids = list(self.pool_table['id'])
+        if block is None:
+            block = self.block_number
+        chunk_size = min(chunk_size, 1000)
+        chunks = [pool_ids[i:i + chunk_size] for i in range(0, len(pool_ids), chunk_size)]
+
+        def fetch(ids):
+            return self.query(query, {'ids': ids, 'block': block})['data']['pools']
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            rows = [row for chunk in executor.map(fetch, chunks) for row in chunk]
+
+        snapshot = pd.json_normalize(rows, sep='_')
+        if snapshot.empty:
+            return snapshot
+        for column, cast in self._snapshot_types.items():
+            if cast is int:
+                snapshot[column] = [None if value is None else int(value) for value in snapshot[column]]
+            else:
+                snapshot[column] = snapshot[column].astype(np.float64)
+        snapshot = snapshot.set_index('id').sort_values('totalValueLockedUSD', ascending=False)
+        snapshot.attrs['block'] = block
+        if previous is None:
+            return snapshot
+        return self.changed_pools(snapshot, previous)
+
+    @staticmethod
+    def changed_pools(snapshot, previous):
+        """Rows of snapshot that are new or differ from previous"""
+        columns = [column for column in snapshot.columns if column in previous.columns]
+        before = previous.reindex(snapshot.index)[columns]
+        same = (snapshot[columns] == before) | (snapshot[columns].isna() & before.isna())
+        return snapshot[~same.all(axis=1)]
 
     def get_historical_pool_prices(self, pool_address, time_delta):
+        """Swap prices of the last time_delta days as columns of numpy arrays.
+
+        Swaps are synced incrementally into the local swap store, only swaps newer
+        than the last stored one are fetched. timestamp, amount0 and amount1 are
+        memory-mapped views of the store.
+        """
         query = """
-            query poolPrices($id: String!, $timestamp_start: Int!){
+            query poolPrices($id: String!, $cursor: Int!){
                 pool(
                     id: $id
                 ){
@@ -211,7 +422,7 @@ class UniV3Data(UniV3SubgraphClient):
                         first: 1000
                         orderBy: timestamp
                         orderDirection: asc
-                        where: { timestamp_gte: $timestamp_start }
+                        where: { timestamp_gte: $cursor }
                     ){
                         id
                         timestamp
@@ -221,29 +432,23 @@ class UniV3Data(UniV3SubgraphClient):
                 }
             }
         """
-        variables = {
-            'id': pool_address,
-            "timestamp_start": int((datetime.utcnow() - timedelta(time_delta)).replace(
-                tzinfo=timezone.utc).timestamp())
-        }
-        has_data = True
-        all_swaps = []
-        while has_data:
-            swaps = self.query(query, variables)['data']['pool']['swaps']
-
-            all_swaps.extend(swaps)
-            timestamps = set([int(swap['timestamp']) for swap in swaps])
-            variables['timestamp_start'] = max(timestamps)
-
-            if len(swaps) < 1000:
-                has_data = False
-
-        df_swaps = pd.DataFrame(all_swaps, dtype=np.float64)
-        df_swaps.timestamp = df_swaps.timestamp.astype(np.int64)
-        df_swaps.drop_duplicates(inplace=True)
-        df_swaps['priceInToken1'] = abs(df_swaps.amount1 / df_swaps.amount0)
-        data = df_swaps.to_dict('records')
-
+        timestamp_start = int((datetime.utcnow() - timedelta(time_delta)).replace(
+            tzinfo=timezone.utc).timestamp())
+
+        meta = self.swap_store.meta(pool_address)
+        if meta is None or meta['since'] > timestamp_start:
+            self.swap_store.reset(pool_address, timestamp_start)
+            meta = self.swap_store.meta(pool_address)
+
+        swaps = KeysetPaginator(
+            self, query, ('pool', 'swaps'), {'id': pool_address},
+            key='timestamp', start=meta['timestamp'], tiebreak='id', seen=meta['ids'])
+        for page in swaps.pages():
+            self.swap_store.append(pool_address, page)
+
+        data = self.swap_store.read(pool_address, since=timestamp_start)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            data['priceInToken1'] = np.abs(data['amount1'] / data['amount0'])
         return data
 
     def uniswap_data(self):
@@ -258,10 +463,10 @@ class UniV3Data(UniV3SubgraphClient):
 
     def volume_pie_chart_data(self):
         """Data for pie chart of pool volumes"""
-        pools = self.pools
+        pools = self.pool_table
 
-        volume = [float(pool['volumeUSD']) for pool in pools]
-        labels = [f"{pool['token0']['symbol']}-{pool['token1']['symbol']}" for pool in pools]
+        volume = pools['volumeUSD'].tolist()
+        labels = [f"{token0}-{token1}" for token0, token1 in zip(pools['token0.symbol'], pools['token1.symbol'])]
 
         data = {
             "datasets": [{
@@ -274,13 +479,17 @@ class UniV3Data(UniV3SubgraphClient):
 
     def daily_volume_by_pair(self):
         """Daily volume by pair"""
+        pool_days = self.daily_pool_table
+        pool_days = pool_days.take(pool_days['volumeUSD'] != 0)
         data = [
             {
-                'pair': f"{pool_day['pool']['token0']['symbol']}-{pool_day['pool']['token1']['symbol']}",
-                'date': datetime.utcfromtimestamp(pool_day['date']).isoformat(),
-                'volumeUSD': pool_day['volumeUSD']
+                'pair': f"{token0}-{token1}",
+                'date': datetime.utcfromtimestamp(date).isoformat(),
+                'volumeUSD': volume
             }
-            for pool_day in self.daily_pool_data if pool_day['volumeUSD'] != '0'
+            for token0, token1, date, volume in zip(
+                pool_days['pool.token0.symbol'], pool_days['pool.token1.symbol'],
+                pool_days['date'].tolist(), pool_days['volumeUSD'].tolist())
         ]
 
         return data
@@ -288,29 +497,28 @@ class UniV3Data(UniV3SubgraphClient):
     def cumulative_trade_volume(self):
         """Daily cumulative trade volume."""
         # This assumes data is ordered already
-        cumulative = []
-        cumulativeVolumeUSD = 0
-        for uniswap_day in self.daily_uniswap_data:
-            cumulativeVolumeUSD += float(uniswap_day['volumeUSD'])
-            cumulative.append(
-                {
-                    "date": datetime.utcfromtimestamp(uniswap_day['date']).isoformat(),
-                    "cumulativeVolumeUSD": cumulativeVolumeUSD
-                }
-            )
+        uniswap_days = self.daily_uniswap_table
+        cumulative = [
+            {
+                "date": datetime.utcfromtimestamp(date).isoformat(),
+                "cumulativeVolumeUSD": cumulativeVolumeUSD
+            }
+            for date, cumulativeVolumeUSD in zip(
+                uniswap_days['date'].tolist(), np.cumsum(uniswap_days['volumeUSD']).tolist())
+        ]
 
         return cumulative
 
 
 class UniV3DataSinglePool(UniV3Data):
 
-    @property
+    @memoized_property
     def pools(self):
 
         if not hasattr(self, 'token_pair'):
-            return super().pools
+            return self.all_pools
 
-        for pool in self.get_pools():
+        for pool in self.all_pools:
             if pool['token0']['symbol'] not in self.token_pair:
                 continue
             if pool['token1']['symbol'] not in self.token_pair:
@@ -319,6 +527,14 @@ class UniV3DataSinglePool(UniV3Data):
 
         raise ValueError('pool not found')
 
+    @memoized_property
+    def pool_table(self):
+
+        if not hasattr(self, 'token_pair'):
+            return self.all_pool_table
+
+        return decode(self.pools, POOL)
+
 
 class EtherumUSDCPool(UniV3DataSinglePool):
 
@@ -337,32 +553,51 @@ class EtherumUSDCPool(UniV3DataSinglePool):
         self.logger(f'overriding {pool_address} with {self.pool_address}')
         return super().get_historical_pool_prices(self.pool_address, time_delta)
 
-    @property
+    @memoized_property
     def pool_address(self):
-        if hasattr(self, '_pool_address'):
-            return self._pool_address
-        self._pool_address = self.pools[0]['id']
-        return self._pool_address
+        return self.pool_table['id'][0]
 
     @property
     def surrounding_ticks(self):
         return self.get_surrounding_ticks()
 
-    def get_surrounding_ticks(self, skip=0):
-        """Get Surrounding Ticks"""
-        variables = {
-            "poolAddress": self.pool_address,
-            "skip": skip
-            }
-        query = """
+    @memoized_property
+    def tick_snapshot(self):
+        """TickSnapshot at the head block, kept until refresh_ticks() sees a newer block"""
+        return self.get_tick_snapshot()
+
+    def get_tick_snapshot(self, block=None, count_hint=None):
+        block = self.head_block() if block is None else block
+        return TickSnapshot(
+            block,
+            self.fetchTicksSurroundingPrice(block),
+            self.fetchInitializedTicks(count_hint, block),
+            )
+
+    def refresh_ticks(self):
+        """Fetch a new tick snapshot if the subgraph head moved past the current one"""
+        if 'tick_snapshot' not in memo(self):
+            return self.tick_snapshot
+        snapshot = self.tick_snapshot
+        block = self.head_block()
+        if block > snapshot.block:
+            snapshot = self.get_tick_snapshot(block, count_hint=len(snapshot.frame))
+            memo(self).invalidate('tick_snapshot')
+            memo(self).get('tick_snapshot', lambda: snapshot)
+        return snapshot
+
+    _ticks_query = """
         query surroundingTicks(
             $poolAddress: String!,
-            $skip: Int!
+            $cursor: BigInt!,
+            $block: Block_height
             ) {
                 ticks(
                     first: 1000
-                    skip: $skip
-                    where: {poolAddress: $poolAddress}
+                    where: {poolAddress: $poolAddress, tickIdx_gt: $cursor}
+                    orderBy: tickIdx
+                    orderDirection: asc
+                    block: $block
                     ) {
                         tickIdx
                         liquidityGross
@@ -372,24 +607,37 @@ class EtherumUSDCPool(UniV3DataSinglePool):
                     }
                 }
         """
-        return self.query(query, variables, operation_name='surroundingTicks')['data']['ticks']
-
-    def fetchInitializedTicks(self, skip=0, surroundingTicksResult=None):
 
-        if not surroundingTicksResult:
-            surroundingTicksResult = [] 
-        surroundingTicks = self.get_surrounding_ticks(skip)
-        if surroundingTicks:
-            surroundingTicksResult += surroundingTicks
-            return self.fetchInitializedTicks(skip + 1000, surroundingTicksResult)
-
-        return surroundingTicksResult
-    
-    def fetchTicksSurroundingPrice(self):
+    def _variables(self, block=None):
+        """Query variables of the pool, only pinned (and cached for good) when block is given"""
         variables = {"poolAddress": self.pool_address}
+        if block is not None:
+            variables["block"] = _block_height(block)
+        return variables
+
+    def _ticks_paginator(self, block=None):
+        # tickIdx is unique within a pool, start below the lowest possible tick
+        return KeysetPaginator(
+            self, self._ticks_query, 'ticks', self._variables(block),
+            key='tickIdx', start=str(MIN_TICK - 1), operation_name='surroundingTicks')
+
+    def get_surrounding_ticks(self, cursor=None):
+        """Get the page of ticks above tickIdx `cursor`"""
+        paginator = self._ticks_paginator()
+        return paginator.fetch(paginator.start if cursor is None else str(cursor))
+
+    def iter_initialized_ticks(self, count_hint=None, read_ahead=True, block=None):
+        """TickStream of the pool's initialized ticks, at the head or at block"""
+        return TickStream(self._ticks_paginator(block), count_hint=count_hint, read_ahead=read_ahead)
+
+    def fetchInitializedTicks(self, count_hint=None, block=None):
+        return self.iter_initialized_ticks(count_hint, block=block).to_table()
+
+    def fetchTicksSurroundingPrice(self, block=None):
+        variables = self._variables(block)
         query = """
-        query pool($poolAddress: String!) {
-            pool(id: $poolAddress) {
+        query pool($poolAddress: String!, $block: Block_height) {
+            pool(id: $poolAddress, block: $block) {
                 tick
                 token0 {
                     symbol
@@ -416,17 +664,18 @@ class EtherumUSDCAnalysis(EtherumUSDCPool):
         https://github.com/Uniswap/uniswap-v3-sdk/blob/12f3b7033bd70210a4f117b477cdaec027a436f6/src/utils/priceTickConversions.test.ts
     https://github.com/yossigruner/uniswapv3_liquidity/blob/18c3f8378f8b6c08b28bac4f4507e0cc4c93fee5/liqudity.js#L16
     """
-    FEE_TIER_TO_TICK_SPACING = {
-        '10000': 200,
-        '3000': 60,
-        '500': 10
-        }
+    FEE_TIER_TO_TICK_SPACING = FEE_TIER_TO_TICK_SPACING
+    # a render.FigureRenderer writes plots to files instead of blocking on plt.show()
+    renderer = None
+    # tick spacings on each side of the current tick kept by surrounding_ticks
+    num_surrounding_ticks = DEFAULT_SURROUNDING_TICKS
     
     def start_node(self):
         subprocess.check_output('npm install @uniswap/v3-sdk @uniswap/sdk-core'.split(' '))
     
     def activeTickIdx(self, poolCurrentTickIdx, feeTier):
-        return math.floor(poolCurrentTickIdx / self.FEE_TIER_TO_TICK_SPACING[feeTier]) * self.FEE_TIER_TO_TICK_SPACING[feeTier]
+        """Accepts a single tick or an array of ticks"""
+        return snap_ticks(poolCurrentTickIdx, feeTier)
 
     def dataframe(func):
         def wrapper(self, *args, **kwargs):
@@ -436,62 +685,73 @@ class EtherumUSDCAnalysis(EtherumUSDCPool):
     def plot(func):
         def wrapper(self, *args, **kwargs):
             output = func(self, *args, **kwargs)
-            output.plot()
-            plt.show()
-        return wrapper
-
-    def threaded(func):
-        def wrapper(self, *args, **kwargs):
-            thread = Thread(func, args=(self) + args, kwargs=kwargs)
-            thread.start()
+            if self.renderer is not None:
+                self.renderer.submit(f'{self.pool_address}_{func.__name__}', output)
+            else:
+                output.plot()
+                plt.show()
+            return output
         return wrapper
 
     @property
-    @dataframe
     def surrounding_ticks(self):
-        return super().surrounding_ticks
+        """Initialized ticks within num_surrounding_ticks tick spacings of the pool's current tick"""
+        snapshot = self.tick_snapshot
+        pool = snapshot.pool
+        active = active_tick_idx(pool['tick'], pool['feeTier'])
+        width = self.num_surrounding_ticks * FEE_TIER_TO_TICK_SPACING[str(pool['feeTier'])]
+        frame = snapshot.frame
+        return frame[(frame['tickIdx'] >= active - width) & (frame['tickIdx'] <= active + width)]
 
     @property
-    @dataframe
     def initialized_ticks(self):
-        return self.fetchInitializedTicks()
-    
+        return self.tick_snapshot.frame
+
     @plot
     def analyze_net_liquidity(self):
-        ticks = self.initialized_ticks
-        ticks.liquidityNet = ticks.liquidityNet.astype(float)
-        return ticks
+        return self.initialized_ticks[['liquidityNet']]
 
     @plot
     def analyze_gross_liquidity(self):
-        ticks = self.initialized_ticks
-        ticks.liquidityGross = ticks.liquidityGross.astype(float)
-        return ticks
+        return self.initialized_ticks[['liquidityGross']]
 
     @dataframe
     def liquidity(self):
-        # data = self.fetchTicksSurroundingPrice()
-        # tick = self.get_fee_tier(data)
-        # token0_id = data['token0']['id']
-        # token1_id = data['token1']['id']
-        # token0_decimals = data['token0']['decimals']
-        # token1_decimals = data['token1']['decimals']
-        # directory = os.path.join(os.path.dirname(__file__), 'usdc_price.js')
-        directory = os.path.join(os.path.dirname(__file__), 'liquidity.js')
-        # cmd = f'node {directory} {tick} {token0_id} {token1_id} {token0_decimals} {token1_decimals}'
-        cmd = f'node {directory} {self.POOL}'
-        output = subprocess.check_output(cmd.split(' ')).decode('utf-8')
-        return json.loads(output)
+        snapshot = self.tick_snapshot
+        return formatted_liquidity(snapshot.pool, snapshot.ticks)
+
+    @staticmethod
+    @in_process
+    def _formatted_liquidity(pool, ticks):
+        return formatted_liquidity(pool, ticks)
+
+    def liquidity_job(self):
+        """Future of formatted_liquidity for the current snapshot, computed in a worker process"""
+        snapshot = self.tick_snapshot
+        return self._formatted_liquidity(snapshot.pool, snapshot.ticks)
+
+    @threaded
+    def read(self, name, *args, **kwargs):
+        """Future of attribute `name`, called with args if it is a method, read on the I/O pool"""
+        value = getattr(self, name)
+        return value(*args, **kwargs) if callable(value) else value
+
+    def background(self, *calls):
+        """{call: Future} of each call, an attribute name or a (name, args) pair, see read().
+
+        e.g. jobs.gather(self.background('get_pools', ('get_historical_pool_prices', (pool, 7))), timeout=60)
+        """
+        futures = {}
+        for call in calls:
+            name, args = (call, ()) if isinstance(call, str) else call
+            futures[call] = self.read(name, *args)
+        return futures
 
     @plot
     def plot_liquidity(self):
         liq = self.liquidity()
-        liq.activeLiquidity = liq.activeLiquidity.astype(float)
-        liq.price1 = liq.price1.astype(float)
         liq.index = liq.price1
         return liq.activeLiquidity
 
     def get_fee_tier(self, data):
-        poolCurrentTickIdx = int(data['tick'])
-        tickSpacing = self.FEE_TIER_TO_TICK_SPACING[data['feeTier']]
-        return math.floor(poolCurrentTickIdx / tickSpacing) * tickSpacing
+        return int(snap_ticks(int(data['tick']), data['feeTier']))
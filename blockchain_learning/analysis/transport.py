@@ -0,0 +1,115 @@
+import asyncio
+from threading import Lock
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class SubgraphTransport:
+    """Pooled keep-alive transport for graphql queries.
+
+    The sync path reuses one requests.Session, the async path one aiohttp.ClientSession
+    per event loop. Both retry 429/5xx responses with exponential backoff.
+    """
+
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(self, url, max_workers=8, retries=5, backoff_factor=0.5, timeout=60):
+        self.url = url
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+        # the session is shared by the threads of a pool, create it once
+        self._lock = Lock()
+
+    @property
+    def session(self):
+        if hasattr(self, '_session'):
+            return self._session
+        with self._lock:
+            if not hasattr(self, '_session'):
+                self._session = self._new_session()
+        return self._session
+
+    def _new_session(self):
+        retry = Retry(
+            total=self.retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=self.RETRY_STATUSES,
+            allowed_methods=None,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+            )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.max_workers,
+            max_retries=retry,
+            )
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def post(self, params):
+        response = self.session.post(self.url, json=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def backoff(self, attempt, retry_after=None):
+        if retry_after is not None:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return self.backoff_factor * (2 ** attempt)
+
+    async def _session_scope(self, session):
+        """Suspended for the life of the loop, closes session when the loop shuts its
+        async generators down (asyncio.run does) or when aclose() finishes it"""
+        try:
+            yield
+        finally:
+            await session.close()
+
+    async def _async_state(self):
+        """aiohttp sessions and semaphores are bound to the loop that created them"""
+        loop = asyncio.get_running_loop()
+        if getattr(self, '_loop', None) is not loop:
+            # the previous loop's session is closed by its own scope when that loop ends
+            self._loop = loop
+            self._asession = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_workers),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                )
+            self._scope = self._session_scope(self._asession)
+            await self._scope.__anext__()
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+        return self._asession, self._semaphore
+
+    async def apost(self, params):
+        session, semaphore = await self._async_state()
+        async with semaphore:
+            for attempt in range(self.retries + 1):
+                async with session.post(self.url, json=params) as response:
+                    if response.status not in self.RETRY_STATUSES or attempt == self.retries:
+                        response.raise_for_status()
+                        return await response.json()
+                    delay = self.backoff(attempt, response.headers.get('Retry-After'))
+                # sleep with the connection back in the pool
+                await asyncio.sleep(delay)
+
+    async def aclose(self):
+        if getattr(self, '_scope', None) is not None:
+            await self._scope.aclose()
+            self._scope = None
+            self._asession = None
+            self._loop = None
+
+    def close(self):
+        with self._lock:
+            if hasattr(self, '_session'):
+                self._session.close()
+                del self._session
+
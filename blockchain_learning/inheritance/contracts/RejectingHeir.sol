@@ -0,0 +1,11 @@
+// SPDX-License-Identifier: MIT
+pragma solidity 0.8.19;
+
+/** heir that refuses every payment, for the payout tests */
+contract RejectingHeir {
+
+    receive() external payable {
+        revert("rejected");
+    }
+
+}
@@ -1,13 +1,23 @@
-// import solidity
-pragma solidity ^0.4.0;
+// SPDX-License-Identifier: MIT
+// below 0.8.20, which emits PUSH0 that older ganache-cli releases cannot run
+pragma solidity 0.8.19;
 
+/**
+    Heirs are paid after the owner dies by pulling their share with claim(), or in
+    bounded batches with payout(start, count) which anyone can call. Neither loops
+    over every heir, so the gas of each call does not grow with the number of heirs,
+    and an heir that rejects the payment only keeps its own share claimable.
+ */
 contract Inheritance {
 
     address owner;
     bool deceased;
     uint money;
 
-    constructor() public payable {
+    event Deceased();
+    event Paid(address wallet, uint amount);
+
+    constructor() payable {
         owner = msg.sender;
         money = msg.value;
         deceased = false;
@@ -19,32 +29,95 @@ contract Inheritance {
     }
 
     modifier isDeceased {
-        require (deceased == true);
+        require (deceased == true, "still alive");
+        _;
+    }
+
+    modifier isAlive {
+        require (deceased == false, "already deceased");
         _;
     }
 
     address[] wallets;
 
+    // position in wallets plus one, 0 for addresses that are not heirs
+    mapping (address => uint) walletIndex;
+
     mapping (address => uint) inheritance;
 
-    function setup(address _wallet, uint _inheritance) public oneOwner {
-        require (money >= _inheritance, "not gonna work");
-        money -= _inheritance;
-        wallets.push(_wallet);
+    /** set the inheritance of _wallet, replacing any previous amount; 0 removes the heir */
+    function setup(address _wallet, uint _inheritance) public oneOwner isAlive {
+        uint available = money + inheritance[_wallet];
+        require (available >= _inheritance, "not gonna work");
+        money = available - _inheritance;
         inheritance[_wallet] = _inheritance;
+        if (_inheritance == 0) {
+            _remove(_wallet);
+        } else if (walletIndex[_wallet] == 0) {
+            wallets.push(_wallet);
+            walletIndex[_wallet] = wallets.length;
+        }
     }
 
-    function moneyPaid() private isDeceased {
-        for (uint i=0; i<wallets.length; i++){
-            wallets[i].transfer(inheritance[wallets[i]]);
+    function _remove(address _wallet) private {
+        uint index = walletIndex[_wallet];
+        if (index == 0) {
+            return;
         }
+        address last = wallets[wallets.length - 1];
+        wallets[index - 1] = last;
+        walletIndex[last] = index;
+        wallets.pop();
+        delete walletIndex[_wallet];
+    }
+
+    function heirCount() public view returns (uint) {
+        return wallets.length;
     }
-    
-    function died() public oneOwner{
+
+    function inheritanceOf(address _wallet) public view returns (uint) {
+        return inheritance[_wallet];
+    }
+
+    function died() public oneOwner isAlive {
         deceased = true;
-        moneyPaid();
+        emit Deceased();
+    }
+
+    /** pay msg.sender its inheritance */
+    function claim() public isDeceased {
+        uint amount = inheritance[msg.sender];
+        require (amount > 0, "nothing to claim");
+        inheritance[msg.sender] = 0;
+        (bool success, ) = payable(msg.sender).call{value: amount}("");
+        require (success, "payment failed");
+        emit Paid(msg.sender, amount);
     }
 
-    function () external payable oneOwner {}
+    /** pay the heirs wallets[start:start + count], heirs that reject the payment can still claim */
+    function payout(uint start, uint count) public isDeceased {
+        require (start <= wallets.length, "start out of range");
+        // start + count could overflow, compare count with what is left instead
+        uint end = count > wallets.length - start ? wallets.length : start + count;
+        for (uint i = start; i < end; i++) {
+            address wallet = wallets[i];
+            uint amount = inheritance[wallet];
+            if (amount == 0) {
+                continue;
+            }
+            inheritance[wallet] = 0;
+            // the stipend keeps a contract heir from spending the caller's gas
+            (bool success, ) = payable(wallet).call{value: amount, gas: 2300}("");
+            if (success) {
+                emit Paid(wallet, amount);
+            } else {
+                inheritance[wallet] = amount;
+            }
+        }
+    }
+
+    receive() external payable oneOwner isAlive {
+        money += msg.value;
+    }
 
-}
\ No newline at end of file
+}
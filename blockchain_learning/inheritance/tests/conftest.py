@@ -0,0 +1,6 @@
+#!/usr/bin/python3
+import os
+import sys
+
+# isolation.ChainTestCase is shared with the other brownie projects
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'testing'))
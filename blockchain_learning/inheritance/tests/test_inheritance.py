@@ -2,27 +2,30 @@
 # TODO: setup should allow removal of money
 # NOTE: more familiar with unittest, os using that for now
 
-import unittest
-from brownie import Inheritance, accounts, reverts
+from brownie import Inheritance, RejectingHeir, accounts, reverts
+from isolation import ChainTestCase
 
 
-class TestInheritanceContract(unittest.TestCase):
+class TestInheritanceContract(ChainTestCase):
 
     initial_balance = 100
 
+    @classmethod
+    def deploy(cls):
+        cls.ancestor = accounts[0]
+        cls.heirs = accounts[1:]
+        cls.funded_contract = Inheritance.deploy({'from': cls.ancestor, "value": cls.initial_balance})
+        cls.unfunded_contract = Inheritance.deploy({'from': cls.ancestor, "value": 0})
+
     def setUp(self):
         super().setUp()
-        self.ancestor = accounts[0]
-        self.heirs = accounts[1:]
-        self.inheritance_contract = Inheritance.deploy({'from': self.ancestor, "value": self.initial_balance})
+        self.inheritance_contract = self.funded_contract
 
     def _deploy_without_funds(func):
         """Sets the contract up so that it's initalized with no money
         the tests are otherwise set up so that the contract is initialized with self.initial_balance"""
         def wrapper(self):
-            self.inheritance_contract = Inheritance.deploy(
-                {'from': self.ancestor, "value": 0}
-                )
+            self.inheritance_contract = self.unfunded_contract
             return func(self)
         return wrapper
 
@@ -54,6 +57,98 @@ class TestInheritanceContract(unittest.TestCase):
         balance = self.heirs[0].balance()
         self.inheritance_contract.setup(self.heirs[0], self.initial_balance)
         self.inheritance_contract.died()
+        self.inheritance_contract.claim({'from': self.heirs[0]})
 
         assert self.inheritance_contract.balance() == 0
         assert self.heirs[0].balance() == balance + self.initial_balance
+
+    def test_setup_same_heir_twice(self):
+        self.inheritance_contract.setup(self.heirs[0], 60)
+        self.inheritance_contract.setup(self.heirs[0], 90)
+
+        assert self.inheritance_contract.heirCount() == 1
+        assert self.inheritance_contract.inheritanceOf(self.heirs[0]) == 90
+        with reverts():
+            self.inheritance_contract.setup(self.heirs[1], 11)
+
+    def test_remove_heir(self):
+        self.inheritance_contract.setup(self.heirs[0], 60)
+        self.inheritance_contract.setup(self.heirs[1], 40)
+        self.inheritance_contract.setup(self.heirs[0], 0)
+
+        assert self.inheritance_contract.heirCount() == 1
+        self.inheritance_contract.setup(self.heirs[2], 60)
+        assert self.inheritance_contract.heirCount() == 2
+
+    def test_claim_before_death(self):
+        self.inheritance_contract.setup(self.heirs[0], self.initial_balance)
+        with reverts("still alive"):
+            self.inheritance_contract.claim({'from': self.heirs[0]})
+
+    def test_claim_twice(self):
+        self.inheritance_contract.setup(self.heirs[0], self.initial_balance)
+        self.inheritance_contract.died()
+        self.inheritance_contract.claim({'from': self.heirs[0]})
+        with reverts("nothing to claim"):
+            self.inheritance_contract.claim({'from': self.heirs[0]})
+
+    def test_setup_after_death(self):
+        self.inheritance_contract.died()
+        with reverts("already deceased"):
+            self.inheritance_contract.setup(self.heirs[0], 1)
+
+    def test_payout(self):
+        balances = [heir.balance() for heir in self.heirs[:3]]
+        for heir in self.heirs[:3]:
+            self.inheritance_contract.setup(heir, 30)
+        self.inheritance_contract.died()
+        self.inheritance_contract.payout(0, 2, {'from': self.heirs[5]})
+        self.inheritance_contract.payout(2, 10, {'from': self.heirs[5]})
+
+        assert [heir.balance() for heir in self.heirs[:3]] == [balance + 30 for balance in balances]
+        assert self.inheritance_contract.balance() == self.initial_balance - 90
+
+    def test_payout_bounds(self):
+        balance = self.heirs[0].balance()
+        self.inheritance_contract.setup(self.heirs[0], 30)
+        self.inheritance_contract.died()
+        with reverts("start out of range"):
+            self.inheritance_contract.payout(2, 1)
+        # start + count overflows uint256
+        self.inheritance_contract.payout(0, 2 ** 256 - 1)
+        self.inheritance_contract.payout(1, 2 ** 256 - 1)
+
+        assert self.heirs[0].balance() == balance + 30
+
+    def test_rejecting_heir_does_not_block_payout(self):
+        rejecting = RejectingHeir.deploy({'from': self.ancestor})
+        balance = self.heirs[0].balance()
+        self.inheritance_contract.setup(rejecting, 50)
+        self.inheritance_contract.setup(self.heirs[0], 50)
+        self.inheritance_contract.died()
+        self.inheritance_contract.payout(0, 2)
+
+        assert self.heirs[0].balance() == balance + 50
+        assert self.inheritance_contract.inheritanceOf(rejecting) == 50
+
+    def _setup_heirs(self, count):
+        """count heirs of 1 wei at generated addresses"""
+        self.inheritance_contract = Inheritance.deploy({'from': self.ancestor, "value": count})
+        wallets = [f"0x{index + 0x1000:040x}" for index in range(count)]
+        for wallet in wallets:
+            self.inheritance_contract.setup(wallet, 1, {'from': self.ancestor})
+        return wallets
+
+    def test_gas_does_not_grow_with_heirs(self):
+        self._setup_heirs(1)
+        died_one = self.inheritance_contract.died({'from': self.ancestor})
+
+        wallets = self._setup_heirs(300)
+        died_many = self.inheritance_contract.died({'from': self.ancestor})
+        first_page = self.inheritance_contract.payout(0, 10)
+        last_page = self.inheritance_contract.payout(290, 10)
+
+        assert died_many.gas_used == died_one.gas_used
+        assert abs(last_page.gas_used - first_page.gas_used) < first_page.gas_used * 0.05
+        assert all(self.inheritance_contract.inheritanceOf(wallet) == 0 for wallet in wallets[:10] + wallets[290:])
+        assert self.inheritance_contract.inheritanceOf(wallets[150]) == 1
@@ -0,0 +1,26 @@
+#!/usr/bin/python3
+import unittest
+from brownie import chain
+
+
+class ChainTestCase(unittest.TestCase):
+    """unittest counterpart of the deploy-once fixtures and fn_isolation.
+
+    deploy() runs once for the class, then every test starts from the chain as
+    deploy() left it: the state is snapshotted after deploying and reverted after
+    each test.
+    """
+
+    @classmethod
+    def deploy(cls):
+        pass
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.deploy()
+        chain.snapshot()
+
+    def tearDown(self):
+        chain.revert()
+        super().tearDown()
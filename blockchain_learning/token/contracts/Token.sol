@@ -21,6 +21,13 @@ contract Token {
     mapping(address => uint256) balances;
     mapping(address => mapping(address => uint256)) allowed;
 
+    // EIP-2612
+    bytes32 public constant PERMIT_TYPEHASH = keccak256(
+        "Permit(address owner,address spender,uint256 value,uint256 nonce,uint256 deadline)"
+    );
+    bytes32 public DOMAIN_SEPARATOR;
+    mapping(address => uint256) public nonces;
+
     event Transfer(address from, address to, uint256 value);
     event Approval(address owner, address spender, uint256 value);
 
@@ -38,6 +45,16 @@ contract Token {
         totalSupply = _totalSupply;
         balances[msg.sender] = _totalSupply;
         emit Transfer(address(0), msg.sender, _totalSupply);
+
+        uint256 chainId;
+        assembly { chainId := chainid() }
+        DOMAIN_SEPARATOR = keccak256(abi.encode(
+            keccak256("EIP712Domain(string name,string version,uint256 chainId,address verifyingContract)"),
+            keccak256(bytes(_name)),
+            keccak256(bytes("1")),
+            chainId,
+            address(this)
+        ));
     }
 
     /**
@@ -82,6 +99,45 @@ contract Token {
         return true;
     }
 
+    /**
+        @notice Approve `_spender` to spend `_value` of `_owner`'s tokens with an off-chain signature (EIP-2612)
+        @dev The signature covers the owner's current nonce, so each one can be used once
+        @param _owner The address which owns the funds and signed the permit
+        @param _spender The address which will spend the funds
+        @param _value The amount of tokens to be spent
+        @param _deadline Timestamp after which the permit can no longer be used
+        @param _v Signature recovery id
+        @param _r Signature r
+        @param _s Signature s
+     */
+    function permit(
+        address _owner,
+        address _spender,
+        uint256 _value,
+        uint256 _deadline,
+        uint8 _v,
+        bytes32 _r,
+        bytes32 _s
+    )
+        public
+    {
+        require(_deadline >= block.timestamp, "Permit expired");
+        // only accept the lower half of s, the other signature of the same message is malleable
+        require(
+            uint256(_s) <= 0x7FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF5D576E7357A4501DDFE92F46681B20A0,
+            "Invalid signature"
+        );
+        bytes32 digest = keccak256(abi.encodePacked(
+            "\x19\x01",
+            DOMAIN_SEPARATOR,
+            keccak256(abi.encode(PERMIT_TYPEHASH, _owner, _spender, _value, nonces[_owner]++, _deadline))
+        ));
+        address signer = ecrecover(digest, _v, _r, _s);
+        require(signer != address(0) && signer == _owner, "Invalid signature");
+        allowed[_owner][_spender] = _value;
+        emit Approval(_owner, _spender, _value);
+    }
+
     /** shared logic for transfer and transferFrom */
     function _transfer(address _from, address _to, uint256 _value) internal {
         require(balances[_from] >= _value, "Insufficient balance");
@@ -122,4 +178,54 @@ contract Token {
         return true;
     }
 
+    /**
+        @notice Transfer tokens from msg.sender to many addresses in one transaction
+        @dev The sender's balance is read and written once for the whole batch
+        @param _to The addresses to transfer to
+        @param _values The amount to be transferred to each address
+        @return Success boolean
+     */
+    function batchTransfer(
+        address[] calldata _to,
+        uint256[] calldata _values
+    )
+        external
+        returns (bool)
+    {
+        require(_to.length == _values.length, "Length mismatch");
+        uint256 total = 0;
+        for (uint256 i = 0; i < _values.length; i++) {
+            total = total.add(_values[i]);
+        }
+        uint256 balance = balances[msg.sender];
+        require(balance >= total, "Insufficient balance");
+        balances[msg.sender] = balance.sub(total);
+        for (uint256 i = 0; i < _to.length; i++) {
+            balances[_to[i]] = balances[_to[i]].add(_values[i]);
+            emit Transfer(msg.sender, _to[i], _values[i]);
+        }
+        return true;
+    }
+
+    /**
+        @notice Approve many addresses to spend tokens on behalf of msg.sender
+        @param _spenders The addresses which will spend the funds
+        @param _values The amount each address may spend
+        @return Success boolean
+     */
+    function batchApprove(
+        address[] calldata _spenders,
+        uint256[] calldata _values
+    )
+        external
+        returns (bool)
+    {
+        require(_spenders.length == _values.length, "Length mismatch");
+        for (uint256 i = 0; i < _spenders.length; i++) {
+            allowed[msg.sender][_spenders[i]] = _values[i];
+            emit Approval(msg.sender, _spenders[i], _values[i]);
+        }
+        return true;
+    }
+
 }
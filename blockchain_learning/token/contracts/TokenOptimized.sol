@@ -0,0 +1,239 @@
+// below 0.8.20, which emits PUSH0 that the ganache-cli used by the test workflow cannot run
+pragma solidity 0.8.19;
+
+// SPDX-License-Identifier: MIT
+
+/**
+    @title Gas-optimized Token implementation
+    @notice Same ABI and behaviour as Token, written for the 0.8 compiler: arithmetic is
+            checked by the compiler, storage slots are read once per call and checks
+            that already guard a subtraction are not repeated
+ */
+contract TokenOptimized {
+
+    string public symbol;
+    string public name;
+    uint256 public immutable decimals;
+    uint256 public totalSupply;
+
+    mapping(address => uint256) balances;
+    mapping(address => mapping(address => uint256)) allowed;
+
+    // EIP-2612
+    bytes32 public constant PERMIT_TYPEHASH = keccak256(
+        "Permit(address owner,address spender,uint256 value,uint256 nonce,uint256 deadline)"
+    );
+    bytes32 public immutable DOMAIN_SEPARATOR;
+    mapping(address => uint256) public nonces;
+
+    event Transfer(address from, address to, uint256 value);
+    event Approval(address owner, address spender, uint256 value);
+
+    constructor(
+        string memory _name,
+        string memory _symbol,
+        uint256 _decimals,
+        uint256 _totalSupply
+    ) {
+        name = _name;
+        symbol = _symbol;
+        decimals = _decimals;
+        totalSupply = _totalSupply;
+        balances[msg.sender] = _totalSupply;
+        emit Transfer(address(0), msg.sender, _totalSupply);
+
+        DOMAIN_SEPARATOR = keccak256(abi.encode(
+            keccak256("EIP712Domain(string name,string version,uint256 chainId,address verifyingContract)"),
+            keccak256(bytes(_name)),
+            keccak256(bytes("1")),
+            block.chainid,
+            address(this)
+        ));
+    }
+
+    /**
+        @notice Getter to check the current balance of an address
+        @param _owner Address to query the balance of
+        @return Token balance
+     */
+    function balanceOf(address _owner) public view returns (uint256) {
+        return balances[_owner];
+    }
+
+    /**
+        @notice Getter to check the amount of tokens that an owner allowed to a spender
+        @param _owner The address which owns the funds
+        @param _spender The address which will spend the funds
+        @return The amount of tokens still available for the spender
+     */
+    function allowance(
+        address _owner,
+        address _spender
+    )
+        public
+        view
+        returns (uint256)
+    {
+        return allowed[_owner][_spender];
+    }
+
+    /**
+        @notice Approve an address to spend the specified amount of tokens on behalf of msg.sender
+        @dev Beware that changing an allowance with this method brings the risk that someone may use both the old
+             and the new allowance by unfortunate transaction ordering. One possible solution to mitigate this
+             race condition is to first reduce the spender's allowance to 0 and set the desired value afterwards:
+             https://github.com/ethereum/EIPs/issues/20#issuecomment-263524729
+        @param _spender The address which will spend the funds.
+        @param _value The amount of tokens to be spent.
+        @return Success boolean
+     */
+    function approve(address _spender, uint256 _value) public returns (bool) {
+        allowed[msg.sender][_spender] = _value;
+        emit Approval(msg.sender, _spender, _value);
+        return true;
+    }
+
+    /**
+        @notice Approve `_spender` to spend `_value` of `_owner`'s tokens with an off-chain signature (EIP-2612)
+        @dev The signature covers the owner's current nonce, so each one can be used once
+        @param _owner The address which owns the funds and signed the permit
+        @param _spender The address which will spend the funds
+        @param _value The amount of tokens to be spent
+        @param _deadline Timestamp after which the permit can no longer be used
+        @param _v Signature recovery id
+        @param _r Signature r
+        @param _s Signature s
+     */
+    function permit(
+        address _owner,
+        address _spender,
+        uint256 _value,
+        uint256 _deadline,
+        uint8 _v,
+        bytes32 _r,
+        bytes32 _s
+    )
+        public
+    {
+        require(_deadline >= block.timestamp, "Permit expired");
+        // only accept the lower half of s, the other signature of the same message is malleable
+        require(
+            uint256(_s) <= 0x7FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF5D576E7357A4501DDFE92F46681B20A0,
+            "Invalid signature"
+        );
+        uint256 nonce;
+        // a nonce cannot realistically reach 2**256
+        unchecked { nonce = nonces[_owner]++; }
+        bytes32 digest = keccak256(abi.encodePacked(
+            "\x19\x01",
+            DOMAIN_SEPARATOR,
+            keccak256(abi.encode(PERMIT_TYPEHASH, _owner, _spender, _value, nonce, _deadline))
+        ));
+        address signer = ecrecover(digest, _v, _r, _s);
+        require(signer != address(0) && signer == _owner, "Invalid signature");
+        allowed[_owner][_spender] = _value;
+        emit Approval(_owner, _spender, _value);
+    }
+
+    /** shared logic for transfer and transferFrom */
+    function _transfer(address _from, address _to, uint256 _value) internal {
+        uint256 fromBalance = balances[_from];
+        require(fromBalance >= _value, "Insufficient balance");
+        // the require guards the subtraction, and no balance can exceed totalSupply
+        unchecked {
+            balances[_from] = fromBalance - _value;
+            balances[_to] += _value;
+        }
+        emit Transfer(_from, _to, _value);
+    }
+
+    /**
+        @notice Transfer tokens to a specified address
+        @param _to The address to transfer to
+        @param _value The amount to be transferred
+        @return Success boolean
+     */
+    function transfer(address _to, uint256 _value) public returns (bool) {
+        _transfer(msg.sender, _to, _value);
+        return true;
+    }
+
+    /**
+        @notice Transfer tokens from one address to another
+        @param _from The address which you want to send tokens from
+        @param _to The address which you want to transfer to
+        @param _value The amount of tokens to be transferred
+        @return Success boolean
+     */
+    function transferFrom(
+        address _from,
+        address _to,
+        uint256 _value
+    )
+        public
+        returns (bool)
+    {
+        uint256 allowance_ = allowed[_from][msg.sender];
+        require(allowance_ >= _value, "Insufficient allowance");
+        unchecked {
+            allowed[_from][msg.sender] = allowance_ - _value;
+        }
+        _transfer(_from, _to, _value);
+        return true;
+    }
+
+    /**
+        @notice Transfer tokens from msg.sender to many addresses in one transaction
+        @dev The sender's balance is read and written once for the whole batch
+        @param _to The addresses to transfer to
+        @param _values The amount to be transferred to each address
+        @return Success boolean
+     */
+    function batchTransfer(
+        address[] calldata _to,
+        uint256[] calldata _values
+    )
+        external
+        returns (bool)
+    {
+        require(_to.length == _values.length, "Length mismatch");
+        uint256 total = 0;
+        for (uint256 i = 0; i < _values.length;) {
+            total += _values[i];
+            unchecked { ++i; }
+        }
+        uint256 balance = balances[msg.sender];
+        require(balance >= total, "Insufficient balance");
+        unchecked {
+            balances[msg.sender] = balance - total;
+            for (uint256 i = 0; i < _to.length; ++i) {
+                balances[_to[i]] += _values[i];
+                emit Transfer(msg.sender, _to[i], _values[i]);
+            }
+        }
+        return true;
+    }
+
+    /**
+        @notice Approve many addresses to spend tokens on behalf of msg.sender
+        @param _spenders The addresses which will spend the funds
+        @param _values The amount each address may spend
+        @return Success boolean
+     */
+    function batchApprove(
+        address[] calldata _spenders,
+        uint256[] calldata _values
+    )
+        external
+        returns (bool)
+    {
+        require(_spenders.length == _values.length, "Length mismatch");
+        for (uint256 i = 0; i < _spenders.length;) {
+            allowed[msg.sender][_spenders[i]] = _values[i];
+            emit Approval(msg.sender, _spenders[i], _values[i]);
+            unchecked { ++i; }
+        }
+        return true;
+    }
+
+}
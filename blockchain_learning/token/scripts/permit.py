@@ -0,0 +1,46 @@
+#!/usr/bin/python3
+
+from brownie import Token, accounts, chain
+from eth_keys import keys
+from eth_utils import keccak
+
+try:
+    from eth_abi import encode
+except ImportError:
+    # eth-abi < 4
+    from eth_abi import encode_abi as encode
+
+PERMIT_TYPEHASH = keccak(
+    text="Permit(address owner,address spender,uint256 value,uint256 nonce,uint256 deadline)"
+)
+
+
+def permit_digest(token, owner, spender, value, deadline, nonce=None):
+    """EIP-712 digest of a permit, with the owner's current nonce by default"""
+    nonce = token.nonces(owner) if nonce is None else nonce
+    struct = keccak(encode(
+        ['bytes32', 'address', 'address', 'uint256', 'uint256', 'uint256'],
+        [PERMIT_TYPEHASH, str(owner), str(spender), value, nonce, deadline],
+    ))
+    return keccak(b'\x19\x01' + bytes(token.DOMAIN_SEPARATOR()) + struct)
+
+
+def sign_permit(token, owner, spender, value, deadline, nonce=None, signer=None):
+    """(v, r, s) of a permit signed off-chain by signer (default owner), a LocalAccount
+    such as one from accounts.add()"""
+    signer = owner if signer is None else signer
+    key = keys.PrivateKey(bytes.fromhex(signer.private_key[2:]))
+    signature = key.sign_msg_hash(permit_digest(token, owner, spender, value, deadline, nonce))
+    return signature.v + 27, signature.r.to_bytes(32, 'big'), signature.s.to_bytes(32, 'big')
+
+
+def main():
+    token = Token.deploy("Test Token", "TST", 18, 1e21, {'from': accounts[0]})
+    owner = accounts.add()
+    token.transfer(owner, 1e18, {'from': accounts[0]})
+
+    # the spender pays for the approval, owner only signs
+    deadline = chain.time() + 3600
+    v, r, s = sign_permit(token, owner, accounts[1], 1e18, deadline)
+    token.permit(owner, accounts[1], 1e18, deadline, v, r, s, {'from': accounts[1]})
+    return token
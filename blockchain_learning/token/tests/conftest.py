@@ -1,7 +1,11 @@
 #!/usr/bin/python3
-
+import os
+import sys
 import pytest
 
+# isolation.ChainTestCase is shared with the other brownie projects
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'testing'))
+
 
 @pytest.fixture(scope="function", autouse=True)
 def isolate(fn_isolation):
@@ -10,6 +14,8 @@ def isolate(fn_isolation):
     pass
 
 
-@pytest.fixture(scope="module")
-def token(Token, accounts):
-    return Token.deploy("Test Token", "TST", 18, 1e21, {'from': accounts[0]})
+# every token test runs against each implementation, they share one ABI
+@pytest.fixture(scope="module", params=["Token", "TokenOptimized"])
+def token(request, accounts):
+    Contract = request.getfixturevalue(request.param)
+    return Contract.deploy("Test Token", "TST", 18, 1e21, {'from': accounts[0]})
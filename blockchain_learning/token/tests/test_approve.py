@@ -1,15 +1,15 @@
 #!/usr/bin/python3
-import unittest
 import pytest
 from brownie import Token, accounts
+from isolation import ChainTestCase
 
 
-class TestToken(unittest.TestCase):
+class TestToken(ChainTestCase):
 
-    def setUp(self):
-        super().setUp()
-        self.accounts = accounts
-        self.token = Token.deploy("Test Token", "TST", 18, 1e21, {'from': self.accounts[0]})
+    @classmethod
+    def deploy(cls):
+        cls.accounts = accounts
+        cls.token = Token.deploy("Test Token", "TST", 18, 1e21, {'from': cls.accounts[0]})
 
     def test_approve(self):
         self.token.approve(self.accounts[1], 10**19, {'from': self.accounts[0]})
@@ -0,0 +1,32 @@
+#!/usr/bin/python3
+import brownie
+
+
+def test_batch_approve(accounts, token):
+    spenders = accounts[1:4]
+    amounts = [10**18, 2 * 10**18, 3 * 10**18]
+
+    token.batchApprove(spenders, amounts, {'from': accounts[0]})
+
+    for spender, amount in zip(spenders, amounts):
+        assert token.allowance(accounts[0], spender) == amount
+
+
+def test_returns_true(accounts, token):
+    tx = token.batchApprove(accounts[1:3], [10**18] * 2, {'from': accounts[0]})
+
+    assert tx.return_value is True
+
+
+def test_length_mismatch(accounts, token):
+    with brownie.reverts("Length mismatch"):
+        token.batchApprove(accounts[1:3], [10**18], {'from': accounts[0]})
+
+
+def test_approval_events_fire(accounts, token):
+    spenders = accounts[1:3]
+    tx = token.batchApprove(spenders, [10**18, 0], {'from': accounts[0]})
+
+    assert len(tx.events) == 2
+    assert tx.events["Approval"][0].values() == [accounts[0], spenders[0], 10**18]
+    assert tx.events["Approval"][1].values() == [accounts[0], spenders[1], 0]
@@ -0,0 +1,96 @@
+#!/usr/bin/python3
+import brownie
+
+
+def test_sender_balance_decreases_by_total(accounts, token):
+    sender_balance = token.balanceOf(accounts[0])
+    amounts = [sender_balance // 10, sender_balance // 20, 1]
+
+    token.batchTransfer(accounts[1:4], amounts, {'from': accounts[0]})
+
+    assert token.balanceOf(accounts[0]) == sender_balance - sum(amounts)
+
+
+def test_receiver_balances_increase(accounts, token):
+    receivers = accounts[1:4]
+    balances = [token.balanceOf(receiver) for receiver in receivers]
+    amounts = [10**18, 2 * 10**18, 3 * 10**18]
+
+    token.batchTransfer(receivers, amounts, {'from': accounts[0]})
+
+    for receiver, balance, amount in zip(receivers, balances, amounts):
+        assert token.balanceOf(receiver) == balance + amount
+
+
+def test_repeated_receiver(accounts, token):
+    receiver_balance = token.balanceOf(accounts[1])
+
+    token.batchTransfer([accounts[1], accounts[1]], [10**18, 10**18], {'from': accounts[0]})
+
+    assert token.balanceOf(accounts[1]) == receiver_balance + 2 * 10**18
+
+
+def test_transfer_to_self(accounts, token):
+    sender_balance = token.balanceOf(accounts[0])
+
+    token.batchTransfer([accounts[0], accounts[1]], [10**18, 10**18], {'from': accounts[0]})
+
+    assert token.balanceOf(accounts[0]) == sender_balance - 10**18
+
+
+def test_total_supply_not_affected(accounts, token):
+    total_supply = token.totalSupply()
+
+    token.batchTransfer(accounts[1:4], [10**18] * 3, {'from': accounts[0]})
+
+    assert token.totalSupply() == total_supply
+
+
+def test_returns_true(accounts, token):
+    tx = token.batchTransfer(accounts[1:3], [10**18] * 2, {'from': accounts[0]})
+
+    assert tx.return_value is True
+
+
+def test_empty_batch(accounts, token):
+    sender_balance = token.balanceOf(accounts[0])
+
+    token.batchTransfer([], [], {'from': accounts[0]})
+
+    assert token.balanceOf(accounts[0]) == sender_balance
+
+
+def test_insufficient_balance(accounts, token):
+    balance = token.balanceOf(accounts[0])
+
+    with brownie.reverts("Insufficient balance"):
+        token.batchTransfer(accounts[1:3], [balance, 1], {'from': accounts[0]})
+
+
+def test_total_overflow(accounts, token):
+    with brownie.reverts():
+        token.batchTransfer(accounts[1:3], [2**256 - 1, 2], {'from': accounts[0]})
+
+
+def test_length_mismatch(accounts, token):
+    with brownie.reverts("Length mismatch"):
+        token.batchTransfer(accounts[1:3], [10**18], {'from': accounts[0]})
+
+
+def test_transfer_events_fire(accounts, token):
+    receivers = accounts[1:4]
+    amounts = [10**18, 2 * 10**18, 3 * 10**18]
+    tx = token.batchTransfer(receivers, amounts, {'from': accounts[0]})
+
+    assert len(tx.events) == 3
+    for event, receiver, amount in zip(tx.events["Transfer"], receivers, amounts):
+        assert event.values() == [accounts[0], receiver, amount]
+
+
+def test_gas_per_recipient_below_single_transfer(accounts, token):
+    receivers = accounts[1:10]
+    single = token.transfer(receivers[0], 10**18, {'from': accounts[0]})
+    batch = token.batchTransfer(receivers, [10**18] * len(receivers), {'from': accounts[0]})
+
+    per_recipient = batch.gas_used / len(receivers)
+    assert per_recipient < single.gas_used
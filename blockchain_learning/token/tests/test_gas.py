@@ -0,0 +1,31 @@
+#!/usr/bin/python3
+import pytest
+
+
+@pytest.fixture(scope="module")
+def tokens(Token, TokenOptimized, accounts):
+    return {
+        Contract._name: Contract.deploy("Test Token", "TST", 18, 1e21, {'from': accounts[0]})
+        for Contract in (Token, TokenOptimized)
+    }
+
+
+def gas_report(token, accounts):
+    """gas used by transfer, approve and transferFrom, each to a fresh slot"""
+    transfer = token.transfer(accounts[1], 10**18, {'from': accounts[0]})
+    approve = token.approve(accounts[1], 10**19, {'from': accounts[0]})
+    transfer_from = token.transferFrom(accounts[0], accounts[2], 10**18, {'from': accounts[1]})
+    return {
+        'transfer': transfer.gas_used,
+        'approve': approve.gas_used,
+        'transferFrom': transfer_from.gas_used,
+    }
+
+
+def test_gas_optimized_below_original(tokens, accounts):
+    reports = {name: gas_report(token, accounts) for name, token in tokens.items()}
+
+    # approve is the same single SSTORE in both, the others read each slot once less
+    for method in ('transfer', 'transferFrom'):
+        assert reports['TokenOptimized'][method] < reports['Token'][method], method
+    assert reports['TokenOptimized']['approve'] <= reports['Token']['approve']
@@ -0,0 +1,88 @@
+#!/usr/bin/python3
+import brownie
+import pytest
+from scripts.permit import sign_permit
+
+
+@pytest.fixture(scope="module")
+def owner(accounts, token):
+    # permits are signed off-chain, which needs an account with a known private key
+    owner = accounts.add()
+    token.transfer(owner, 10**20, {'from': accounts[0]})
+    return owner
+
+
+@pytest.fixture
+def deadline(chain):
+    return chain.time() + 3600
+
+
+def test_permit_sets_allowance(accounts, token, owner, deadline):
+    v, r, s = sign_permit(token, owner, accounts[1], 10**19, deadline)
+    token.permit(owner, accounts[1], 10**19, deadline, v, r, s, {'from': accounts[1]})
+
+    assert token.allowance(owner, accounts[1]) == 10**19
+
+
+def test_permit_increments_nonce(accounts, token, owner, deadline):
+    nonce = token.nonces(owner)
+    v, r, s = sign_permit(token, owner, accounts[1], 10**19, deadline)
+    token.permit(owner, accounts[1], 10**19, deadline, v, r, s, {'from': accounts[1]})
+
+    assert token.nonces(owner) == nonce + 1
+
+
+def test_permit_then_transfer_from(accounts, token, owner, deadline):
+    owner_balance = token.balanceOf(owner)
+    v, r, s = sign_permit(token, owner, accounts[1], 10**19, deadline)
+    token.permit(owner, accounts[1], 10**19, deadline, v, r, s, {'from': accounts[1]})
+    token.transferFrom(owner, accounts[2], 10**19, {'from': accounts[1]})
+
+    assert token.balanceOf(owner) == owner_balance - 10**19
+    assert token.allowance(owner, accounts[1]) == 0
+
+
+def test_approval_event_fires(accounts, token, owner, deadline):
+    v, r, s = sign_permit(token, owner, accounts[1], 10**19, deadline)
+    tx = token.permit(owner, accounts[1], 10**19, deadline, v, r, s, {'from': accounts[1]})
+
+    assert len(tx.events) == 1
+    assert tx.events["Approval"].values() == [owner, accounts[1], 10**19]
+
+
+def test_replay(accounts, token, owner, deadline):
+    v, r, s = sign_permit(token, owner, accounts[1], 10**19, deadline)
+    token.permit(owner, accounts[1], 10**19, deadline, v, r, s, {'from': accounts[1]})
+
+    with brownie.reverts("Invalid signature"):
+        token.permit(owner, accounts[1], 10**19, deadline, v, r, s, {'from': accounts[1]})
+
+
+def test_expired(accounts, token, owner, chain):
+    deadline = chain.time() - 1
+    v, r, s = sign_permit(token, owner, accounts[1], 10**19, deadline)
+
+    with brownie.reverts("Permit expired"):
+        token.permit(owner, accounts[1], 10**19, deadline, v, r, s, {'from': accounts[1]})
+
+
+def test_wrong_signer(accounts, token, owner, deadline):
+    v, r, s = sign_permit(token, owner, accounts[1], 10**19, deadline, signer=accounts.add())
+
+    with brownie.reverts("Invalid signature"):
+        token.permit(owner, accounts[1], 10**19, deadline, v, r, s, {'from': accounts[1]})
+
+
+def test_wrong_value(accounts, token, owner, deadline):
+    v, r, s = sign_permit(token, owner, accounts[1], 10**19, deadline)
+
+    with brownie.reverts("Invalid signature"):
+        token.permit(owner, accounts[1], 10**20, deadline, v, r, s, {'from': accounts[1]})
+
+
+def test_future_nonce(accounts, token, owner, deadline):
+    nonce = token.nonces(owner) + 1
+    v, r, s = sign_permit(token, owner, accounts[1], 10**19, deadline, nonce=nonce)
+
+    with brownie.reverts("Invalid signature"):
+        token.permit(owner, accounts[1], 10**19, deadline, v, r, s, {'from': accounts[1]})